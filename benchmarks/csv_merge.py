@@ -0,0 +1,157 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+"""Measure the towflight merge of the csv reader
+
+Writes a synthetic export with the given number of lines, in which every
+other glider flight is followed by a separate towflight line, and measures
+parsing, the list based merge (:meth:`~pysk.db.CsvReader.__call__`) and the
+streaming merge (:meth:`~pysk.db.CsvReader.iterate`). With ``--legacy``, the
+former quadratic merge (linear search by flight id and removal from the middle
+of the list) is timed on the same records for comparison.
+
+No database is required.
+
+Usage::
+
+   python -m benchmarks.csv_merge [nLines] [--legacy]
+"""
+
+import sys, os
+from copy import copy
+from datetime import datetime, timedelta
+from tempfile import mkstemp
+from time import time
+from StringIO import StringIO
+
+from pysk.db import CsvReader
+
+
+HEADER= ( "Datum;Kennzeichen;Pilot Vorname;Pilot Nachname;Begleiter Vorname;"
+          "Begleiter Nachname;Flugtyp;Anzahl Landungen;Modus;Startzeit;"
+          "Landezeit;Startart;Kennzeichen Schleppflugzeug;"
+          "Modus Schleppflugzeug;Startort;Zielort;Bemerkungen;"
+          "Abrechnungshinweis;DBID\n" )
+
+LINE= ( "{date};{registration};John;Doe{pilot};;;{type};1;Lokal;{departure};"
+        "{landing};{launch};;;Home;Home;;;{id}\n" )
+
+
+def writeExport(path, nLines):
+    """Write synthetic csv export
+    
+    Arguments:
+        path (str): Output file
+        nLines (int): Number of lines (without header)
+    """
+    t0= datetime(2015, 4, 1, 10, 0)
+    
+    with open(path, "w") as oFile:
+        oFile.write(HEADER)
+        
+        id= 0
+        n= 0
+        while n < nLines:
+            id+= 1
+            departure= t0 + timedelta(minutes=3*id)
+            towed= id % 2 == 0
+            fields= dict( date= departure.strftime("%Y-%m-%d"),
+                          departure= departure.strftime("%H:%M"),
+                          landing= (departure + timedelta(minutes=30))
+                                   .strftime("%H:%M"),
+                          pilot= id % 50,
+                          id= id )
+            
+            oFile.write( LINE.format( registration= "D-{0:04d}".format(id % 30),
+                                      type= "Normalflug",
+                                      launch= "F-Schlepp" if towed else "Winde",
+                                      **fields ))
+            n+= 1
+            
+            if towed and n < nLines:
+                oFile.write( LINE.format( registration= "D-KXYZ",
+                                          type= "Schlepp",
+                                          launch= "Eigenstart",
+                                          **fields ))
+                n+= 1
+
+
+def legacyMerge(reader, records):
+    """Quadratic merge as implemented before the hash index
+    
+    Arguments:
+        reader (:class:`~pysk.db.CsvReader`): Reader used for diagnostics
+        records (list): Records, modified in place
+    """
+    nRec= len(records)
+    
+    i= 0
+    while i != nRec:
+        src= records[i]
+        i+= 1
+        
+        if not reader._isTowflight(src.flight):
+            continue
+        
+        dest= None
+        for rec in records:
+            if rec.flight.id == src.flight.id:
+                dest= rec
+                break
+        
+        if dest is None or not reader._mergeTowflight(src, dest):
+            continue
+        
+        i-= 1
+        nRec-= 1
+        records.pop(i)
+
+
+def timed(function, *args, **kwargs):
+    """Call function and measure the elapsed time
+    
+    Return:
+        Tuple ``(result, seconds)``
+    """
+    t0= time()
+    result= function(*args, **kwargs)
+    
+    return result, time() - t0
+
+
+def main(args):
+    legacy= "--legacy" in args
+    args= [ a for a in args if a != "--legacy" ]
+    nLines= int(args[0]) if args else 100000
+    
+    fd, path= mkstemp(suffix=".csv")
+    os.close(fd)
+    
+    try:
+        writeExport(path, nLines)
+        reader= CsvReader(logStream=StringIO(), verbose=0)
+        
+        records, tParse= timed( reader, path, mergeTowflights=False )
+        
+        merged= list(records)
+        nMerged, tMerge= timed( reader._mergeTowflights, merged )
+        
+        streamed, tStream= timed( lambda: sum(1 for rec in
+                                              reader.iterate(path, window=100)) )
+        
+        print "Lines                       : {0}".format(nLines)
+        print "Merged towflights           : {0}".format(nMerged)
+        print "Parse only                  : {0:8.2f} s".format(tParse)
+        print "Merge (hash index)          : {0:8.3f} s".format(tMerge)
+        print "Parse + streaming merge     : {0:8.2f} s".format(tStream)
+        
+        if legacy:
+            copies= [ copy(rec) for rec in records ]
+            result, tLegacy= timed( legacyMerge, reader, copies )
+            print "Merge (legacy, quadratic)   : {0:8.3f} s".format(tLegacy)
+    finally:
+        os.remove(path)
+    
+
+if __name__ == "__main__":
+    main( sys.argv[1:] )
@@ -0,0 +1,359 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+"""Measure the throughput of the stages of a flight import
+
+Generates a synthetic season (see :mod:`benchmarks.season`) and times each
+stage of ``sk.py import-flights`` separately:
+
+- ``parse``: parsing the csv export (:class:`~pysk.db.CsvReader`)
+- ``merge``: merging towflights into their glider flights
+- ``resolve``: looking up pilots, planes and launch methods and completing the
+  flights (as done by :class:`~pysk.tools.ImportFlights`)
+- ``conflicts``: conflict handling including the inserts of the kept flights
+  (:class:`~pysk.db.ConflictHandler`, mode ignore)
+- ``staged``: the same with :class:`~pysk.db.StagedConflictHandler`
+- ``insert``: plain inserts of all flights without conflict handling
+
+An SQLite database serves as stand-in for the server. It is populated with the
+pilots, planes and launch methods of the season and with flights conflicting
+with a share of the imported flights. Each stage, which writes, gets a fresh
+database.
+
+The results are printed as a table and written as JSON with ``--output``. Pass
+the JSON file of a previous run with ``--compare`` to print the relative
+change of each stage.
+
+Usage::
+
+   python -m benchmarks.import_throughput [--days N] [--output result.json]
+          [--compare baseline.json]
+"""
+
+import sys, os
+import json
+import argparse
+import platform
+import shutil
+import subprocess
+from tempfile import mkdtemp
+from time import time
+from StringIO import StringIO
+
+from pysk.db import CsvReader, Database, SQLiteBackend
+from pysk.db import ConflictHandler, StagedConflictHandler, Resolver
+from pysk.db.conflict_handler import IGNORE_ALL_CONFLICTS
+from pysk.db.record import RecordError
+from pysk.tools import ToolBase, ImportFlights
+
+from . import season as seasonModule
+
+
+#: Order of the stages in the output
+STAGES= ("parse", "merge", "resolve", "conflicts", "staged", "insert")
+
+
+class Parent(ToolBase):
+    """Minimal parent tool providing the database to :class:`ImportFlights`
+
+    Arguments:
+        db (:class:`~pysk.db.Database`): Database
+    """
+
+    def __init__(self, db):
+        super(Parent, self).__init__()
+        self.db= db
+
+
+
+class Benchmark(object):
+    """Run the import stages on a season
+
+    Arguments:
+        season (:class:`~benchmarks.season.Season`): Generated season
+        workDir (str): Directory for the csv export and database files
+        onDisk (bool): Store the databases in files instead of memory
+        commitInterval (int): Commit interval of the conflict handlers and of
+           the plain inserts
+    """
+
+    def __init__(self, season, workDir, onDisk=False, commitInterval=1000):
+        self.season= season
+        self.workDir= workDir
+        self.onDisk= onDisk
+        self.commitInterval= commitInterval
+        self.path= os.path.join(workDir, "season.csv")
+        self.results= dict() # stage -> dictionary of measurements
+        self._nDatabases= 0
+
+
+    def database(self, existing=True):
+        """Create populated database
+
+        Arguments:
+            existing (bool): Insert the flights conflicting with the season
+
+        Return:
+            :class:`~pysk.db.Database` instance
+        """
+        path= ":memory:"
+        if self.onDisk:
+            self._nDatabases+= 1
+            path= os.path.join( self.workDir,
+                                "db{0}.sqlite".format(self._nDatabases) )
+
+        db= Database( backend= SQLiteBackend(path) )
+        self.season.populate(db, existing=existing)
+
+        return db
+
+
+    def timed(self, stage, function, items=None, db=None):
+        """Call function and record its duration
+
+        Arguments:
+            stage (str): Name of stage
+            function (callable): Function to call without arguments
+            items (callable): Function computing the number of processed items
+               from the result. Defaults to *None* (length of result).
+            db (:class:`~pysk.db.Database`): Database to count the statements
+               of. Defaults to *None*.
+
+        Return:
+            Result of *function*
+        """
+        n0= db.nQueries if db else 0
+        t0= time()
+        result= function()
+        seconds= time() - t0
+
+        nItems= items(result) if items else len(result)
+
+        self.results[stage]= { "seconds": seconds,
+                               "items": nItems,
+                               "perSecond": nItems / seconds if seconds else None,
+                               "queries": db.nQueries - n0 if db else 0 }
+
+        return result
+
+
+    def run(self, stages=STAGES):
+        """Run the given stages
+
+        Arguments:
+            stages (iterable): Names of the stages to run besides parsing,
+               merging and resolving, which are always run
+
+        Return:
+            Dictionary of measurements by stage
+        """
+        self.season.writeCsv(self.path)
+
+        reader= CsvReader(logStream=StringIO(), verbose=0)
+
+        records= self.timed( "parse",
+                             lambda: reader( self.path,
+                                             delimiter=";",
+                                             mergeTowflights=False ))
+
+        nRecords= len(records)
+        nMerged= self.timed( "merge", lambda: reader.merge(records),
+                             items=lambda n: nRecords )
+        self.results["merge"]["merged"]= nMerged
+
+        db= self.database()
+        tool= ImportFlights( Parent(db) )
+        tool._resolver= Resolver(db)
+
+        flights= self.timed( "resolve", lambda: self.resolve(tool, records),
+                             db=db )
+
+        if "conflicts" in stages:
+            self.handle("conflicts", ConflictHandler, flights)
+
+        if "staged" in stages:
+            self.handle("staged", StagedConflictHandler, flights)
+
+        if "insert" in stages:
+            db= self.database(existing=False)
+            self.timed( "insert", lambda: self.insert(db, flights), db=db )
+
+        return self.results
+
+
+    def resolve(self, tool, records):
+        """Resolve names and complete flights
+
+        Return:
+            Records with valid flights
+        """
+        missing= { "pilots": dict(),
+                   "planes": dict(),
+                   "launch methods": dict() }
+
+        retval= []
+        for rec in records:
+            if not rec.flight:
+                continue
+
+            tool._resolveRecord(rec, missing)
+
+            try:
+                rec.updateFlight()
+            except RecordError:
+                continue
+
+            retval.append(rec)
+
+        return retval
+
+
+    def handle(self, stage, handlerClass, records):
+        """Pass records to a conflict handler on a fresh database
+        """
+        db= self.database()
+        handler= handlerClass( db, mode=IGNORE_ALL_CONFLICTS,
+                               verbose=0,
+                               commitInterval=self.commitInterval )
+
+        def run():
+            for rec in records:
+                handler(rec)
+
+            handler.checkpoint(force=True)
+
+            return handler
+
+        self.timed( stage, run, items=lambda handler: handler.nProcessed,
+                    db=db )
+
+        self.results[stage]["flights"]= sum(1 for f in db.iterFlights())
+        self.results[stage]["deleted"]= handler.nDeleted
+
+
+    def insert(self, db, records):
+        """Insert flights in chunks of the commit interval
+        """
+        chunkSize= self.commitInterval or len(records)
+
+        for i in xrange(0, len(records), chunkSize):
+            db.insertFlights([ rec.flight for rec in records[i:i + chunkSize] ])
+            db.commit()
+
+        return records
+
+
+
+def revision():
+    """Get git revision of the working tree, if available
+
+    Return:
+        Output of ``git describe`` or *None*
+    """
+    try:
+        return subprocess.check_output(
+                   ["git", "describe", "--always", "--dirty"],
+                   cwd=os.path.dirname( os.path.abspath(__file__) ),
+                   stderr=open(os.devnull, "w") ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def best(runs):
+    """Combine repeated runs by taking the fastest run of each stage
+    """
+    retval= dict()
+
+    for results in runs:
+        for stage, result in results.iteritems():
+            if ( stage not in retval
+                 or result["seconds"] < retval[stage]["seconds"] ):
+                retval[stage]= result
+
+    return retval
+
+
+def printResults(results, baseline=None):
+    """Print table of results
+
+    Arguments:
+        results (dict): Measurements by stage
+        baseline (dict): Measurements of a previous run. Defaults to *None*.
+    """
+    print "{0:<10} {1:>10} {2:>10} {3:>12} {4:>10}{5}".format(
+          "Stage", "Items", "Seconds", "Items/s", "Queries",
+          "     Change" if baseline else "" )
+
+    for stage in STAGES:
+        if stage not in results:
+            continue
+
+        r= results[stage]
+        change= ""
+        if baseline and stage in baseline and baseline[stage]["seconds"]:
+            change= " {0:>+9.1f} %".format(
+                        100. * (r["seconds"] / baseline[stage]["seconds"] - 1) )
+
+        print "{0:<10} {1:>10} {2:>10.3f} {3:>12.0f} {4:>10}{5}".format(
+              stage, r["items"], r["seconds"], r["perSecond"] or 0,
+              r["queries"], change )
+
+
+def main(args):
+    parser= argparse.ArgumentParser(description="Measure the throughput of "
+                                                "the import stages")
+    seasonModule.addArguments(parser)
+    parser.add_argument( "--stages", nargs="+", choices=STAGES[3:],
+                         default=list(STAGES[3:]),
+                         help="Stages to run besides parse, merge and resolve")
+    parser.add_argument( "--commit-interval", type=int, default=1000 )
+    parser.add_argument( "--on-disk", action="store_true",
+                         help="Store the databases in files" )
+    parser.add_argument( "--repeat", type=int, default=1,
+                         help="Number of runs. The fastest run of each stage "
+                              "is reported." )
+    parser.add_argument( "--output", help="Write results as JSON to file" )
+    parser.add_argument( "--compare",
+                         help="JSON file of a previous run to compare with" )
+    options= parser.parse_args(args)
+
+    season= seasonModule.fromOptions(options)
+    workDir= mkdtemp(prefix="pysk-benchmark-")
+
+    try:
+        runs= [ Benchmark( season, workDir,
+                           onDisk=options.on_disk,
+                           commitInterval=options.commit_interval )
+                .run(options.stages)
+                for i in xrange(options.repeat) ]
+    finally:
+        shutil.rmtree(workDir)
+
+    output= { "benchmark": "import_throughput",
+              "revision": revision(),
+              "python": platform.python_version(),
+              "platform": platform.platform(),
+              "season": season.parameters(),
+              "flights": len(season.flights),
+              "lines": season.nLines(),
+              "commitInterval": options.commit_interval,
+              "onDisk": options.on_disk,
+              "repeat": options.repeat,
+              "stages": best(runs) }
+
+    baseline= None
+    if options.compare:
+        with open(options.compare) as iFile:
+            baseline= json.load(iFile)["stages"]
+
+    print "Season: {0} flights, {1} lines".format( output["flights"],
+                                                   output["lines"] )
+    printResults(output["stages"], baseline)
+
+    if options.output:
+        with open(options.output, "w") as oFile:
+            json.dump(output, oFile, indent=2, sort_keys=True)
+
+
+if __name__ == "__main__":
+    main( sys.argv[1:] )
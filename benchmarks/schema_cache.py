@@ -0,0 +1,101 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+"""Count metadata round trips per inserted flight
+
+Inserts a number of flights one at a time (as done by the conflict handler
+during imports) once reloading the full schema before each insert, which
+mimics the behaviour prior to the introduction of the schema registry, and once
+with the registry enabled. All changes are rolled back afterwards.
+
+The benchmark assumes that a database startkladde-test exists with a user
+sk-test-user with password sk (same as the unit tests).
+
+Usage::
+
+   python -m benchmarks.schema_cache [nFlights]
+"""
+
+import sys
+from datetime import datetime, timedelta
+
+from pysk.db import Database
+from pysk.db.model import Flight
+
+
+def makeFlights(n):
+    """Create a list of dummy flights
+    
+    Arguments:
+        n (int): Number of flights to create
+    
+    Return:
+        List of :class:`~pysk.db.model.Flight` instances
+    """
+    t0= datetime(1970, 1, 1, 10, 0)
+    retval= []
+    
+    for i in xrange(n):
+        flight= Flight( type="normal",
+                        mode="local",
+                        departure_location="Benchmark",
+                        landing_location="Benchmark",
+                        num_landings=1,
+                        departure_time= t0 + timedelta(minutes=10*i),
+                        landing_time= t0 + timedelta(minutes=10*i+5) )
+        flight.update()
+        retval.append(flight)
+        
+    return retval
+
+
+def run(db, flights, cold):
+    """Insert flights one by one and count the statements sent to the server
+    
+    Arguments:
+        db (:class:`~pysk.db.Database`): Connected database
+        flights (list): Flights to insert
+        cold (bool): If ``True``, the schema of all tables is reloaded before
+           each insert
+    
+    Return:
+        Number of statements per inserted row
+    """
+    db.invalidateTables()
+    n0= db.nQueries
+
+    for flight in flights:
+        if cold:
+            db.invalidateTables()
+            db.getTables()
+
+        db.insertFlights([flight])
+
+    db.rollback()
+    
+    return float(db.nQueries - n0) / len(flights)
+
+
+def main(args):
+    n= int(args[0]) if args else 1000
+    
+    db= Database( user="sk-test-user",
+                  dbName="startkladde-test",
+                  password="sk")
+    flights= makeFlights(n)
+    nTables= len( db.listTables() )
+
+    before= run(db, flights, cold=True)
+    after= run(db, flights, cold=False)
+    
+    db.disconnect()
+    
+    print "Inserted {0} flights ({1} tables in database)".format(n, nTables)
+    print "Statements per row without registry: {0:.3f}".format(before)
+    print "Statements per row with registry   : {0:.3f}".format(after)
+    print "Metadata round trips per row       : {0:.3f} -> {1:.3f}".format(
+          before - 1, after - 1)
+    
+
+if __name__ == "__main__":
+    main( sys.argv[1:] )
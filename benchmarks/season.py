@@ -0,0 +1,359 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+"""Synthetic flight season for benchmarks
+
+Generates a startkladde csv export of a flying season and a matching database
+with pilots, planes, launch methods and flights, which conflict with a share of
+the exported flights. The generated data only depend on the parameters and the
+random seed, i.e. results of different versions are comparable.
+
+Each day consists of rounds, in which every plane flies at most once. Flights
+of a round depart three minutes apart and have distinct pilots and copilots,
+such that no conflicts occur except the ones created on purpose. Towed flights
+are followed by a separate towflight line (towplane ``D-KXYZ``) with the same
+flight id, as written by startkladde.
+
+Usage::
+
+   python -m benchmarks.season output.csv [--days N] [--planes N] ...
+"""
+
+import sys
+import random
+import argparse
+from datetime import datetime, timedelta
+
+from pysk.db.model import Pilot, Airplane, LaunchMethod, Flight
+
+
+HEADER= ( "Datum;Kennzeichen;Pilot Vorname;Pilot Nachname;Begleiter Vorname;"
+          "Begleiter Nachname;Flugtyp;Anzahl Landungen;Modus;Startzeit;"
+          "Landezeit;Startart;Kennzeichen Schleppflugzeug;"
+          "Modus Schleppflugzeug;Startort;Zielort;Bemerkungen;"
+          "Abrechnungshinweis;DBID\n" )
+
+LINE= ( "{date};{registration};{first_name};{last_name};{cofirst_name};"
+        "{colast_name};{type};1;Lokal;{departure};{landing};{launch};;;"
+        "Home;Home;;;{id}\n" )
+
+#: Registration of the towplane
+TOWPLANE= "D-KXYZ"
+
+#: Registration of the plane used for conflicting flights in the database
+OTHERPLANE= "D-XXXX"
+
+#: Club of all generated pilots and planes
+CLUB= "LSV Benchmark"
+
+#: Number of pilots reserved for towflights
+NTOWPILOTS= 3
+
+#: Minutes between the departures of a round
+STAGGER= 3
+
+#: Maximum duration of a glider flight in minutes
+MAXDURATION= 45
+
+
+class Season(object):
+    """Parameters and generated flights of a synthetic season
+
+    Arguments:
+        planes (int): Number of gliders. Defaults to 20.
+        pilots (int): Number of pilots. Defaults to 100.
+        days (int): Number of flying days. Defaults to 60.
+        flightsPerDay (int): Number of glider flights per day. Defaults to 40.
+        towShare (float): Share of aerotowed flights. Defaults to 0.3.
+        conflictRate (float): Share of flights, which conflict with a flight
+           in the database. Half of them are exact duplicates. Defaults to
+           0.05.
+        seed (int): Random seed. Defaults to 0.
+    """
+
+    def __init__(self, planes=20,
+                       pilots=100,
+                       days=60,
+                       flightsPerDay=40,
+                       towShare=0.3,
+                       conflictRate=0.05,
+                       seed=0):
+        """Create new season
+        """
+        if pilots < 2 * planes + NTOWPILOTS:
+            raise ValueError("At least {0} pilots required for {1} planes"
+                             .format(2 * planes + NTOWPILOTS, planes))
+
+        rounds= -(-flightsPerDay // planes)
+        if 8 * 60 + rounds * (STAGGER * planes + MAXDURATION) >= 24 * 60:
+            raise ValueError("Too many flights per day for {0} planes"
+                             .format(planes))
+
+        self.planes= planes
+        self.pilots= pilots
+        self.days= days
+        self.flightsPerDay= flightsPerDay
+        self.towShare= towShare
+        self.conflictRate= conflictRate
+        self.seed= seed
+
+        self.flights= [] # generated flights as dictionaries, by departure
+        self.existing= [] # conflicting flights in the database
+        self._generate()
+
+
+    def parameters(self):
+        """Get parameters of the season
+
+        Return:
+            Dictionary of the constructor arguments
+        """
+        return { "planes": self.planes,
+                 "pilots": self.pilots,
+                 "days": self.days,
+                 "flightsPerDay": self.flightsPerDay,
+                 "towShare": self.towShare,
+                 "conflictRate": self.conflictRate,
+                 "seed": self.seed }
+
+
+    def _generate(self):
+        """Generate the flights of the season
+        """
+        rng= random.Random(self.seed)
+        day0= datetime(2015, 4, 1)
+        gliderPilots= self.pilots - NTOWPILOTS
+        id= 0
+
+        for day in xrange(self.days):
+            start= day0 + timedelta(days=day, hours=8)
+
+            for i in xrange(0, self.flightsPerDay, self.planes):
+                n= min(self.planes, self.flightsPerDay - i)
+                crew= rng.sample(xrange(gliderPilots), 2 * n)
+                planes= rng.sample(xrange(self.planes), n)
+
+                for j in xrange(n):
+                    id+= 1
+                    departure= start + timedelta(minutes=STAGGER * j)
+                    copilot= None
+                    if rng.random() < 0.3:
+                        copilot= crew[n + j]
+
+                    self.flights.append(
+                        { "id": id,
+                          "plane": planes[j],
+                          "pilot": crew[j],
+                          "copilot": copilot,
+                          "towpilot": gliderPilots + rng.randrange(NTOWPILOTS)
+                                      if rng.random() < self.towShare
+                                      else None,
+                          "departure": departure,
+                          "landing": departure
+                                     + timedelta(minutes=rng.randint(5, MAXDURATION)) })
+
+                start+= timedelta(minutes=STAGGER * self.planes + MAXDURATION)
+
+        nConflicts= int( round(self.conflictRate * len(self.flights)) )
+
+        for k, flight in enumerate( rng.sample(self.flights, nConflicts) ):
+            if k % 2 == 0:
+                self.existing.append( dict(flight) )
+            else:
+                self.existing.append( dict( flight,
+                                            id= len(self.flights) + k,
+                                            plane= None,
+                                            copilot= None,
+                                            towpilot= None,
+                                            departure= flight["departure"]
+                                                       + timedelta(minutes=2) ))
+
+        self.existing.sort(key=lambda f: f["id"])
+
+
+    def nLines(self):
+        """Get number of csv lines (without header)
+
+        Return:
+            Number of glider flights and towflights
+        """
+        return sum( 1 + (f["towpilot"] is not None) for f in self.flights )
+
+
+    def writeCsv(self, path):
+        """Write the season as csv export
+
+        Arguments:
+            path (str): Output file
+        """
+        with open(path, "w") as oFile:
+            oFile.write(HEADER)
+
+            for f in self.flights:
+                fields= dict( date= f["departure"].strftime("%Y-%m-%d"),
+                              departure= f["departure"].strftime("%H:%M"),
+                              id= f["id"] )
+
+                cofirst_name, colast_name= "", ""
+                if f["copilot"] is not None:
+                    cofirst_name, colast_name= pilotName(f["copilot"])
+
+                first_name, last_name= pilotName(f["pilot"])
+                towed= f["towpilot"] is not None
+
+                oFile.write( LINE.format( registration= registration(f["plane"]),
+                                          first_name= first_name,
+                                          last_name= last_name,
+                                          cofirst_name= cofirst_name,
+                                          colast_name= colast_name,
+                                          type= "Normalflug",
+                                          landing= f["landing"].strftime("%H:%M"),
+                                          launch= "F-Schlepp" if towed else "Winde",
+                                          **fields ))
+
+                if towed:
+                    first_name, last_name= pilotName(f["towpilot"])
+                    landing= f["departure"] + timedelta(minutes=STAGGER - 1)
+
+                    oFile.write( LINE.format( registration= TOWPLANE,
+                                              first_name= first_name,
+                                              last_name= last_name,
+                                              cofirst_name= "",
+                                              colast_name= "",
+                                              type= "Schlepp",
+                                              landing= landing.strftime("%H:%M"),
+                                              launch= "Eigenstart",
+                                              **fields ))
+
+
+    def populate(self, db, existing=True):
+        """Insert pilots, planes, launch methods and conflicting flights
+
+        Changes are committed.
+
+        Arguments:
+            db (:class:`~pysk.db.Database`): Empty database
+            existing (bool): Insert the flights conflicting with the season.
+               Defaults to ``True``.
+        """
+        db.insert(Pilot, [ Pilot( id= i + 1,
+                                  first_name= pilotName(i)[0],
+                                  last_name= pilotName(i)[1],
+                                  club= CLUB )
+                           for i in xrange(self.pilots) ])
+
+        planes= [ registration(i) for i in xrange(self.planes) ]
+        planes+= [TOWPLANE, OTHERPLANE]
+        db.insert(Airplane, [ Airplane( id= i + 1,
+                                        registration= r,
+                                        club= CLUB )
+                              for i, r in enumerate(planes) ])
+
+        db.insert(LaunchMethod, [ LaunchMethod( id=1, name="Winde",
+                                                short_name="W", type="winch" ),
+                                  LaunchMethod( id=2, name="F-Schlepp",
+                                                short_name="F", type="airtow",
+                                                towplane_registration=TOWPLANE ),
+                                  LaunchMethod( id=3, name="Eigenstart",
+                                                short_name="E", type="self" ) ])
+
+        if existing:
+            db.insertFlights([ self.makeFlight(f) for f in self.existing ])
+
+        db.commit()
+
+
+    def makeFlight(self, f):
+        """Convert generated flight to database flight
+
+        Arguments:
+            f (dict): Generated flight
+
+        Return:
+            :class:`~pysk.db.model.Flight` instance
+        """
+        def pilotId(i):
+            return None if i is None else i + 1
+
+        towed= f["towpilot"] is not None
+        plane= f["plane"]
+        if plane is None:
+            plane= self.planes + 1
+
+        return Flight( id= f["id"],
+                       plane_id= plane + 1,
+                       pilot_id= pilotId(f["pilot"]),
+                       copilot_id= pilotId(f["copilot"]),
+                       type= "normal",
+                       mode= "local",
+                       departure_location= "Home",
+                       landing_location= "Home",
+                       num_landings= 1,
+                       departure_time= f["departure"],
+                       landing_time= f["landing"],
+                       launch_method_id= 2 if towed else 1,
+                       towplane_id= self.planes + 1 if towed else None,
+                       towpilot_id= pilotId(f["towpilot"]) )
+
+
+
+def registration(i):
+    """Get registration of a generated glider
+    """
+    return "D-{0:04d}".format(i)
+
+
+def pilotName(i):
+    """Get first and last name of a generated pilot
+    """
+    return "John", "Doe{0}".format(i)
+
+
+
+def main(args):
+    parser= argparse.ArgumentParser(description="Write a synthetic season as "
+                                                "csv export")
+    parser.add_argument("output")
+    addArguments(parser)
+    options= parser.parse_args(args)
+
+    season= fromOptions(options)
+    season.writeCsv(options.output)
+
+    print "Wrote {0} flights ({1} lines) to '{2}'".format( len(season.flights),
+                                                           season.nLines(),
+                                                           options.output )
+
+
+def addArguments(parser):
+    """Add the season parameters to an argument parser
+
+    Arguments:
+        parser (:class:`argparse.ArgumentParser`): Parser to extend
+    """
+    parser.add_argument("--planes", type=int, default=20)
+    parser.add_argument("--pilots", type=int, default=100)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--flights-per-day", type=int, default=40)
+    parser.add_argument("--tow-share", type=float, default=0.3)
+    parser.add_argument("--conflict-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def fromOptions(options):
+    """Create season from parsed arguments (see :func:`addArguments`)
+
+    Return:
+        :class:`Season` instance
+    """
+    return Season( planes= options.planes,
+                   pilots= options.pilots,
+                   days= options.days,
+                   flightsPerDay= options.flights_per_day,
+                   towShare= options.tow_share,
+                   conflictRate= options.conflict_rate,
+                   seed= options.seed )
+
+
+if __name__ == "__main__":
+    main( sys.argv[1:] )
@@ -6,7 +6,8 @@ from getpass import getpass
 
 from pysk.tools import ToolBase
 from pysk.tools import Help, ImportFlights, UpdateUsers, SetPilotEmail, Stats, Export
-from pysk.db import Database
+from pysk.tools import RebuildRollup
+from pysk.db import Database, SQLiteBackend
 
 
 class AdminTool(ToolBase):
@@ -22,7 +23,8 @@ class AdminTool(ToolBase):
                         "export" : Export(self),
                         "create-users" : UpdateUsers(self),
                         "set-pilot-email" : SetPilotEmail(self),
-                        "stats" : Stats(self) 
+                        "stats" : Stats(self),
+                        "rebuild-rollup" : RebuildRollup(self)
                       }
 
         description="Administrate the Statkladde Database"
@@ -44,6 +46,12 @@ class AdminTool(ToolBase):
         cmd(self.config.cmdArgs)
         self.nErrors+= cmd.nErrors
         
+        cache= self.db.cache()
+        if cache is not None:
+            self.log( "\nCache: {0} hits, {1} misses ({2:.1%} hit rate)\n"
+                      .format(cache.hits, cache.misses, cache.hitRate()),
+                      verbose=2 )
+        
                
     def _initCmdLineArguments(self):
         """Initialise all command line arguments.
@@ -66,6 +74,33 @@ class AdminTool(ToolBase):
                                   help="Specify name of startkladde database",
                                   default= self.config.database)
 
+        self.parser.add_argument( "-l", "--sqlite",
+                                  help="Use the given SQLite database file "
+                                       "instead of the MySQL server. The "
+                                       "startkladde tables are created, if "
+                                       "missing. Use ':memory:' for a "
+                                       "throwaway database.",
+                                  default= self.config.sqlite)
+
+        self.parser.add_argument( "-b", "--chunk-size",
+                                  help="Maximum number of rows written per "
+                                       "INSERT statement",
+                                  type=int,
+                                  default= self.config.chunk_size)
+
+        self.parser.add_argument( "-C", "--cache-size",
+                                  help="Number of pilots, planes and launch "
+                                       "methods cached by id. 0 disables the "
+                                       "cache.",
+                                  type=int,
+                                  default= self.config.cache_size)
+
+        self.parser.add_argument( "-S", "--stream",
+                                  help="Stream large result sets from the "
+                                       "server instead of buffering them",
+                                  default= self.config.stream,
+                                  action="store_true")
+
         self.parser.add_argument( "-v", "--verbose",
                                   help="verbose mode setting",
                                   type=int,
@@ -89,6 +124,23 @@ class AdminTool(ToolBase):
     def connectDatabase(self):
         """Connect to database
         """
+        if self.config.sqlite:
+            self.log( "\nOpening SQLite database '{0}' ...\n"
+                      .format(self.config.sqlite),
+                      verbose=1 )
+            self.db.backend= SQLiteBackend(self.config.sqlite)
+            self.db.connect()
+        else:
+            self._connectServer()
+            
+        self.db.chunkSize= self.config.chunk_size
+        self.db.enableCache(self.config.cache_size)
+        self.db.streaming= self.config.stream
+
+
+    def _connectServer(self):
+        """Connect to MySQL server
+        """
         self.log( "\nConnecting to database '{0}' ...\n"
                   .format(self.config.database),
                   verbose=1 )
@@ -106,7 +158,6 @@ class AdminTool(ToolBase):
                          dbName= self.config.database )
 
 
-
     def setUsername(self):
         """Process username field
         """
@@ -146,6 +197,10 @@ class AdminTool(ToolBase):
         config.username= "startkladde"
         config.user= "@".join([config.username, config.hostname])
         config.password= None
+        config.sqlite= None
+        config.chunk_size= 100
+        config.cache_size= 0
+        config.stream= False
 
         return config        
 
@@ -3,8 +3,15 @@
 from .column import Column
 from .table import Table
 from .record import Record
+from .identity_map import IdentityMap
+from .query import Filter, Query
+from .pool import ConnectionPool
+from .resolver import Resolver
+from .flight_index import FlightIndex
+from .backend import Backend, MySQLBackend, SQLiteBackend
 from .database import Database
 from .conflict_handler import ConflictHandler
+from .staged_conflict_handler import StagedConflictHandler
 from .csv_reader import CsvReader
 
         
\ No newline at end of file
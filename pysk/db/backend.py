@@ -0,0 +1,537 @@
+# -*- coding: utf-8 -*-
+
+import re
+import sqlite3
+
+try:
+    import MySQLdb
+    from MySQLdb.cursors import SSCursor
+except ImportError:
+    MySQLdb= None
+
+from .column import Column
+
+
+#: Column definitions of the startkladde tables used by :class:`SQLiteBackend`.
+#: The column order is identical to the order of the constructor arguments of
+#: the respective model classes.
+SCHEMA= [
+    ("flights", [
+        ("id",                         "integer PRIMARY KEY AUTOINCREMENT"),
+        ("plane_id",                   "int(11)"),
+        ("pilot_id",                   "int(11)"),
+        ("copilot_id",                 "int(11)"),
+        ("type",                       "varchar(255)"),
+        ("mode",                       "varchar(255)"),
+        ("departed",                   "tinyint(1)"),
+        ("landed",                     "tinyint(1)"),
+        ("towflight_landed",           "tinyint(1)"),
+        ("launch_method_id",           "int(11)"),
+        ("departure_location",         "varchar(255)"),
+        ("landing_location",           "varchar(255)"),
+        ("num_landings",               "int(11)"),
+        ("departure_time",             "datetime"),
+        ("landing_time",               "datetime"),
+        ("towplane_id",                "int(11)"),
+        ("towflight_mode",             "varchar(255)"),
+        ("towflight_landing_location", "varchar(255)"),
+        ("towflight_landing_time",     "datetime"),
+        ("towpilot_id",                "int(11)"),
+        ("pilot_last_name",            "varchar(255)"),
+        ("pilot_first_name",           "varchar(255)"),
+        ("copilot_last_name",          "varchar(255)"),
+        ("copilot_first_name",         "varchar(255)"),
+        ("towpilot_last_name",         "varchar(255)"),
+        ("towpilot_first_name",        "varchar(255)"),
+        ("comments",                   "text"),
+        ("accounting_notes",           "varchar(255)") ]),
+    ("people", [
+        ("id",                         "integer PRIMARY KEY AUTOINCREMENT"),
+        ("last_name",                  "varchar(255)"),
+        ("first_name",                 "varchar(255)"),
+        ("club",                       "varchar(255)"),
+        ("nickname",                   "varchar(255)"),
+        ("club_id",                    "varchar(255)"),
+        ("comments",                   "text"),
+        ("medical_validity",           "date"),
+        ("check_medical_validity",     "tinyint(1)") ]),
+    ("planes", [
+        ("id",                         "integer PRIMARY KEY AUTOINCREMENT"),
+        ("registration",               "varchar(255)"),
+        ("club",                       "varchar(255)"),
+        ("num_seats",                  "int(11)"),
+        ("type",                       "varchar(255)"),
+        ("category",                   "varchar(255)"),
+        ("callsign",                   "varchar(255)"),
+        ("comments",                   "text") ]),
+    ("launch_methods", [
+        ("id",                         "integer PRIMARY KEY AUTOINCREMENT"),
+        ("name",                       "varchar(255)"),
+        ("short_name",                 "varchar(255)"),
+        ("log_string",                 "varchar(255)"),
+        ("keyboard_shortcut",          "varchar(1)"),
+        ("type",                       "varchar(255)"),
+        ("towplane_registration",      "varchar(255)"),
+        ("person_required",            "tinyint(1)"),
+        ("comments",                   "text") ]),
+    ("users", [
+        ("id",                         "integer PRIMARY KEY AUTOINCREMENT"),
+        ("username",                   "varchar(255)"),
+        ("password",                   "varchar(255)"),
+        ("perm_club_admin",            "tinyint(1)"),
+        ("perm_read_flight_db",        "tinyint(1)"),
+        ("club",                       "varchar(255)"),
+        ("person_id",                  "int(11)"),
+        ("comments",                   "text") ])
+]
+
+#: Placeholders and escaped percent signs in statements
+PLACEHOLDERS= re.compile(r"%s|%%")
+
+#: Leading numeric part of a server version string
+VERSION= re.compile(r"(\d+)\.(\d+)")
+
+#: Indexes created by :class:`SQLiteBackend` in addition to the primary keys
+INDEXES= [
+    ("flights", "departure_time"),
+    ("flights", "landing_time"),
+    ("flights", "plane_id"),
+    ("flights", "pilot_id"),
+    ("flights", "copilot_id")
+]
+
+
+
+class Backend(object):
+    """Database specific functionality used by :class:`~.db.Database`
+    
+    Derived classes implement connection handling and the *SQL* dialect of a
+    particular database engine. All statements passed to a backend use
+    ``%s`` placeholders.
+    """
+    
+    #: Name of backend
+    name= None
+    
+    #: Streams are read through a separate connection
+    separateStreamConnection= False
+    
+    #: Several connections may be pooled
+    allowsPooling= True
+    
+    #: A password is required to connect
+    requiresPassword= False
+    
+    
+    def connect(self, host, user, password, dbName):
+        """Open a new connection
+        
+        Arguments:
+            host (str): Hostname
+            user (str): Username
+            password (str): Password
+            dbName (str): Name of database
+        
+        Return:
+            DB-API 2.0 connection object
+        """
+        raise NotImplementedError()
+
+
+    def cursor(self, conn, streaming=False):
+        """Create a cursor
+        
+        Arguments:
+            conn: Connection returned by :meth:`connect`
+            streaming (bool): Create an unbuffered cursor. Defaults to
+               ``False``.
+        
+        Return:
+            Cursor object
+        """
+        return conn.cursor()
+
+
+    def healthCheck(self, conn):
+        """Check if a connection is still usable
+        
+        Used by the connection pool of :class:`~.db.Database` before an idle
+        connection is reused. Raises an exception, if the connection is
+        unusable.
+        
+        Arguments:
+            conn: Connection returned by :meth:`connect`
+        """
+        cursor= conn.cursor()
+        
+        try:
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+        finally:
+            cursor.close()
+
+
+    def prepare(self, command, data=None):
+        """Adapt statement and parameters to the database driver
+        
+        Arguments:
+            command (str): Statement with ``%s`` placeholders
+            data: Parameters or *None*.
+        
+        Return:
+            Tuple ``(command, data)`` to be passed to ``cursor.execute``
+        """
+        return command, data
+
+
+    def listTablesStatement(self):
+        """Get statement listing all tables
+        
+        Return:
+            Statement returning one row per table with the table name as first
+            field
+        """
+        raise NotImplementedError()
+
+
+    def describeTableStatement(self, tableName):
+        """Get statement describing the columns of a table
+        
+        Arguments:
+            tableName (str): Name of table
+        
+        Return:
+            Statement returning one row per column, which can be converted by
+            :meth:`makeColumn`
+        """
+        raise NotImplementedError()
+
+
+    def makeColumn(self, row):
+        """Convert a row returned by :meth:`describeTableStatement`
+        
+        Arguments:
+            row (tuple): Row describing a column
+        
+        Return:
+            :class:`~.db.Column` instance
+        """
+        raise NotImplementedError()
+
+
+    def insertCommand(self, force):
+        """Get insert command
+        
+        Arguments:
+            force (bool): If ``True``, existing rows are replaced. Otherwise
+               they are kept.
+        
+        Return:
+            Statement prefix preceding ``INTO``
+        """
+        raise NotImplementedError()
+
+
+    def createTemporaryTableStatement(self, tableName, columns):
+        """Get statement creating a table visible to the current connection only
+        
+        Arguments:
+            tableName (str): Name of table
+            columns (list): Tuples *(name, type)* defining the columns
+        
+        Return:
+            Statement creating the table
+        """
+        return "CREATE TEMPORARY TABLE {0} ({1})".format(
+                   tableName,
+                   ", ".join( " ".join(col) for col in columns ))
+
+
+    def dropTemporaryTableStatement(self, tableName):
+        """Get statement dropping a temporary table, if it exists
+        
+        Arguments:
+            tableName (str): Name of table
+        
+        Return:
+            Statement dropping the table
+        """
+        raise NotImplementedError()
+
+
+    def secondsBetweenExpression(self, begin, end):
+        """Get expression computing the seconds between two datetime columns
+        
+        Literal percent signs are escaped, i.e. the statement has to be
+        executed with parameters.
+        
+        Arguments:
+            begin (str): Expression of the earlier time
+            end (str): Expression of the later time
+        
+        Return:
+            *SQL* expression of integer type
+        """
+        raise NotImplementedError()
+
+
+    def versionStatement(self):
+        """Get statement selecting the version of the database server
+        
+        Return:
+            Statement returning a single row with the version string
+        """
+        raise NotImplementedError()
+
+
+    def supportsWindowFunctions(self, version):
+        """Check if a server version supports window functions and common
+        table expressions
+        
+        Arguments:
+            version (str): Version string as returned by
+               :meth:`versionStatement`
+        
+        Return:
+            ``True`` if and only if both are supported
+        """
+        raise NotImplementedError()
+
+
+    @staticmethod
+    def versionTuple(version):
+        """Get major and minor number of a version string
+        
+        Arguments:
+            version (str): Version string, e.g. '*5.7.42-log*'
+        
+        Return:
+            Tuple of integers *(major, minor)* or *(0, 0)*, if *version* does
+            not start with a version number
+        """
+        match= VERSION.match(version)
+        
+        if match is None:
+            return (0, 0)
+        
+        return tuple( int(part) for part in match.groups() )
+
+
+    def convertDatetime(self, value):
+        """Convert the result of a datetime expression to :class:`datetime`
+        
+        Results of aggregates and window functions are not necessarily
+        converted by the driver.
+        
+        Arguments:
+            value: Value returned by the driver
+        
+        Return:
+            :class:`datetime` instance or *None*
+        """
+        return value
+
+
+
+class MySQLBackend(Backend):
+    """Backend for the MySQL database used by Startkladde
+    
+    Requires the python module `MySQLdb`.
+    """
+    
+    name= "mysql"
+    separateStreamConnection= True
+    requiresPassword= True
+    
+    
+    def connect(self, host, user, password, dbName):
+        if MySQLdb is None:
+            raise RuntimeError("Python module MySQLdb is not installed.")
+            
+        return MySQLdb.connect(host, user, password, dbName)
+
+
+    def cursor(self, conn, streaming=False):
+        if streaming:
+            return conn.cursor(SSCursor)
+            
+        return conn.cursor()
+
+
+    def healthCheck(self, conn):
+        conn.ping()
+
+
+    def listTablesStatement(self):
+        return "SHOW TABLES"
+
+
+    def describeTableStatement(self, tableName):
+        return "DESCRIBE `{0}`".format(tableName)
+
+
+    def makeColumn(self, row):
+        return Column( name= row[0],
+                       dataType= row[1],
+                       allowsNull= row[2].upper() == "YES",
+                       index= row[3],
+                       defaultValue= row[4],
+                       extra= row[5].lower() )
+
+
+    def insertCommand(self, force):
+        if force:
+            return "REPLACE"
+            
+        return "INSERT IGNORE"
+
+
+    def dropTemporaryTableStatement(self, tableName):
+        return "DROP TEMPORARY TABLE IF EXISTS `{0}`".format(tableName)
+
+
+    def secondsBetweenExpression(self, begin, end):
+        return "TIMESTAMPDIFF(SECOND, {0}, {1})".format(begin, end)
+
+
+    def versionStatement(self):
+        return "SELECT VERSION()"
+
+
+    def supportsWindowFunctions(self, version):
+        if "mariadb" in version.lower():
+            return self.versionTuple(version) >= (10, 2)
+        
+        return self.versionTuple(version) >= (8, 0)
+
+
+
+class SQLiteBackend(Backend):
+    """Backend storing the startkladde tables in an SQLite database
+    
+    Intended for local, offline and benchmark runs. The connection arguments
+    passed to :meth:`connect` are ignored.
+    
+    Arguments:
+        path (str): Path to database file. Use '*:memory:*' for a database
+           held in memory. Defaults to '*:memory:*'.
+        createSchema (bool): Create missing startkladde tables upon connection.
+           Defaults to ``True``.
+    """
+    
+    name= "sqlite"
+    
+    def __init__(self, path=":memory:", createSchema=True):
+        """Create new backend
+        """
+        self.path= path
+        self.createSchema= createSchema
+        self.allowsPooling= path != ":memory:"
+        self._statements= dict()
+        
+        
+    def connect(self, host=None, user=None, password=None, dbName=None):
+        conn= sqlite3.connect( self.path,
+                               detect_types= sqlite3.PARSE_DECLTYPES,
+                               check_same_thread= False )
+        conn.text_factory= str
+        
+        if self.createSchema:
+            self.create(conn)
+        
+        return conn
+
+
+    def create(self, conn):
+        """Create all missing startkladde tables and indexes
+        
+        Arguments:
+            conn: Connection returned by :meth:`connect`
+        """
+        for tableName, columns in SCHEMA:
+            conn.execute( "CREATE TABLE IF NOT EXISTS {0} ({1})".format(
+                          tableName,
+                          ", ".join( " ".join(col) for col in columns )))
+        
+        for tableName, column in INDEXES:
+            conn.execute( "CREATE INDEX IF NOT EXISTS {0}_{1} ON {0} ({1})"
+                          .format(tableName, column) )
+        conn.commit()
+
+
+    def prepare(self, command, data=None):
+        if data is None:
+            return command, ()
+        
+        retval= self._statements.get(command)
+        
+        if retval is None:
+            retval= PLACEHOLDERS.sub( lambda m: "?" if m.group() == "%s" else "%",
+                                      command )
+            
+            if len(self._statements) > 256:
+                self._statements.clear()
+                
+            self._statements[command]= retval
+            
+        return retval, data
+
+
+    def listTablesStatement(self):
+        return ( "SELECT name FROM sqlite_master WHERE type='table' "
+                 "AND name NOT LIKE 'sqlite_%' ORDER BY name" )
+
+
+    def describeTableStatement(self, tableName):
+        return "PRAGMA table_info(`{0}`)".format(tableName)
+
+
+    def makeColumn(self, row):
+        cid, name, dataType, notNull, default, pk= row
+
+        extra= ""
+        if pk and dataType.lower() == "integer":
+            extra= "auto_increment"
+            
+        return Column( name= name,
+                       dataType= dataType,
+                       allowsNull= not notNull,
+                       index= "PRI" if pk else "",
+                       defaultValue= default,
+                       extra= extra )
+
+
+    def insertCommand(self, force):
+        if force:
+            return "INSERT OR REPLACE"
+            
+        return "INSERT OR IGNORE"
+
+
+    def dropTemporaryTableStatement(self, tableName):
+        return "DROP TABLE IF EXISTS temp.`{0}`".format(tableName)
+
+
+    def secondsBetweenExpression(self, begin, end):
+        return ( "(CAST(strftime('%%s', {1}) AS INTEGER) "
+                 "- CAST(strftime('%%s', {0}) AS INTEGER))"
+                 .format(begin, end) )
+
+
+    def versionStatement(self):
+        return "SELECT sqlite_version()"
+
+
+    def supportsWindowFunctions(self, version):
+        return self.versionTuple(version) >= (3, 25)
+
+
+    def convertDatetime(self, value):
+        if isinstance(value, basestring):
+            return sqlite3.converters["TIMESTAMP"](value)
+        
+        return value
+
+
+# Columns declared as datetime are converted like timestamps
+sqlite3.register_converter("datetime", sqlite3.converters["TIMESTAMP"])
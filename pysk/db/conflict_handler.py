@@ -2,8 +2,11 @@
 
 from sys import stderr
 from operator import attrgetter
+from time import time
 
 from pysk.utils import UserQuery
+from .query import Filter
+from .flight_index import FlightIndex
 
 #Warning flags
 NONE                       = 0x0000 #: No warnings
@@ -25,6 +28,20 @@ WARNINGS={ MISSING_DEPARTURE_TIME    : "missing departure time",
            MISSING_PLANE             : "missing plane"  }
 """Dictionary containing a warning string message for each warning flag"""
 
+#: Columns of existing flights needed to detect and display conflicts
+CONFLICT_COLUMNS= ( "id",
+                    "plane_id",
+                    "pilot_id",
+                    "copilot_id",
+                    "towpilot_id",
+                    "type",
+                    "mode",
+                    "launch_method_id",
+                    "departure_location",
+                    "landing_location",
+                    "departure_time",
+                    "landing_time" )
+
 #Modes
 INTERACTIVE         = 1 #: Prompts user on conflict for manual resolution
 IGNORE_ALL_CONFLICTS= 2 #: Import all records regardless of eventual conflicts
@@ -33,13 +50,48 @@ REJECT_ON_CONFLICT  = 3 #: Do not import records with conflicts
 
 class ConflictHandler(object):
     """Checks for conflicts in database and tries to resolve them
+    
+    By default, changes are not committed by the conflict handler. If a commit
+    interval is given, the open transaction is committed after every
+    *commitInterval* processed records or *commitTime* seconds, whichever
+    comes first. This bounds the size of the transaction and the time locks
+    are held during large imports. Changes committed at a checkpoint are kept,
+    if the import is aborted later on.
+    
+    Conflicts are looked up by one query per candidate. Alternatively, all
+    flights of the time window of an import can be loaded at once into a
+    :class:`~.db.FlightIndex` by :meth:`loadIndex`. Flights inserted or
+    deleted by the handler are applied to the index, changes made by other
+    clients during the import are not seen.
+    
+    Replies given in interactive mode are recorded in :attr:`decisions` for
+    candidates passed with a key. A recorded reply is reused instead of
+    prompting again, e.g. when an aborted import is resumed.
+    
+    Arguments:
+        db (:class:`~.db.Database`): Database
+        mode (int): Conflict handling mode. Defaults to :data:`INTERACTIVE`.
+        verbose (int): Verbosity level. Defaults to 1.
+        logFunctor (callable): Log function. Defaults to ``stderr.write``.
+        commitInterval (int): Number of records processed per transaction.
+           If *None* or 0, no commits are issued. Defaults to *None*.
+        commitTime (float): Maximum duration of a transaction in seconds. If
+           *None* or 0, the duration is not limited. Defaults to *None*.
+        decisions (dict): Recorded replies by candidate key and topic. Updated
+           with new replies. Defaults to *None* (empty dictionary).
+        checkpointFunctor (callable): Function called with the handler after
+           each commit. Defaults to *None*.
     """
 
 
     def __init__(self, db=None,
                        mode=INTERACTIVE,
                        verbose=1,
-                       logFunctor=stderr.write):
+                       logFunctor=stderr.write,
+                       commitInterval=None,
+                       commitTime=None,
+                       decisions=None,
+                       checkpointFunctor=None):
         
         self.mode      = mode
         self._enabled  = ALL      
@@ -47,6 +99,18 @@ class ConflictHandler(object):
         self.logFunctor= logFunctor
         self.nInserted = 0 # number of inserted candidates
         self.nDeleted  = 0 # Number of erased flights
+        self.nProcessed= 0 # Number of processed candidates
+        self.nCommits  = 0 # Number of checkpoints
+        
+        self.commitInterval= commitInterval
+        self.commitTime    = commitTime
+        self._nPending     = 0 # candidates processed since last checkpoint
+        self._lastCommit   = time()
+        self._index        = None
+        
+        self.decisions= dict() if decisions is None else decisions
+        self.checkpointFunctor= checkpointFunctor
+        self._key= None # key of current candidate
    
         self._db       = db
         self._candidate= None # Flight to add / to investigate
@@ -75,7 +139,7 @@ class ConflictHandler(object):
 
 
         
-    def __call__(self, rec):
+    def __call__(self, rec, key=None):
         """Invoke conflict handler
 
         Checks if the record is valid and if conflicts exist. Depending on the
@@ -83,9 +147,12 @@ class ConflictHandler(object):
         
         Arguments:
             rec: Rec to investigate
+            key: Key identifying the candidate in :attr:`decisions`. If
+               *None*, replies are not recorded. Defaults to *None*.
         """
         self._candidate= rec
         self._warnings = NONE
+        self._key= key
         
         if not self.isValid(self._candidate.flight):
             
@@ -94,20 +161,105 @@ class ConflictHandler(object):
                          .format(rec, "\n -> ".join(self.warnings()) ))
                 
             if self.mode == INTERACTIVE:
-                self._actions[ self._dialog(selection=['a', 's', 'i']) ]()
+                self._ask("warnings", ['a', 's', 'i'])
             elif self.mode == REJECT_ON_CONFLICT:
                     self.skipCandidate()
             #else Mode is IGNORE_ALL_CONFLICTS -> continue
                        
-        if not self._candidate:
-            return
-            
-        self.handleConflicts(self._candidate.flight)
+        if self._candidate:
+            self.handleConflicts(self._candidate.flight)
 
         #if there is still a candidate -> add it
         if self._candidate:
-            self._db.insertFlights([self._candidate.flight], force=True)
+            flight= self._candidate.flight
+            self._db.insertFlights([flight], force=True)
+            
+            if self._index is not None:
+                if flight.id is None:
+                    flight.id= self._db.lastInsertId()
+                    
+                self._index.add(flight)
+        
+        self.nProcessed+= 1
+        self._nPending+= 1
+        self.checkpoint()
+
+
+    def loadIndex(self, begin, end):
+        """Load all flights of a time window into an in-memory index
+        
+        Subsequent conflict checks of candidates within the time window are
+        answered by the index instead of the database.
+        
+        Arguments:
+            begin (:class:`datetime`): Begin of time window
+            end (:class:`datetime`): End of time window
+        
+        Return:
+            :class:`~.db.FlightIndex` instance
+        """
+        selection= Filter.all( Filter.equal("mode", "local"),
+                               Filter("landing_time >= %s", begin),
+                               Filter("departure_time <= %s", end) )
+        
+        self._index= FlightIndex( self._db.iterFlights( filter=selection,
+                                                        columns=CONFLICT_COLUMNS ),
+                                  begin= begin,
+                                  end= end )
+        
+        if self.verbose > 1:
+            self.log("Loaded {0} flights between {1} and {2}\n"
+                     .format(len(self._index), begin, end))
+        
+        return self._index
+        
+        
+    def checkpoint(self, force=False):
+        """Commit the open transaction, if the commit interval has elapsed
+        
+        Arguments:
+            force (bool): Commit pending changes regardless of the commit
+               interval. Defaults to ``False``.
+        
+        Return:
+            ``True`` if and only if a commit was issued
+        """
+        if not self._nPending:
+            return False
+        
+        if not (force or self.isDue()):
+            return False
+            
+        self._db.commit()
+        self.nCommits+= 1
+        self._nPending= 0
+        self._lastCommit= time()
+        
+        if self.verbose > 0:
+            self.log("Checkpoint: committed {0} records ({1} deleted)\n"
+                     .format(self.nProcessed, self.nDeleted))
+        
+        if self.checkpointFunctor is not None:
+            self.checkpointFunctor(self)
+        
+        return True
+         
+        
+    def isDue(self):
+        """Check if the commit interval has elapsed
+        
+        Return:
+            ``True`` if and only if *commitInterval* records have been
+            processed or *commitTime* seconds have passed since the last
+            checkpoint
+        """
+        if self.commitInterval and self._nPending >= self.commitInterval:
+            return True
+            
+        if self.commitTime:
+            return time() - self._lastCommit >= self.commitTime
             
+        return False
          
         
     def isValid(self, flight):
@@ -144,9 +296,14 @@ class ConflictHandler(object):
         Arguments:
             flight: Flight to search conflicts for
         """
-        self._conflicts= list( self._db.iterSimilarFlights( flight,
-                                                            filter="id > '{0}'"
-                                                            .format(flight.id)) )
+        if self._index is not None and self._index.covers(flight):
+            self._conflicts= self._index.similarFlights( flight,
+                                                         minId= flight.id or 0 )
+        else:
+            self._conflicts= list( self._db.iterSimilarFlights(
+                                       flight,
+                                       filter=Filter("id > %s", flight.id or 0),
+                                       columns=CONFLICT_COLUMNS ))
         
         
         if not self._conflicts:
@@ -163,12 +320,40 @@ class ConflictHandler(object):
             self.log("\nCandidate:\n  {0}\nhas conflicts:\n  {1}\n"
                      .format( self._candidate,
                               "\n  ".join(self.iterConflicts() )))            
-            self._actions[ self._dialog(selection=['a', 'r', 's', 'i']) ]()
+            self._ask("conflicts", ['a', 'r', 's', 'i'])
         elif self.mode == REJECT_ON_CONFLICT:
             self.skipCandidate()
 
 
 
+    def _ask(self, topic, selection):
+        """Prompt user for an action on the current candidate and execute it
+        
+        A reply recorded in :attr:`decisions` for the current candidate is
+        reused. Aborts are not recorded.
+        
+        Arguments:
+            topic (str): Subject of the prompt
+            selection (list): Allowed replies
+        """
+        key= None
+        if self._key is not None:
+            key= "{0}/{1}".format(self._key, topic)
+        
+        reply= self.decisions.get(key)
+        
+        if reply in selection:
+            self.log("Reusing recorded reply '{0}'\n".format(reply))
+        else:
+            reply= self._dialog(selection=selection)
+            
+            if key is not None and reply != 'a':
+                self.decisions[key]= reply
+        
+        self._actions[reply]()
+
+
+
     def addWarning(self, warning):
         """Set warning flag
         
@@ -240,6 +425,9 @@ class ConflictHandler(object):
             self._db.deleteFlights([self._candidate.flight.id])
             self.nDeleted+= 1
             
+            if self._index is not None:
+                self._index.remove(self._candidate.flight.id)
+            
         self._candidate=None
         return
 
@@ -257,12 +445,17 @@ class ConflictHandler(object):
         """
         i0= 0
         if not self._candidate.flight.id:
-            self.candidate.flight.id= self.conflicts[0].id
+            self._candidate.flight.id= self._conflicts[0].id
             self.nInserted+= 1
             i0= 1
         
-        self._db.deleteFlights( map( attrgetter("id"), self._conflicts[i0:] ))
+        ids= map( attrgetter("id"), self._conflicts[i0:] )
+        self._db.deleteFlights(ids)
         self.nDeleted+= len(self._conflicts)         
+        
+        if self._index is not None:
+            for id in ids:
+                self._index.remove(id)
 
 
          
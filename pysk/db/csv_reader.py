@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 
-import csv, codecs, sys
+import csv, codecs, os, sys
 from traceback import print_exc
-from datetime import datetime
+from collections import deque
+from operator import itemgetter
 
 from pysk.db.model import Flight, Pilot, Airplane, LaunchMethod
+from pysk.utils.time_parser import DateTimeParser
 from .record import Record
 
 
@@ -97,15 +99,25 @@ class CsvReader(object):
         "towflight"
     ]
     
+    #: Internal names of all fields read from a row, in the order of the tuple
+    #: returned by the row decoder
+    fields= tuple( sorted( set(columnMap.values())
+                           | optionalColumns
+                           | {"towpilot_first_name", "towpilot_last_name"} ))
+    
+    #: Position of each field in :attr:`fields`
+    fieldIndex= dict( (f, i) for i, f in enumerate(fields) )
+    
     
     def __init__(self, logStream=sys.stderr, verbose=1, debug=False):
         """Create new reader instance        
         """
         
         self.timeformat= None
+        self.parseTime= None
         self.verbose= verbose
-        self.decoder=None
-        self.encoder= codecs.getencoder("utf-8")
+        self.current= None # decoded fields of current record
+        self._decodeRow= None
         self.logStream= logStream
         self._initColumns()
         self.debug=debug
@@ -148,7 +160,8 @@ class CsvReader(object):
                        encoding="utf8",
                        dateformat="%Y-%m-%d",
                        timeformat="%H:%M",
-                       mergeTowflights=True):
+                       mergeTowflights=True,
+                       span=None):
         """Read input file and return a list of flights
         
         Arguments:
@@ -162,61 +175,327 @@ class CsvReader(object):
               Defaults to '%H:%M'
            mergeTowflights (bool): If towflights are listed in a separate line,
               merge respective flights with towflights. Defaults to True
+           span (tuple): Byte offsets *(begin, end)* of the lines to read as
+              returned by :meth:`splitFile`. The header is always read. Line
+              numbers in error messages are relative to *begin*. If *None*,
+              the complete file is read. Defaults to *None*.
         
         Return:
             List of :class:`.Record` instances with one record per line in input
             file
         """
+        with open(path, mode='r') as iFile:
+            lines= iFile
+            if span is not None:
+                lines= self._iterSpan(iFile, *span)
+                
+            reader= self._reader( lines, delimiter, encoding,
+                                  dateformat, timeformat )
+            retval= list( self._iterRecords(reader) )
+                                  
+        if mergeTowflights:
+            self.merge(retval)
+        
+        return retval
+
+
+    @staticmethod
+    def splitFile(path, nSpans, minSize=1<<20):
+        """Split csv file into spans of lines, which can be read independently
+        
+        Spans are aligned to line boundaries. Quoted fields spanning several
+        lines are not supported.
+        
+        Arguments:
+           path (str): Path to input file
+           nSpans (int): Maximum number of spans
+           minSize (int): Minimum size of a span in bytes. Defaults to 1 MiB.
+        
+        Return:
+            List of byte offsets *(begin, end)* covering all lines after the
+            header, which can be passed to :meth:`__call__`
+        """
+        with open(path, mode='r') as iFile:
+            iFile.readline()
+            begin= iFile.tell()
+            size= os.fstat( iFile.fileno() ).st_size
+            nSpans= max(1, min(nSpans, (size - begin) // max(minSize, 1)))
+
+            retval= []
+            for i in xrange(1, nSpans):
+                iFile.seek( begin + (size - begin) * i // nSpans )
+                iFile.readline()
+                end= iFile.tell()
+                
+                if retval and end <= retval[-1][1]:
+                    continue
+                
+                retval.append( (retval[-1][1] if retval else begin, end) )
+            
+            retval.append( (retval[-1][1] if retval else begin, size) )
+        
+        return retval
+
+
+    @staticmethod
+    def _iterSpan(iFile, begin, end):
+        """Iterate over header and a span of lines of a file
+        
+        Arguments:
+           iFile (file): Input file
+           begin (int): Offset of first line
+           end (int): Offset following the last line
+        
+        Yield:
+            Header line followed by all lines starting before *end*
+        """
+        yield iFile.readline()
+        
+        iFile.seek(begin)
+        while iFile.tell() < end:
+            line= iFile.readline()
+            
+            if not line:
+                break
+            
+            yield line
+
+
+    def merge(self, records):
+        """Merge towflights listed in separate records with their glider flights
+        
+        Arguments:
+            records (list): List of records, e.g. as returned by
+               :meth:`__call__` with *mergeTowflights* disabled. Modified in
+               place.
+        
+        Return:
+            Number of merged towflights
+        """
+        nTowflights= self._mergeTowflights(records)
+        self.log("-> Merged {0} towflights\n".format(nTowflights))
+        
+        return nTowflights
+
+
+    def iterate(self, path,
+                      delimiter=";",
+                      encoding="utf8",
+                      dateformat="%Y-%m-%d",
+                      timeformat="%H:%M",
+                      mergeTowflights=True,
+                      window=100):
+        """Iterate over the records of an input file while it is parsed
+        
+        If *mergeTowflights* is set, each record is held back until *window*
+        further records have been read, such that a towflight listed after its
+        glider flight can be merged as long as it follows within *window*
+        records. Towflights listed before their glider flight are kept until the
+        glider flight is found, regardless of the distance. Towflights, which
+        cannot be merged, are returned as separate records at the end.
+        
+        Arguments:
+           path (str): Path to input file
+           delimiter (str): Field delimiter. Defaults to ';'
+           encoding (str): Encoding of input file (e.g. 'utf8' or 'windows-1252').
+              Defaults to 'utf8'
+           dateformat (str): Date format used in csv (notation as in strptime).
+              Defaults to '%Y-%m-%d'
+           timeformat (str): Time format used in csv (notation as in strptime).
+              Defaults to '%H:%M'
+           mergeTowflights (bool): If towflights are listed in a separate line,
+              merge respective flights with towflights. Defaults to True
+           window (int): Number of records held back for merging towflights.
+              If 0, all records are held back until the end of the file.
+              Defaults to 100.
+        
+        Yield:
+            :class:`.Record` instance for each line in input file
+        """
+        with open(path, mode='r') as iFile:
+            reader= self._reader( iFile, delimiter, encoding,
+                                  dateformat, timeformat )
+            records= self._iterRecords(reader)
+            
+            if mergeTowflights:
+                records= self._iterMerged(records, window)
+            
+            for rec in records:
+                yield rec
+
+
+    def _reader(self, iFile, delimiter, encoding, dateformat, timeformat):
+        """Prepare reading a csv file
+        
+        Arguments:
+           iFile (iterable): Lines of input file
+           delimiter (str): Field delimiter
+           encoding (str): Encoding of input file
+           dateformat (str): Date format used in csv
+           timeformat (str): Time format used in csv
+        
+        Return:
+            Python csv reader returning utf-8 encoded fields
+        """
         self.timeformat=dateformat + "T" + timeformat
-        self.decoder= codecs.getdecoder(encoding)
+        self.parseTime= DateTimeParser(dateformat, timeformat)
+        self.nErrors= 0
+        
+        return csv.reader( self._recode(iFile, encoding), delimiter=delimiter )
+
+
+    def _recode(self, lines, encoding):
+        """Convert lines to utf-8
+        
+        Lines, which cannot be decoded, are reported as errors and replaced by
+        empty lines, which are skipped by the csv reader.
+        
+        Arguments:
+            lines (iterable): Lines in the given encoding
+            encoding (str): Encoding of lines
+        
+        Yield:
+            utf-8 encoded lines
+        """
+        isUtf8= codecs.lookup(encoding).name == "utf-8"
+        
+        for lineNumber, line in enumerate(lines, 1):
+            try:
+                decoded= line.decode(encoding)
+            except UnicodeDecodeError as ex:
+                self.nErrors+= 1
+                self.error( "while processing line {0}: {1}\n"
+                            .format(lineNumber, str(ex)) )
+                yield "\n"
+                continue
+            
+            if isUtf8:
+                yield line
+            else:
+                yield decoded.encode("utf-8")
+
 
-        reader= csv.reader( open(path, mode='r'), delimiter=delimiter)
+    def _iterRecords(self, reader):
+        """Convert the lines of a csv file to records
         
-        retval= []
+        Arguments:
+            reader: Python csv reader
         
+        Yield:
+            :class:`.Record` instance for each valid line
+        """
         self.log("Analysing header fields ...\n", verbose=2)
         self.analyseHeader( reader.next() )
 
-        self.nErrors= 0
         for record in reader:
+            if not record:
+                continue
+                
             try:
-                if(len(record) > 0):
-                    retval.append( self.importRecord(record) )
+                rec= self.importRecord(record)
             except(Exception) as ex:
                 self.nErrors+= 1
                 self.error( "while processing line {0}: {1}\n"
                             .format( reader.line_num, str(ex) ))
 
                 if self.debug:
-                    print_exc()                
-
-
+                    print_exc()
+                    
+                continue
+            
+            yield rec
 
         if(self.nErrors > 0):
             self.warn("{0} errors occured!\n".format(self.nErrors) )
-                                  
-        if mergeTowflights:
-            nTowflights= len(retval)
-            self._mergeTowflights(retval)
-            nTowflights-= len(retval)
-            
-            self.log("-> Merged {0} towflights\n".format(nTowflights))
         
-        return retval
+        
+    def _iterMerged(self, records, window):
+        """Merge towflights with respective glider flights
+        
+        Glider flights are looked up by flight id among the last *window*
+        records. Towflights preceding their glider flight are kept aside until
+        the glider flight is read.
+        
+        Arguments:
+            records (iterable): Records in file order
+            window (int): Number of records held back. 0 means unlimited.
+        
+        Yield:
+            Records with merged towflight information. Pure towflight records,
+            which could be merged, are dropped.
+        """
+        pending= deque()   # records held back, in file order
+        flights= dict()    # flight id -> pending glider flight record
+        towflights= dict() # flight id -> towflight without glider flight
+        passed= set()      # ids of records already returned
+        nMerged= 0
+        
+        for rec in records:
+            id= rec.flight.id
+            
+            if id is not None and self._isTowflight(rec.flight):
+                dest= flights.get(id)
+                
+                if dest is not None:
+                    if self._mergeTowflight(rec, dest):
+                        nMerged+= 1
+                        continue
+                elif id in passed:
+                    self.error("Towflight {0} follows its flight by more than "
+                               "{1} records\n".format(id, window))
+                elif id not in towflights:
+                    towflights[id]= rec
+                    continue
+            elif id is not None:
+                src= towflights.pop(id, None)
+                
+                if src is not None:
+                    if self._mergeTowflight(src, rec):
+                        nMerged+= 1
+                    else:
+                        pending.append(src)
+                
+                flights.setdefault(id, rec)
+            
+            pending.append(rec)
+            
+            while window and len(pending) > window:
+                rec= pending.popleft()
+                id= rec.flight.id
+                
+                if flights.get(id) is rec:
+                    del flights[id]
+                    passed.add(id)
+                    
+                yield rec
+        
+        for rec in pending:
+            yield rec
+        
+        for id, rec in sorted(towflights.iteritems()):
+            self.error("No matching flight for towflight {0}\n".format(id))
+            yield rec
+            
+        self.log("-> Merged {0} towflights\n".format(nMerged))
 
 
     def analyseHeader(self, header):
         """Analyse header string of csv file to identify needed columns
         
+        Compiles the row decoder, which extracts all :attr:`fields` from a row
+        at once. Raises a :class:`KeyError` if a mandatory column is missing.
+        
         Arguments:
-            header: Header object passed by csv reader.
+            header: Header object passed by csv reader. Fields must be utf-8
+               encoded.
         """
+        self._initColumns()
         
         columns=dict()
         i=0
         for field in header:
 
-            fieldname= self.encoder( self.decoder(field)[0] )[0].lower()
+            fieldname= field.lower()
 
             try:
                 key= CsvReader.columnMap[ fieldname ]
@@ -228,6 +507,12 @@ class CsvReader(object):
         
         for key,value in columns.iteritems():
             setattr(self, key, value)
+            
+        self._checkMandadortyColumns()
+        
+        # missing columns refer to None appended to each row
+        self._decodeRow= itemgetter( *[ columns.get(f, -1)
+                                        for f in CsvReader.fields ] )
 
 
     def importRecord(self, record):
@@ -240,6 +525,9 @@ class CsvReader(object):
             :class:`pysk.db.Record` instance
         """
         self.currentRecord= record
+        record.append(None)
+        self.current= self._decodeRow(record)
+        
         return Record( flight       = self.getFlight(),
                        plane        = self.getPlane(),
                        pilot        = self.getPilot(),
@@ -274,23 +562,15 @@ class CsvReader(object):
     def get(self, field):
         """Get field from current record by name
 
-        Raises a KeyError if mandatory field is not found
+        Mandatory fields are checked once by :meth:`analyseHeader`.
         
         Arguments:
-           field (str): Name of field to return
+           field (str): Name of field to return, one of :attr:`fields`
 
         Return:
-           value or None if no such field exists        
+           utf-8 encoded value or None if no such column exists
         """
-        i= getattr(self, field, None)
-        
-        if(i is not None):
-            return self.encoder( self.decoder( self.currentRecord[i] )[0] )[0]
-                        
-        if field in CsvReader.mandatoryColumns:
-            raise KeyError("Mandatory field '{0}' not found".format(field))
-        
-        return None
+        return self.current[ CsvReader.fieldIndex[field] ]
 
 
     def getFlightType(self):
@@ -456,80 +736,86 @@ class CsvReader(object):
         Return:
             True if and only if flight is a towflight
         """
-        if flight.type.lower() == "towflight":
+        if flight.type and flight.type.lower() == "towflight":
             return True
         return False
 
 
-    def _findRecordById(self, records, id):
-        """Finds a record with a given flight id
-        
-        Arguments:
-            records(iterable): Iterable containing records
-            id(int): Flight id to find
-
-        Return:
-            Matching record or *None* if no such flight can be found        
-        """
-        if id == None:
-            return None
-        
-        for rec in records:
-            if rec.flight.id == id:
-                return rec
-        
-        return None
-            
-
     def _mergeTowflights(self, records):
         """Merge towflights with respective glider flights
 
         Upon successful completion, all pure towflight records in records will
         be merged with the respective flight records. The pure towflight
-        reocords are removed
+        records are removed. The glider flights are looked up in a dictionary
+        by flight id and the list is compacted once at the end, i.e. the run
+        time is linear in the number of records.
         
         Arguments:
-            records: List of records        
+            records (list): List of records. Modified in place.
+        
+        Return:
+            Number of merged towflights
         """
-        nRec= len(records)
+        flights= dict() # flight id -> first glider flight record
         
-        i=0
-        while i != nRec:
-            src= records[i]
-            
-            i+= 1
-            
+        for rec in records:
+            if not self._isTowflight(rec.flight):
+                flights.setdefault(rec.flight.id, rec)
+        
+        merged= set() # positions of merged towflights
+        
+        for i, src in enumerate(records):
             if not self._isTowflight( src.flight ):
                 continue
             
-            dest= self._findRecordById( records, src.flight.id )
+            dest= None
+            if src.flight.id is not None:
+                dest= flights.get(src.flight.id)
 
             if dest is None:
-                sys.stderr.write("ERROR: No matching flight for towflight {0}\n"
-                                 .format(src.flight.id))
-                continue
-            
-            if src.flight.departure_time != dest.flight.departure_time:
-                sys.stderr.write("ERROR: Departure time mismatch for towflight"
-                                 " {0}\n".format(src.flight.id) )
-                continue
-            
-            if src.flight.departure_location != dest.flight.departure_location:
-                sys.stderr.write("ERROR: Departure location mismatch for towflight"
-                                 " {0}\n".format(src.flight.id) )
+                self.error("No matching flight for towflight {0}\n"
+                           .format(src.flight.id))
                 continue
             
-            #set towflight of destination flight
-            dest.flight.towflight_mode     = src.flight.mode
-            dest.towflight_landing_location= src.flight.landing_location
-            dest.towflight_landing_time    = src.flight.landing_time
-            dest.towplane                  = src.plane
-            dest.towpilot                  = src.pilot
-            
-            #remove towflight
-            i-= 1
-            nRec-= 1
-            records.pop(i)
+            if self._mergeTowflight(src, dest):
+                merged.add(i)
+        
+        if merged:
+            records[:]= [ rec for i, rec in enumerate(records)
+                          if i not in merged ]
+        
+        return len(merged)
+
+
+    def _mergeTowflight(self, src, dest):
+        """Merge a towflight into the respective glider flight
+        
+        Arguments:
+            src (:class:`.Record`): Pure towflight record
+            dest (:class:`.Record`): Record of glider flight
+        
+        Return:
+            ``True`` if and only if the towflight matches the glider flight and
+            *dest* has been updated
+        """
+        if src.flight.departure_time != dest.flight.departure_time:
+            self.error("Departure time mismatch for towflight {0}\n"
+                       .format(src.flight.id) )
+            return False
+        
+        if src.flight.departure_location != dest.flight.departure_location:
+            self.error("Departure location mismatch for towflight {0}\n"
+                       .format(src.flight.id) )
+            return False
+        
+        #set towflight of destination flight
+        dest.flight.towflight_mode            = src.flight.mode
+        dest.flight.towflight_landing_location= src.flight.landing_location
+        dest.flight.towflight_landing_time    = src.flight.landing_time
+        dest.towplane                         = src.plane
+        dest.towpilot                         = src.pilot
+        
+        return True
 
 
     def _getTime(self, date, time):
@@ -545,7 +831,7 @@ class CsvReader(object):
         if(date is None or time is None or len(date) == 0 or len(time) == 0):
             return None
         
-        return datetime.strptime( date + 'T' + time, self.timeformat )
+        return self.parseTime(date, time)
         
         
     def _initColumns(self):
@@ -565,7 +851,7 @@ class CsvReader(object):
         """
         for key in CsvReader.mandatoryColumns:
             if(getattr(self, key, None) is None):
-                raise KeyError("Mandatory column {0} not found")
+                raise KeyError("Mandatory column {0} not found".format(key))
 
 
         
\ No newline at end of file
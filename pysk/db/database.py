@@ -1,64 +1,448 @@
 # -*- coding: utf-8 -*-"
 
-import MySQLdb as mdb
 from subprocess import check_output
+from itertools import izip, groupby, islice
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+import threading
 
 from pysk.db.model import Airplane, Flight, LaunchMethod, Pilot, User
+from .column import Column
 from .table import Table
-from .column import Column 
 from .record import Record
+from .identity_map import IdentityMap
+from .query import Filter, Query
+from .pool import ConnectionPool
+from .backend import MySQLBackend
+
+
+#: Name of the temporary table filled by :meth:`Database.stageFlights`
+STAGING_TABLE= "staged_flights"
+
+#: Columns of :data:`STAGING_TABLE`
+STAGING_COLUMNS= [ ("seq",        "integer NOT NULL"),
+                   ("id",         "integer"),
+                   ("plane_id",   "integer"),
+                   ("pilot_id",   "integer"),
+                   ("copilot_id", "integer"),
+                   ("begin_time", "datetime"),
+                   ("end_time",   "datetime") ]
+
+#: Pairs of columns of ``flights`` and :data:`STAGING_TABLE` identifying
+#: flights of the same pilot or plane (see :meth:`Database.iterSimilarFlights`).
+#: Like there, a staged copilot id of 0 does not match any flight.
+STAGING_JOINS= [ ("pilot_id",   "pilot_id"),
+                 ("copilot_id", "pilot_id"),
+                 ("plane_id",   "plane_id"),
+                 ("pilot_id",   "copilot_id"),
+                 ("copilot_id", "copilot_id") ]
+
+#: Indexed columns of :data:`STAGING_TABLE`
+STAGING_INDEXES= [ "plane_id", "pilot_id", "copilot_id" ]
+
+#: Expression of the pilot in command of a flight (see
+#: :meth:`.db.model.Flight.pic`)
+PIC_EXPRESSION= ( "CASE WHEN type = 'training_2' THEN copilot_id "
+                  "ELSE pilot_id END" )
+
+#: Name of the table holding landings and flight time per plane, day and pilot
+#: in command (see :meth:`Database.rebuildRollup`)
+ROLLUP_TABLE= "pysk_plane_days"
+
+#: Columns of :data:`ROLLUP_TABLE`
+ROLLUP_COLUMNS= [ ("plane_id",     "int(11) NOT NULL"),
+                  ("flight_day",   "date NOT NULL"),
+                  ("pic",          "int(11) NOT NULL"),
+                  ("num_flights",  "int(11) NOT NULL"),
+                  ("seconds",      "bigint NOT NULL"),
+                  ("num_copilot",  "int(11) NOT NULL") ]
+
+#: Primary key of :data:`ROLLUP_TABLE`
+ROLLUP_KEY= [ "plane_id", "flight_day", "pic" ]
+
+#: Format of the days in :data:`ROLLUP_TABLE`
+DAY_FORMAT= "%Y-%m-%d"
+
+#: Name of the table holding the number of flights and the flight time of each
+#: plane before the first day of a month (see :meth:`Database.planeTotals`)
+CHECKPOINT_TABLE= "pysk_plane_checkpoints"
+
+#: Columns of :data:`CHECKPOINT_TABLE`
+CHECKPOINT_COLUMNS= [ ("plane_id",     "int(11) NOT NULL"),
+                      ("month_start",  "date NOT NULL"),
+                      ("num_flights",  "bigint NOT NULL"),
+                      ("seconds",      "bigint NOT NULL") ]
+
+#: Primary key of :data:`CHECKPOINT_TABLE`
+CHECKPOINT_KEY= [ "plane_id", "month_start" ]
 
 
 class Database(object):
     """Interface for MySQL database used by Startkladde
 
-    If *password* is not ``None``, a new connection to the database will be
-    attempted.        
+    If *password* is not ``None`` or *backend* does not require a password, a
+    new connection to the database will be attempted.
+
+    The *SQL* dialect and connection handling are delegated to a
+    :class:`.db.backend.Backend`. By default the MySQL server of Startkladde
+    is used. A :class:`.db.backend.SQLiteBackend` provides the same interface
+    on a local file or in memory, e.g. for offline analysis or tests:
+
+    .. code-block:: python
+
+       db= Database( backend= SQLiteBackend(":memory:") )
         
     Arguments:
         host (str): Hostname. Defaults to '*localhost*'
         user (str): MySQL username. Defaults to '*startkladde*'.
         password (str): Password for user. Defaults to ``None``.
         dbName (str): Name of Database to open. Defaults to '*startkladde*'.        
+        chunkSize (int): Default number of rows written per ``INSERT``
+           statement (see :meth:`insert`). Defaults to 100.
+        streaming (bool): Default for the *stream* argument of
+           :meth:`iterate`. Defaults to ``False``.
+        fetchSize (int): Number of rows fetched at once from a streamed
+           result set. Defaults to 1000.
+        backend (:class:`.db.backend.Backend`): Database backend. Defaults to
+           *None* (:class:`.db.backend.MySQLBackend`).
     """
     def __init__(self, host='localhost',
                        user='startkladde',
                        password=None,
-                       dbName='startkladde'):
+                       dbName='startkladde',
+                       chunkSize=100,
+                       streaming=False,
+                       fetchSize=1000,
+                       backend=None):
         """Create new Database instance
         """
+        self.backend= backend or MySQLBackend()
+        self.chunkSize= chunkSize
+        self.streaming= streaming
+        self.fetchSize= fetchSize
         self._sk= None
         self._cursor= None
-        
-        if(password):
+        self._connectArgs= None
+        self._streamConnection= None # connection reserved for streaming
+        self._streamOpen= False
+        self._pool= None
+        self._local= threading.local() # connection bound to current thread
+        self._tables= dict() # schema registry: table name -> Table
+        self._allTablesLoaded= False
+        self.nQueries= 0 # number of statements sent to the server
+        self._nQueriesLock= threading.Lock() # guards nQueries in pooled mode
+        self._identityMap= None
+        self._stagedSpan= None # (begin, end) of staged flights
+        self._rollup= None # rollup table exists, None if unknown
+        self._windowFunctions= None # server supports them, None if unknown
+        
+        if password or not self.backend.requiresPassword:
             self.connect(host, user, password, dbName)        
     
     
     def connect(self, host='localhost',
                       user='startkladde',
                       password=None,
-                      dbName='startkladde'):
-        """Connect to MySQL server
+                      dbName='startkladde',
+                      poolSize=None,
+                      minPoolSize=1):
+        """Connect to database server
+        
+        If *poolSize* is given, the instance operates in pooled mode and may be
+        shared between threads. Each thread checks out its own connection from
+        a :class:`.db.ConnectionPool` for the duration of an operation. After
+        a write operation the connection stays bound to the thread until
+        :meth:`commit` or :meth:`rollback` is called, such that each thread
+        has its own transaction. Use :meth:`session` to keep a connection for
+        a longer sequence of operations.
         
         Arguments:
             host (str): Hostname. Defaults to '*localhost*'.
             user (str): MySQL username. Defaults to '*startkladde*'.
             password (str): Password for user. Defaults to ``None``.
             dbName (str): Name of Database to open. Defaults to '*startkladde*'.        
+            poolSize (int): Maximum number of pooled connections. If *None*, a
+               single connection is used. Defaults to *None*.
+            minPoolSize (int): Number of connections opened immediately in
+               pooled mode. Defaults to 1.
         """
-        self._sk= mdb.connect(host, user, password, dbName)
-        self._cursor= self._sk.cursor()
+        self._connectArgs= (host, user, password, dbName)
+
+        if poolSize:
+            if not self.backend.allowsPooling:
+                raise ValueError("Backend '{0}' does not support connection "
+                                 "pooling.".format(self.backend.name))
+                                 
+            self._pool= ConnectionPool( lambda: self.backend.connect(host,
+                                                                     user,
+                                                                     password,
+                                                                     dbName),
+                                        minSize= minPoolSize,
+                                        maxSize= poolSize,
+                                        healthCheck= self.backend.healthCheck )
+        else:
+            self._sk= self.backend.connect(host, user, password, dbName)
+            self._cursor= self._sk.cursor()
+
+        self._windowFunctions= None
+        self.invalidateTables()
+        self.clearCache()
 
         
     def disconnect(self):
         """Disconnect from database"""
-        self._sk.close()        
+        if self._pool is not None:
+            self._releaseConnection(force=True)
+            self._pool.close()
+            self._pool= None
+        else:
+            self._sk.close()        
+        
+        if self._streamConnection is not None:
+            self._streamConnection.close()
+            self._streamConnection= None
+        
+        self.invalidateTables()
+        self.clearCache()
+
+
+    @contextmanager
+    def session(self):
+        """Context manager binding a connection to the current thread
+        
+        In pooled mode all operations inside the managed block use the same
+        connection. Uncommitted changes are rolled back when the outermost
+        block is left. Without pool, the single connection is used as before.
+        
+        Yield:
+            ``self``
+        """
+        if self._pool is None:
+            yield self
+            return
+        
+        self._acquireCursor()
+        self._local.depth+= 1
+        
+        try:
+            yield self
+        finally:
+            self._local.depth-= 1
+            
+            if not self._local.depth and self._local.dirty:
+                self.rollback()
+            
+            self._releaseConnection()
+
+
+    def _acquireCursor(self):
+        """Get the cursor of the connection bound to the current thread
+        
+        In pooled mode a connection is checked out from the pool, if the
+        current thread does not hold one yet.
+        
+        Return:
+            Cursor object
+        """
+        if self._pool is None:
+            return self._cursor
+
+        local= self._local
+        
+        if getattr(local, "conn", None) is None:
+            local.conn= self._pool.acquire()
+            local.cursor= local.conn.cursor()
+            local.dirty= False
+            local.depth= getattr(local, "depth", 0)
+        
+        return local.cursor
+
+
+    def _releaseConnection(self, force=False):
+        """Return the connection of the current thread to the pool
+        
+        The connection is kept, if it is used by an open :meth:`session` or
+        holds uncommitted changes, unless *force* is ``True``.
+        
+        Arguments:
+            force (bool): Release connection in any case. Defaults to
+               ``False``.
+        """
+        if self._pool is None:
+            return
+            
+        local= self._local
+        conn= getattr(local, "conn", None)
+
+        if conn is None:
+            return
+        
+        if not force and (local.depth or local.dirty):
+            return
+            
+        local.conn= None
+        local.cursor= None
+        self._pool.release(conn)
+
+
+    def enableCache(self, maxSize=1024):
+        """Enable the identity map for lookups by id
+        
+        If enabled, records returned by :meth:`uniqueById` (and thus
+        :meth:`pilot`, :meth:`plane` and :meth:`launchMethod`) are kept in an
+        :class:`.db.IdentityMap` and shared between subsequent calls. Records
+        written through :meth:`insert`, :meth:`delete` or :meth:`update` are
+        evicted from the map. Callers must not modify returned records.
+        
+        Arguments:
+            maxSize (int): Maximum number of cached records. A value of ``0``
+               disables the cache. Defaults to 1024.
+        """
+        if not maxSize:
+            self.disableCache()
+        elif self._identityMap is None:
+            self._identityMap= IdentityMap(maxSize)
+        else:
+            self._identityMap.maxSize= maxSize
+
+
+    def disableCache(self):
+        """Disable the identity map
+        """
+        self._identityMap= None
+
+
+    def clearCache(self):
+        """Remove all records from the identity map, if enabled
+        """
+        if self._identityMap is not None:
+            self._identityMap.clear()
+
+
+    def cache(self):
+        """Get identity map
+        
+        Return:
+            :class:`.db.IdentityMap` instance or *None* if the cache is
+            disabled
+        """
+        return self._identityMap
+
+
+    def _invalidate(self, cls, id=None):
+        """Evict records from the identity map, if enabled
+        
+        Arguments:
+            cls (class): Class specifying the table
+            id (int): ID of record to evict. If *None*, all records of the
+               table are evicted. Defaults to *None*.
+        """
+        if self._identityMap is not None:
+            self._identityMap.invalidate(cls.tableName(), id)
         
         
     def commit(self):
         """Commit all changes to the database
+        
+        In pooled mode, the changes made by the current thread are committed.
+        The rollup table is brought up to date before (see
+        :meth:`rebuildRollup`).
+        """
+        self._refreshRollup()
+        
+        if self._pool is None:
+            self._sk.commit()
+            return
+        
+        if getattr(self._local, "conn", None) is not None:
+            self._local.conn.commit()
+            self._local.dirty= False
+            self._releaseConnection()
+
+
+    def rollback(self):
+        """Discard all uncommitted changes
+        
+        In pooled mode, the changes made by the current thread are discarded.
+        """
+        self._rollupPending().clear()
+        
+        if self._pool is None:
+            self._sk.rollback()
+            return
+        
+        if getattr(self._local, "conn", None) is not None:
+            self._local.conn.rollback()
+            self._local.dirty= False
+            self._releaseConnection()
+
+
+    def _countQuery(self):
+        """Increment :attr:`nQueries`
+        
+        The counter is shared by all threads in pooled mode.
         """
-        self._sk.commit()
+        with self._nQueriesLock:
+            self.nQueries+= 1
+
+
+    def _execute(self, command, data=None):
+        """Execute a single modifying statement
+        
+        All modifying statements should be sent through this method to keep
+        :attr:`nQueries` up to date. In pooled mode, the connection stays bound
+        to the current thread until the next :meth:`commit` or
+        :meth:`rollback`.
+        
+        Arguments:
+            command (str): SQL statement
+            data: Parameters passed verbatim to ``cursor.execute``. Defaults to
+               *None*.
+        """
+        cursor= self._acquireCursor()
+        self._countQuery()
+        
+        if self._pool is not None:
+            self._local.dirty= True
+
+        cursor.execute( *self.backend.prepare(command, data) )
+
+
+    def lastInsertId(self):
+        """Get id generated by the last insert statement
+        
+        Only meaningful after inserting a single row with an automatically
+        incremented id. In pooled mode, the connection of the current thread
+        is used.
+        
+        Return:
+            Generated id or *None*
+        """
+        return self._acquireCursor().lastrowid
+
+
+    def _fetch(self, command, data=None):
+        """Execute a query and fetch the complete result set
+        
+        In pooled mode, the connection is returned to the pool afterwards,
+        unless it is still needed by the current thread.
+        
+        Arguments:
+            command (str): SQL statement
+            data: Parameters passed verbatim to ``cursor.execute``. Defaults to
+               *None*.
+        
+        Return:
+            Sequence of rows
+        """
+        cursor= self._acquireCursor()
+        self._countQuery()
+
+        try:
+            cursor.execute( *self.backend.prepare(command, data) )
+            return cursor.fetchall()
+        finally:
+            self._releaseConnection()
         
         
     def listTables(self):
@@ -67,81 +451,232 @@ class Database(object):
         Return:
             List of tables
         """
-        self._cursor.execute("SHOW TABLES")
-        
         retval=[]
-        for table in self._cursor.fetchall():
+        for table in self._fetch( self.backend.listTablesStatement() ):
             retval.append( table[0] )
         
         return retval
 
 
+    def describeTable(self, tableName):
+        """Query meta information of a single table from the server
+        
+        Always queries the server (e.g. ``DESCRIBE`` on MySQL). Use
+        :meth:`getTable` to benefit from the schema registry.
+        
+        Arguments:
+            tableName (str): Name of table to describe
+        
+        Return:
+            :class:`.db.Table` instance
+        """
+        table= Table()
+        
+        statement= self.backend.describeTableStatement(tableName)
+        
+        for item in self._fetch(statement):
+            table.appendColumn( self.backend.makeColumn(item) )
+            
+        return table
+
+
+    def getTable(self, tableName):
+        """Get meta information about a single table
+        
+        The table is described once per connection and cached in the schema
+        registry afterwards.
+        
+        Arguments:
+            tableName (str): Name of table
+        
+        Return:
+            :class:`.db.Table` instance
+        """
+        table= self._tables.get(tableName)
+        
+        if table is None:
+            table= self.describeTable(tableName)
+            self._tables[tableName]= table
+        
+        return table
+
+
     def getTables(self):
         """Get information about tables                
+        
+        The information is retrieved from the server on first use and cached
+        until the next call to :meth:`invalidateTables`.
                     
         Return:
             Dictionary with table name as key and :class:`.db.Table` instance as
             value
         """
-        tables= self.listTables()
-        retval= dict()        
+        if not self._allTablesLoaded:
+            for tableName in self.listTables():
+                self.getTable(tableName)
+
+            self._allTablesLoaded= True
         
-        for tableName in tables:
-            self._cursor.execute("DESCRIBE `{0}`".format(tableName))
+        return dict(self._tables)
 
-            table= retval.setdefault(tableName, Table())
-            
-            for item in self._cursor.fetchall():
-                table.appendColumn( Column( name= item[0],
-                                            dataType= item[1],
-                                            allowsNull= item[2].upper() == "YES",
-                                            index= item[3],
-                                            defaultValue= item[4],
-                                            extra= item[5].lower() ))
+
+    def invalidateTables(self, tableName=None):
+        """Invalidate the schema registry
         
-        return retval
+        Must be called if the table layout is changed behind the back of this
+        instance (e.g. by ``ALTER TABLE``).
+        
+        Arguments:
+            tableName (str): Name of table to invalidate. If *None*, all cached
+               tables are dropped. Defaults to *None*.
+        """
+        if tableName is None:
+            self._tables.clear()
+        else:
+            self._tables.pop(tableName, None)
+
+        if tableName in (None, ROLLUP_TABLE, CHECKPOINT_TABLE):
+            self._rollup= None
+
+        self._allTablesLoaded= False
                 
 
-    def iterate(self, cls, filter=None, order=None):
+    def iterate(self, cls, filter=None, order=None, stream=None, columns=None):
         """Iterate over the rows of a given table                
         
+        By default the complete result set is transferred to the client before
+        the first row is returned. In streaming mode the rows are read from an
+        unbuffered server side cursor in batches of :attr:`fetchSize` rows,
+        such that memory consumption does not depend on the size of the result
+        set.
+        
+        Streamed result sets are read through a second connection reserved for
+        this purpose, so that other queries (e.g. lookups in
+        :meth:`makeRecords`) may be issued while a stream is open. Only one
+        stream may be open at a time. The stream connection does not see
+        uncommitted changes made through this instance. In pooled mode, each
+        stream checks out its own connection from the pool instead. Backends
+        without :attr:`~.db.backend.Backend.separateStreamConnection` (e.g.
+        SQLite) read the stream through a separate cursor on the main
+        connection.
+        
         Arguments:
             cls: Class specifying the table. Must provide a static method
                tableName, which returns the name of the selected table and a
                constructor which accepts the returned tuple.
-            filter (str): Any filter string in the format passed to *SQL*
-               ``WHERE`` command. If *None*, no filter is applied. Defaults to
-               *None*.
+            filter (:class:`.db.Filter`): Filter applied in *SQL* ``WHERE``
+               clause. Strings are passed verbatim. If *None*, no filter is
+               applied. Defaults to *None*.
             order (str): Optional order key. Passed verbatim to *SQL*
                ``ORDER BY`` statement. Defaults to *None*.
+            stream (bool): Stream result set from the server. If *None*,
+               :attr:`streaming` is used. Defaults to *None*.
+            columns (iterable): Names of columns to select. The values are
+               passed to the constructor of *cls* as keyword arguments, such
+               that all other attributes keep their default values. If *None*,
+               all columns are selected and passed as positional arguments.
+               Defaults to *None*.
             
         Return:
             Generator yielding an instance of *cls* for each table row
         """
-        whereStr=""
-        orderStr=""
+        if stream is None:
+            stream= self.streaming
         
-        if(filter is not None):
-            whereStr=" WHERE {0}".format(filter)
+        query= Query(cls, filter=filter, order=order, columns=columns)
+        columns= query.columns
+        
+        if stream:
+            rows= self._stream( query.statement(), query.params() )
+        else:
+            # fetch everything, since the shared cursor may be reused by the
+            # caller before iteration is complete
+            rows= self._fetch( query.statement(), query.params() )
+        
+        if columns:
+            for row in rows:
+                yield cls( **dict( izip(columns, row) ) )
+        else:
+            for row in rows:
+                yield cls(*row)
+
 
-        if order:
-            orderStr=" ORDER BY {0}".format(order)            
+    def _stream(self, command, data=None):
+        """Stream the result set of a query from the server
+        
+        Raises a :class:`RuntimeError`, if another stream is still open.
         
-        self._cursor.execute( "SELECT * FROM {0}{1}{2}"
-                              .format( cls.tableName(),
-                                       whereStr,
-                                       orderStr ))
+        Arguments:
+            command (str): SQL statement
+            data: Parameters passed verbatim to ``cursor.execute``. Defaults to
+               *None*.
         
-        for row in self._cursor:
-            yield cls(*row)
+        Return:
+            Generator yielding one tuple per row
+        """
+        if self._pool is not None:
+            with self._pool.connection() as conn:
+                cursor= self.backend.cursor(conn, streaming=True)
+                
+                for row in self._fetchStream(cursor, command, data):
+                    yield row
+            return
+            
+        if self._streamOpen:
+            raise RuntimeError("Cannot open a second stream, while another "
+                               "result set is being streamed.")
+        
+        if not self.backend.separateStreamConnection:
+            conn= self._sk
+        else:
+            if self._streamConnection is None:
+                self._streamConnection= self.backend.connect(*self._connectArgs)
+                
+            conn= self._streamConnection
+        
+        self._streamOpen= True
+
+        try:
+            cursor= self.backend.cursor(conn, streaming=True)
+            
+            for row in self._fetchStream(cursor, command, data):
+                yield row
+        finally:
+            self._streamOpen= False
+
+
+    def _fetchStream(self, cursor, command, data=None):
+        """Read result set from an unbuffered cursor in batches
+        
+        Arguments:
+            cursor: Unbuffered cursor. Closed upon completion.
+            command (str): SQL statement
+            data: Parameters passed verbatim to ``cursor.execute``. Defaults to
+               *None*.
+        
+        Return:
+            Generator yielding one tuple per row
+        """
+        try:
+            self._countQuery()
+            cursor.execute( *self.backend.prepare(command, data) )
+            rows= cursor.fetchmany(self.fetchSize)
+            
+            while rows:
+                for row in rows:
+                    yield row
+                
+                rows= cursor.fetchmany(self.fetchSize)
+        finally:
+            cursor.close()
 
 
     def iterPlanes(self, filter=None):
         """Iterate over all airplanes in database
             
         Arguments:
-            filter (str): Any filter string accepted by *SQL*'s ``WHERE``
-               command. If *None*, no filter is applied. Defaults to *None*.
+            filter (:class:`.db.Filter`): Filter applied in *SQL*'s ``WHERE``
+               clause. If *None*, no filter is applied. Defaults to *None*.
                 
         Return:
             Generator yielding an :class:`.db.model.Airplane` instance for each
@@ -154,8 +689,8 @@ class Database(object):
         """Iterate over all pilots in database
             
         Arguments:
-            filter (str): Any filter string accepted by *SQL*'s ``WHERE``
-               command. If *None*, no filter is applied. Defaults to *None*.
+            filter (:class:`.db.Filter`): Filter applied in *SQL*'s ``WHERE``
+               clause. If *None*, no filter is applied. Defaults to *None*.
                 
         Return:
             Generator yielding an :class:`.db.model.Pilot` instance for each
@@ -168,8 +703,8 @@ class Database(object):
         """Iterate over all users in database
             
         Arguments:
-            filter (str): Any filter string accepted by *SQL*'s ``WHERE``
-               command. If *None*, no filter is applied. Defaults to *None*.
+            filter (:class:`.db.Filter`): Filter applied in *SQL*'s ``WHERE``
+               clause. If *None*, no filter is applied. Defaults to *None*.
                 
         Return:
             Generator yielding an :class:`.db.model.User` instance for each
@@ -178,27 +713,31 @@ class Database(object):
         return self.iterate(User, filter)
 
 
-    def iterFlights(self, filter=None, order=None):
+    def iterFlights(self, filter=None, order=None, stream=None, columns=None):
         """Iterate over all flights in database
             
         Arguments:
-            filter (str): Any filter string accepted by *SQL*'s ``WHERE``
-               command. If *None*, no filter is applied. Defaults to *None*.
+            filter (:class:`.db.Filter`): Filter applied in *SQL*'s ``WHERE``
+               clause. If *None*, no filter is applied. Defaults to *None*.
             order (str): Parameter by which to order. Passed verbatim to *SQL*'s
                ``ORDER BY`` statement. Defaults to *None*.
+            stream (bool): Stream result set from the server (see
+               :meth:`iterate`). Defaults to *None*.
+            columns (iterable): Names of columns to select (see
+               :meth:`iterate`). Defaults to *None* (all columns).
                 
         Return:
             Generator yielding an :class:`.db.model.Flight` instance for each
             airplane in database matching the filter criteria.
         """
-        return self.iterate(Flight, filter, order)
+        return self.iterate(Flight, filter, order, stream, columns)
 
 
     def iterSimultaneousFlights(self, flight):
         """Iterate over all flights, which overlap with the given flight
 
         Raises an exception if either landing or departure time are not
-        specified in *flight*.
+        specified in *flight*. The result set is never streamed.
         
         Arguments:
             flight (:class:`.db.model.Flight`): Flight for which to get
@@ -208,49 +747,810 @@ class Database(object):
             Generator yielding a :class:`.db.model.Flight` instance for each
             flight in database overlapping with *flight*.
         """        
-        return self.iterFlights(filter= "(landing_time >= '{0}') AND "
-                                        "(departure_time <= '{1}')"
-                                        .format( flight.departureTime(),
-                                                 flight.landingTime() ))
+        return self.iterFlights( filter= self.overlapFilter(flight),
+                                 stream= False )
+
+
+    @staticmethod
+    def overlapFilter(flight):
+        """Get filter matching all flights overlapping with a given flight
+        
+        Arguments:
+            flight (:class:`.db.model.Flight`): Flight for which to get
+               overlapping flights
+        
+        Return:
+            :class:`.db.Filter` instance
+        """
+        return Filter( "(landing_time >= %s) AND (departure_time <= %s)",
+                       flight.departureTime(),
+                       flight.landingTime() )
 
 
-    def iterSimilarFlights(self, flight, filter=None):
+    def iterSimilarFlights(self, flight, filter=None, columns=None):
         """Get all flights from database, which are similar to a given flight
 
         A flight is *similar* to another flight, if it is conducted by the same
         pilot or with the same airplane in an overlapping time span.
 
         Raises an exception if either landing or departure time are not
-        specified in flight.
+        specified in flight. The result set is never streamed, so conflicts
+        can be looked up while a stream is open.
         
         Arguments:
             flight (:class:`.db.model.Flight`): Flight for which to get
                overlapping flights
+            filter (:class:`.db.Filter`): Additional filter. Defaults to
+               *None*.
+            columns (iterable): Names of columns to select (see
+               :meth:`iterate`). Defaults to *None* (all columns).
         
         Return:
             Generator yielding a :class:`.db.model.Flight` instance for each
             flight in database simlar to *flight*.
         """
-        selection= str(
-            "(mode='local') "
-            "AND ( (landing_time >= '{0}') AND (departure_time <= '{1}') )"
-            "AND ( (pilot_id = '{2}') OR (copilot_id = '{2}')"
-               "OR (plane_id = '{3}') ").format(
-            flight.departureTime(),
-            flight.landingTime(),
-            flight.pilot_id,
-            flight.plane_id )
+        persons= [ Filter.equal("pilot_id", flight.pilot_id),
+                   Filter.equal("copilot_id", flight.pilot_id),
+                   Filter.equal("plane_id", flight.plane_id) ]
 
         if flight.copilot_id:
-            selection+= "OR (pilot_id = '{0}') OR (copilot_id = '{0}')".format(
-                        flight.copilot_id)
+            persons.extend([ Filter.equal("pilot_id", flight.copilot_id),
+                             Filter.equal("copilot_id", flight.copilot_id) ])
+        
+        selection= Filter.all( Filter.equal("mode", "local"),
+                               self.overlapFilter(flight),
+                               Filter.any(*persons),
+                               Filter.fromString(filter) )
+        
+        return self.iterFlights(filter= selection, columns= columns,
+                                stream= False)
+
+
+    def stageFlights(self, flights, chunkSize=None):
+        """Load flights into a temporary staging table
+        
+        Creates the table :data:`STAGING_TABLE` holding the columns needed to
+        look up similar flights and writes one row per flight. The rows are
+        numbered in the order of *flights*. An existing staging table is
+        replaced. The time span covered by the staged flights is kept to
+        restrict the lookup in :meth:`iterStagedConflicts`.
+        
+        Temporary tables are only visible to the connection they were created
+        on, i.e. the staging table must be used within a :meth:`session` in
+        pooled mode.
+        
+        Arguments:
+            flights (list): Flights to stage
+            chunkSize (int): Maximum number of rows per statement. Defaults to
+               :attr:`chunkSize`.
+        """
+        if not chunkSize:
+            chunkSize= self.chunkSize
+            
+        self.dropStagedFlights()
+        self._execute( self.backend.createTemporaryTableStatement(
+                           STAGING_TABLE, STAGING_COLUMNS ))
+        
+        for column in STAGING_INDEXES:
+            self._execute( "CREATE INDEX {0}_{1} ON {0} ({1})"
+                           .format(STAGING_TABLE, column) )
+        
+        tableInfo= Table( Column(name, dataType)
+                          for name, dataType in STAGING_COLUMNS )
+        command= "INSERT INTO {0} VALUES ".format(STAGING_TABLE)
+        statements= dict()
+        
+        data= []
+        nRows= 0
+        begin= [] # departure times of staged flights with landing time
+        end= []
+        
+        for seq, flight in enumerate(flights):
+            # compared like the filter of iterSimilarFlights
+            departure= flight.departureTime() or None
+            landing= flight.landingTime() or None
             
-        selection+= ")" #Bracket behind AND
+            data.extend(( seq,
+                          flight.id,
+                          flight.plane_id,
+                          flight.pilot_id,
+                          flight.copilot_id,
+                          departure,
+                          landing ))
+            nRows+= 1
+            
+            if landing is not None:
+                begin.append(departure)
+                end.append(landing)
+            
+            if nRows == chunkSize:
+                self._insertChunk(command, tableInfo, nRows, data, statements)
+                data= []
+                nRows= 0
+
+        if nRows:
+            self._insertChunk(command, tableInfo, nRows, data, statements)
         
-        if filter:
-            selection += "AND ({0})".format(filter)
+        self._stagedSpan= None
+        if end:
+            self._stagedSpan= ( None if None in begin else min(begin),
+                                max(end) )
+
+
+    def iterStagedConflicts(self, columns=None):
+        """Get all flights in database similar to a staged flight
+        
+        Yields the same flights as :meth:`iterSimilarFlights` with the filter
+        ``id > <id of staged flight>`` for each flight loaded by
+        :meth:`stageFlights`. Instead of one query per staged flight, a single
+        join is issued for each pair of columns in :data:`STAGING_JOINS`. The
+        flights in database are scanned by time within the time span of all
+        staged flights, i.e. staged flights should be close in time.
+        
+        Arguments:
+            columns (iterable): Names of columns to select. Defaults to *None*
+               (all columns).
         
-        return self.iterFlights(filter= selection)
+        Return:
+            List of tuples *(seq, flight)* ordered by *seq* and flight id,
+            where *seq* is the position of the staged flight passed to
+            :meth:`stageFlights` and *flight* a :class:`.db.model.Flight`
+            instance
+        """
+        if columns is None:
+            columns= self.getTable( Flight.tableName() ).iterColumnNames()
+        
+        columns= list(columns)
+        if "id" not in columns:
+            columns.append("id")
+        
+        if self._stagedSpan is None:
+            return []
+        
+        begin, end= self._stagedSpan
+        span= Filter.all( Filter("f.departure_time <= %s", end),
+                          Filter("f.landing_time >= %s", begin)
+                          if begin is not None else None )
+        
+        # CROSS JOIN keeps SQLite from scanning all flights of each pilot
+        command= ( "SELECT s.seq, {0} FROM {1} f CROSS JOIN {2} s "
+                   "ON s.{{1}}= f.{{0}} {{2}}"
+                   "WHERE f.mode= 'local' AND {3} "
+                   "AND s.end_time IS NOT NULL "
+                   "AND f.departure_time <= s.end_time "
+                   "AND (s.begin_time IS NULL OR f.landing_time >= s.begin_time) "
+                   "AND f.id > COALESCE(s.id, 0)"
+                   .format( ", ".join( "f." + col for col in columns ),
+                            Flight.tableName(),
+                            STAGING_TABLE,
+                            span.expression ))
+        
+        # temporary tables cannot be referred to twice in a single MySQL query
+        rows= dict()
+        for column, stagedColumn in STAGING_JOINS:
+            guard= ""
+            if stagedColumn == "copilot_id":
+                guard= "AND s.copilot_id <> 0 "
+            
+            for row in self._fetch( command.format(column, stagedColumn, guard),
+                                    span.params ):
+                rows[ (row[0], row[1 + columns.index("id")]) ]= row
+        
+        return [ (rows[key][0], Flight( **dict( izip(columns, rows[key][1:]) )))
+                 for key in sorted(rows) ]
+
+
+    def dropStagedFlights(self):
+        """Drop the staging table created by :meth:`stageFlights`, if any
+        """
+        self._execute( self.backend.dropTemporaryTableStatement(STAGING_TABLE) )
+
+
+    def iterPlaneLogEntries(self, filter=None, strict=True):
+        """Get the entries of the plane logs of flights aggregated in database
+        
+        The flights of each plane are ordered by departure time and id.
+        Consecutive flights of the same day with the same departure and landing
+        location form one entry. In strict mode, the pilot in command must be
+        the same, too. Entries are found by window functions and aggregated
+        by ``GROUP BY``, i.e. one row per entry is returned. The database must
+        support window functions (MySQL 8.0, MariaDB 10.2 or SQLite 3.25 and
+        newer, see :meth:`hasWindowFunctions`). Otherwise a
+        :class:`RuntimeError` is raised.
+        
+        Arguments:
+            filter (:class:`~.db.Filter`): Filter of flights. Defaults to
+               *None* (all flights).
+            strict (bool): Start a new entry, if the pilot in command changes.
+               Defaults to ``True``.
+        
+        Return:
+            List of tuples *(plane_id, date, pic, departure_location,
+            landing_location, first_departure, last_landing, nFlights,
+            seconds, nWithCopilot)* ordered by plane and departure, where
+            *date* is a string ``YYYY-MM-DD``, *pic* the id of the pilot in
+            command of the first flight, *last_landing* the landing time of the
+            last flight and *seconds* the total flight time in seconds
+        """
+        if not self.hasWindowFunctions():
+            raise RuntimeError( "Aggregating plane log entries requires window "
+                                "functions (MySQL 8.0, MariaDB 10.2 or "
+                                "SQLite 3.25)." )
+        
+        if filter is None:
+            filter= Filter("1=1")
+        
+        def same(column):
+            return ( "({0} = LAG({0}) OVER w OR ({0} IS NULL "
+                     "AND LAG({0}) OVER w IS NULL))".format(column) )
+        
+        same= [ same(col) for col in ( "flight_day",
+                                       "departure_location",
+                                       "landing_location" ) ]
+        if strict:
+            same.append("pic = LAG(pic) OVER w")
+        
+        order= "departure_time, id"
+        command= (
+            "WITH numbered AS ("
+              "SELECT id, plane_id, departure_location, landing_location, "
+                "departure_time, landing_time, "
+                "{pic} AS pic, "
+                "DATE(departure_time) AS flight_day, "
+                "{seconds} AS seconds, "
+                "CASE WHEN copilot_id <> 0 THEN 1 ELSE 0 END AS with_copilot "
+              "FROM {table} WHERE {filter}"
+            "), flagged AS ("
+              "SELECT numbered.*, "
+                "CASE WHEN LAG(id) OVER w IS NOT NULL AND {same} "
+                "THEN 0 ELSE 1 END AS new_entry "
+              "FROM numbered "
+              "WINDOW w AS (PARTITION BY plane_id ORDER BY {order})"
+            "), grouped AS ("
+              "SELECT flagged.*, "
+                "SUM(new_entry) OVER (PARTITION BY plane_id ORDER BY {order} "
+                  "ROWS UNBOUNDED PRECEDING) AS entry "
+              "FROM flagged"
+            "), bounded AS ("
+              "SELECT grouped.*, "
+                "FIRST_VALUE(pic) OVER (PARTITION BY plane_id, entry "
+                  "ORDER BY {order}) AS first_pic, "
+                "FIRST_VALUE(landing_time) OVER (PARTITION BY plane_id, entry "
+                  "ORDER BY departure_time DESC, id DESC) AS last_landing "
+              "FROM grouped"
+            ") "
+            "SELECT plane_id, MIN(flight_day), MIN(first_pic), "
+              "MIN(departure_location), MIN(landing_location), "
+              "MIN(departure_time), MIN(last_landing), COUNT(*), "
+              "SUM(seconds), SUM(with_copilot) "
+            "FROM bounded GROUP BY plane_id, entry ORDER BY plane_id, entry"
+            .format( pic= PIC_EXPRESSION,
+                     seconds= self.backend.secondsBetweenExpression(
+                                  "departure_time", "landing_time" ),
+                     table= Flight.tableName(),
+                     filter= filter.expression,
+                     same= " AND ".join(same),
+                     order= order ))
+        
+        convert= self.backend.convertDatetime
+        
+        return [ ( planeId, str(day), pic, departureLocation, landingLocation,
+                   convert(firstDeparture), convert(lastLanding),
+                   int(nFlights), int(seconds), int(nWithCopilot) )
+                 for ( planeId, day, pic, departureLocation, landingLocation,
+                       firstDeparture, lastLanding, nFlights, seconds,
+                       nWithCopilot )
+                 in self._fetch(command, tuple(filter.params)) ]
+
+
+    def hasWindowFunctions(self):
+        """Check if the database supports the window functions used by
+        :meth:`iterPlaneLogEntries`
+        
+        The version of the server is queried once per connection.
+        
+        Return:
+            ``True`` if and only if window functions are supported
+        """
+        if self._windowFunctions is None:
+            version= self._fetch( self.backend.versionStatement() )[0][0]
+            self._windowFunctions= self.backend.supportsWindowFunctions(
+                                                                str(version) )
+        
+        return self._windowFunctions
+
+
+    def iterPlaneDays(self, planeIds, begin=None, end=None):
+        """Get landings and flight time per plane, day and pilot in command
+
+        The sums are read from the rollup table, if it exists (see
+        :meth:`rebuildRollup`). Otherwise they are aggregated from the flights.
+        Flights without plane, departure or landing time are not counted.
+
+        Arguments:
+            planeIds (list): IDs of planes. Must not be empty.
+            begin (str): First day as ``YYYY-MM-DD``. Defaults to *None* (no
+               lower bound).
+            end (str): Day after the last day as ``YYYY-MM-DD``. Defaults to
+               *None* (no upper bound).
+
+        Return:
+            List of tuples *(plane_id, date, pic, nFlights, seconds,
+            nWithCopilot)* ordered by plane, date and pilot in command, where
+            *date* is a string ``YYYY-MM-DD`` and *seconds* the total flight
+            time in seconds
+        """
+        planes= Filter.isIn("plane_id", planeIds)
+
+        if self.hasRollup():
+            self._refreshRollup()
+
+            filter= Filter.all( planes,
+                                Filter("flight_day >= %s", begin)
+                                if begin else None,
+                                Filter("flight_day < %s", end)
+                                if end else None )
+            command= ( "SELECT {0} FROM {1} WHERE {2} "
+                       "ORDER BY plane_id, flight_day, pic"
+                       .format( ", ".join( col for col, dataType
+                                           in ROLLUP_COLUMNS ),
+                                ROLLUP_TABLE,
+                                filter.expression ))
+            params= filter.params
+        else:
+            command, params= self._rollupSelect(
+                                 Filter.all( planes,
+                                             Filter("departure_time >= %s", begin)
+                                             if begin else None,
+                                             Filter("departure_time < %s", end)
+                                             if end else None ))
+            command+= " ORDER BY 1, 2, 3"
+
+        return [ self._rollupRow(row) for row in self._fetch(command, params) ]
+
+
+    def hasRollup(self):
+        """Check if the rollup table :data:`ROLLUP_TABLE` and the checkpoints
+        :data:`CHECKPOINT_TABLE` exist
+
+        The result is cached until the next call to :meth:`invalidateTables`.
+
+        Return:
+            ``True`` if and only if both tables exist
+        """
+        if self._rollup is None:
+            tables= self.listTables()
+            self._rollup= ( ROLLUP_TABLE in tables
+                            and CHECKPOINT_TABLE in tables )
+
+        return self._rollup
+
+
+    def createRollup(self):
+        """Create the rollup table :data:`ROLLUP_TABLE` and the checkpoints
+        :data:`CHECKPOINT_TABLE`, if missing
+
+        The tables are empty after creation, use :meth:`rebuildRollup` to fill
+        them.
+        """
+        for tableName, columns, key in [ (ROLLUP_TABLE, ROLLUP_COLUMNS,
+                                          ROLLUP_KEY),
+                                         (CHECKPOINT_TABLE, CHECKPOINT_COLUMNS,
+                                          CHECKPOINT_KEY) ]:
+            self._execute( "CREATE TABLE IF NOT EXISTS {0} ({1}, "
+                           "PRIMARY KEY ({2}))"
+                           .format( tableName,
+                                    ", ".join( " ".join(col)
+                                               for col in columns ),
+                                    ", ".join(key) ))
+            self.invalidateTables(tableName)
+
+
+    def dropRollup(self):
+        """Drop the rollup table :data:`ROLLUP_TABLE` and the checkpoints
+        :data:`CHECKPOINT_TABLE`, if they exist
+        """
+        for tableName in (ROLLUP_TABLE, CHECKPOINT_TABLE):
+            self._execute("DROP TABLE IF EXISTS {0}".format(tableName))
+            self.invalidateTables(tableName)
+
+        self._rollupPending().clear()
+
+
+    def rebuildRollup(self):
+        """Recompute the rollup table from all flights
+
+        The rollup table :data:`ROLLUP_TABLE` holds the number of flights, the
+        flight time and the number of flights with copilot per plane, day and
+        pilot in command. It is created on demand by this method and maintained
+        afterwards: :meth:`insert`, :meth:`delete` and :meth:`update` of flights
+        record the touched days of each plane and :meth:`commit` recomputes
+        their rows. Changes made behind the back of this class (e.g. by
+        startkladde itself) are only reflected after a rebuild.
+
+        The checkpoints :data:`CHECKPOINT_TABLE` hold the totals of each plane
+        before the first day of every month from the first flight of the plane
+        up to the month after its last flight (see :meth:`planeTotals`). They
+        are rebuilt, too, and kept up to date along with the rollup table.
+
+        The tables are created, if missing. Changes are not committed.
+
+        Return:
+            Number of rows of the rollup table
+        """
+        self.createRollup()
+        self._rollupPending().clear()
+
+        self._execute("DELETE FROM {0}".format(ROLLUP_TABLE))
+
+        command, params= self._rollupSelect()
+        self._execute( "INSERT INTO {0} {1}".format(ROLLUP_TABLE, command),
+                       params )
+
+        self._execute("DELETE FROM {0}".format(CHECKPOINT_TABLE))
+
+        tableInfo= Table( Column(name, dataType)
+                          for name, dataType in CHECKPOINT_COLUMNS )
+        command= "INSERT INTO {0} VALUES ".format(CHECKPOINT_TABLE)
+        statements= dict()
+
+        data= []
+        nRows= 0
+
+        for checkpoint in self._iterCheckpoints( self._readRollup() ):
+            data.extend(checkpoint)
+            nRows+= 1
+
+            if nRows == self.chunkSize:
+                self._insertChunk(command, tableInfo, nRows, data, statements)
+                data= []
+                nRows= 0
+
+        if nRows:
+            self._insertChunk(command, tableInfo, nRows, data, statements)
+
+        return self._fetch( "SELECT COUNT(*) FROM {0}"
+                            .format(ROLLUP_TABLE) )[0][0]
+
+
+    def checkRollup(self):
+        """Compare the rollup table with the flights
+
+        Return:
+            Sorted list of keys *(plane_id, date, pic)*, whose row in the rollup
+            table is missing, superfluous or differs from the flights
+        """
+        command, params= self._rollupSelect()
+        expected= dict( (row[:3], row[3:])
+                        for row in ( self._rollupRow(row)
+                                     for row in self._fetch(command, params) ))
+
+        actual= dict( (row[:3], row[3:]) for row in self._readRollup() )
+
+        return sorted( key for key in set(expected) | set(actual)
+                       if expected.get(key) != actual.get(key) )
+
+
+    def checkCheckpoints(self):
+        """Compare the checkpoints with the flights
+
+        Return:
+            Sorted list of keys *(plane_id, month_start)* of checkpoints, whose
+            totals differ from the flights
+        """
+        command, params= self._rollupSelect()
+        days= dict() # plane id -> list of (day, nFlights, seconds)
+
+        for row in sorted( self._rollupRow(row)
+                           for row in self._fetch(command, params) ):
+            days.setdefault(row[0], []).append( (row[1], row[3], row[4]) )
+
+        retval= []
+        for planeId, monthStart, nFlights, seconds in self._fetch(
+                "SELECT {0} FROM {1}".format(
+                    ", ".join( col for col, dataType in CHECKPOINT_COLUMNS ),
+                    CHECKPOINT_TABLE )):
+            monthStart= str(monthStart)[:10]
+            before= [ (n, s) for day, n, s in days.get(planeId, [])
+                      if day < monthStart ]
+
+            if ( int(nFlights), int(seconds) ) != ( sum(n for n, s in before),
+                                                    sum(s for n, s in before) ):
+                retval.append( (planeId, monthStart) )
+
+        return sorted(retval)
+
+
+    def planeTotals(self, planeIds, day):
+        """Get number of flights and flight time of planes before a day
+
+        If the rollup table exists, the latest checkpoint of each plane not
+        after *day* is read and only the remaining days of the rollup table
+        are summed up. Otherwise all flights before *day* are aggregated.
+        Flights without departure or landing time are not counted.
+
+        Arguments:
+            planeIds (list): IDs of planes. Must not be empty.
+            day (str): Day as ``YYYY-MM-DD``
+
+        Return:
+            Dictionary with plane id as key and tuples *(nFlights, seconds)* as
+            value. Planes without flights before *day* are contained, too.
+        """
+        retval= dict( (planeId, (0, 0)) for planeId in planeIds )
+        planes= Filter.isIn("plane_id", planeIds)
+
+        if not self.hasRollup():
+            command, params= self._rollupSelect(
+                                 Filter("departure_time < %s", day) & planes )
+            for row in self._fetch(command, params):
+                planeId, date, pic, nFlights, seconds, n= self._rollupRow(row)
+                total= retval[planeId]
+                retval[planeId]= (total[0] + nFlights, total[1] + seconds)
+
+            return retval
+
+        self._refreshRollup()
+
+        filter= Filter("c.month_start <= %s", day) & planes
+        starts= dict() # month start -> plane ids
+        covered= set()
+        for planeId, monthStart, nFlights, seconds in self._fetch(
+                "SELECT plane_id, month_start, num_flights, seconds "
+                "FROM {0} c WHERE {1} AND month_start = "
+                  "(SELECT MAX(month_start) FROM {0} "
+                  "WHERE plane_id = c.plane_id AND month_start <= %s)"
+                .format( CHECKPOINT_TABLE, filter.expression ),
+                filter.params + (day,) ):
+            retval[planeId]= ( int(nFlights), int(seconds) )
+            starts.setdefault(str(monthStart)[:10], []).append(planeId)
+            covered.add(planeId)
+
+        uncovered= [ planeId for planeId in planeIds
+                     if planeId not in covered ]
+        if uncovered:
+            starts[None]= uncovered
+
+        for start, ids in starts.iteritems():
+            filter= Filter.all( Filter.isIn("plane_id", ids),
+                                Filter("flight_day >= %s", start)
+                                if start else None,
+                                Filter("flight_day < %s", day) )
+
+            for planeId, nFlights, seconds in self._fetch(
+                    "SELECT plane_id, SUM(num_flights), SUM(seconds) FROM {0} "
+                    "WHERE {1} GROUP BY plane_id"
+                    .format(ROLLUP_TABLE, filter.expression),
+                    filter.params ):
+                total= retval[planeId]
+                retval[planeId]= ( total[0] + int(nFlights),
+                                   total[1] + int(seconds) )
+
+        return retval
+
+
+    def _readRollup(self):
+        """Read the rollup table
+
+        Return:
+            List of tuples as returned by :meth:`iterPlaneDays` ordered by
+            plane, date and pilot in command
+        """
+        return [ self._rollupRow(row)
+                 for row in self._fetch(
+                     "SELECT {0} FROM {1} ORDER BY plane_id, flight_day, pic"
+                     .format( ", ".join( col for col, dataType
+                                         in ROLLUP_COLUMNS ),
+                              ROLLUP_TABLE )) ]
+
+
+    @staticmethod
+    def _iterCheckpoints(rows):
+        """Compute the checkpoints from rows of the rollup table
+
+        Arguments:
+            rows (iterable): Rows as returned by :meth:`iterPlaneDays` ordered
+               by plane and date
+
+        Yield:
+            Tuples *(plane_id, month_start, nFlights, seconds)* for every month
+            from the first flight of each plane up to the month after its last
+            flight
+        """
+        for planeId, days in groupby(rows, lambda row: row[0]):
+            months= dict() # month start -> (nFlights, seconds)
+            for row in days:
+                month= row[1][:7] + "-01"
+                nFlights, seconds= months.get(month, (0, 0))
+                months[month]= (nFlights + row[3], seconds + row[4])
+
+            month= min(months)
+            last= Database._nextMonth( max(months) )
+            nFlights, seconds= 0, 0
+
+            while month <= last:
+                yield (planeId, month, nFlights, seconds)
+
+                n, s= months.get(month, (0, 0))
+                nFlights+= n
+                seconds+= s
+                month= Database._nextMonth(month)
+
+
+    @staticmethod
+    def _nextMonth(monthStart):
+        """Get the first day of the next month
+
+        Arguments:
+            monthStart (str): First day of a month as ``YYYY-MM-01``
+
+        Return:
+            First day of the following month as ``YYYY-MM-01``
+        """
+        year, month= int(monthStart[:4]), int(monthStart[5:7])
+
+        if month == 12:
+            return "{0:04d}-01-01".format(year + 1)
+
+        return "{0:04d}-{1:02d}-01".format(year, month + 1)
+
+
+    def _rollupSelect(self, filter=None):
+        """Get query aggregating flights to rows of the rollup table
+
+        Arguments:
+            filter (:class:`~.db.Filter`): Filter of flights. Defaults to
+               *None* (all flights).
+
+        Return:
+            Tuple *(command, params)*. The columns of the result are the
+            columns of :data:`ROLLUP_COLUMNS`.
+        """
+        filter= Filter.all( Filter("plane_id IS NOT NULL"),
+                            Filter("departure_time IS NOT NULL"),
+                            Filter("landing_time IS NOT NULL"),
+                            filter )
+        pic= "COALESCE({0}, 0)".format(PIC_EXPRESSION)
+
+        command= ( "SELECT plane_id, DATE(departure_time), {pic}, COUNT(*), "
+                     "SUM({seconds}), "
+                     "SUM(CASE WHEN copilot_id <> 0 THEN 1 ELSE 0 END) "
+                   "FROM {table} WHERE {filter} "
+                   "GROUP BY plane_id, DATE(departure_time), {pic}"
+                   .format( pic= pic,
+                            seconds= self.backend.secondsBetweenExpression(
+                                         "departure_time", "landing_time" ),
+                            table= Flight.tableName(),
+                            filter= filter.expression ))
+
+        return command, tuple(filter.params)
+
+
+    @staticmethod
+    def _rollupRow(row):
+        """Convert a row of the rollup table to python types
+
+        Return:
+            Tuple *(plane_id, date, pic, nFlights, seconds, nWithCopilot)*
+            with *date* as string ``YYYY-MM-DD``
+        """
+        planeId, day, pic, nFlights, seconds, nWithCopilot= row
+
+        return ( int(planeId), str(day)[:10], int(pic),
+                 int(nFlights), int(seconds), int(nWithCopilot) )
+
+
+    def _rollupPending(self):
+        """Get the plane days touched by the current thread since the last commit
+
+        Return:
+            Set of tuples *(plane_id, date)*
+        """
+        pending= getattr(self._local, "rollup", None)
+
+        if pending is None:
+            pending= self._local.rollup= set()
+
+        return pending
+
+
+    def _markRollup(self, filter=None, data=None):
+        """Remember the plane days of flights in database for :meth:`commit`
+
+        Arguments:
+            filter (str): Expression selecting the flights. If *None* or the
+               empty string, all flights are selected. Defaults to *None*.
+            data: Parameters of *filter*. Defaults to *None*.
+
+        Return:
+            List of ids of the selected flights
+        """
+        command= ( "SELECT id, plane_id, DATE(departure_time) FROM {0}"
+                   .format( Flight.tableName() ))
+        if filter:
+            command+= " WHERE {0}".format(filter)
+
+        pending= self._rollupPending()
+        ids= []
+
+        for id, planeId, day in self._fetch(command, data):
+            ids.append(id)
+
+            if planeId is not None and day is not None:
+                pending.add( (planeId, str(day)[:10]) )
+
+        return ids
+
+
+    def _markFlights(self, ids, chunkSize=500):
+        """Remember the plane days of flights in database by id
+
+        Arguments:
+            ids (list): IDs of the flights
+            chunkSize (int): Maximum number of ids per query. Defaults to 500.
+        """
+        for i in xrange(0, len(ids), chunkSize):
+            filter= Filter.isIn("id", ids[i:i + chunkSize])
+            self._markRollup(filter.expression, filter.params)
+
+
+    def _refreshRollup(self):
+        """Recompute the rows of the rollup table of all pending plane days
+
+        The checkpoints after each day are corrected by the difference of the
+        sums of the day. Four statements are issued per touched day and one
+        per plane, whose sums changed.
+        """
+        pending= getattr(self._local, "rollup", None)
+
+        if not pending:
+            return
+
+        days= dict() # day -> plane ids
+        for planeId, day in pending:
+            days.setdefault(day, []).append(planeId)
+
+        for day, planeIds in sorted( days.iteritems() ):
+            planes= Filter.isIn("plane_id", sorted(planeIds))
+            nextDay= datetime.strftime( datetime.strptime(day, DAY_FORMAT)
+                                        + timedelta(days=1),
+                                        DAY_FORMAT )
+
+            filter= Filter.equal("flight_day", day) & planes
+            sums= ( "SELECT plane_id, SUM(num_flights), SUM(seconds) "
+                    "FROM {0} WHERE {1} GROUP BY plane_id"
+                    .format(ROLLUP_TABLE, filter.expression) )
+
+            before= dict( (planeId, (int(n), int(s)))
+                          for planeId, n, s in self._fetch(sums, filter.params) )
+
+            self._execute( "DELETE FROM {0} WHERE {1}"
+                           .format(ROLLUP_TABLE, filter.expression),
+                           filter.params )
+
+            command, params= self._rollupSelect(
+                                 Filter.all( Filter("departure_time >= %s", day),
+                                             Filter("departure_time < %s",
+                                                    nextDay),
+                                             planes ))
+            self._execute( "INSERT INTO {0} {1}".format(ROLLUP_TABLE, command),
+                           params )
+
+            after= dict( (planeId, (int(n), int(s)))
+                         for planeId, n, s in self._fetch(sums, filter.params) )
+
+            for planeId in sorted( set(before) | set(after) ):
+                n0, s0= before.get(planeId, (0, 0))
+                n1, s1= after.get(planeId, (0, 0))
+
+                if (n0, s0) != (n1, s1):
+                    self._execute( "UPDATE {0} SET num_flights = num_flights "
+                                   "+ %s, seconds = seconds + %s "
+                                   "WHERE plane_id = %s AND month_start > %s"
+                                   .format(CHECKPOINT_TABLE),
+                                   (n1 - n0, s1 - s0, planeId, day) )
+
+        pending.clear()
 
 
     def getDictionary(self, iterable, key='id'):
@@ -283,9 +1583,14 @@ class Database(object):
         return retval
         
         
-    def insert(self, cls, rows, force=False):
+    def insert(self, cls, rows, force=False, chunkSize=None):
         """Insert new values into a table                
         
+        Rows are written in chunks of up to *chunkSize* rows per statement,
+        i.e. a single multi-row ``INSERT IGNORE`` or ``REPLACE`` statement is
+        sent to the server per chunk. Inserted flights are recorded for the
+        rollup table, if it exists (see :meth:`rebuildRollup`).
+        
         Arguments:
              cls (class): Class specifying the table. Must provide a static method
                 :meth:`tableName`, which returns the name of the selected table
@@ -295,63 +1600,127 @@ class Database(object):
                 defined for each element.
             force (bool): If True, existing rows are overwritten. Otherwise they
                are ignored. Defaults to False.
+            chunkSize (int): Maximum number of rows per statement. Defaults to
+               :attr:`chunkSize`.
         """
-        tableInfo= self.getTables()[ cls.tableName() ]
-        commands={True : "REPLACE", False : "INSERT IGNORE"}
-        command= "{0} INTO {1} VALUES {2}".format( commands[force],
-                                                   cls.tableName(),
-                                                   tableInfo.format() )
+        if not chunkSize:
+            chunkSize= self.chunkSize
+
+        tableInfo= self.getTable( cls.tableName() )
+        command= "{0} INTO {1} VALUES ".format( self.backend.insertCommand(force),
+                                                cls.tableName() )
+        statements= dict() # number of rows -> statement
+        
+        data= []
+        nRows= 0
+        
+        rollup= cls is Flight and self.hasRollup()
+        pending= self._rollupPending()
+        replaced= [] # ids of flights, which may be replaced
         
         for row in rows:        
-            self._cursor.execute(command, tableInfo.toTuple(row))
+            data.extend( tableInfo.iterColumns(row) )
+            nRows+= 1
+            
+            if self._identityMap is not None and row.id is not None:
+                self._invalidate(cls, row.id)
+            
+            if rollup:
+                if row.plane_id is not None and row.departure_time:
+                    pending.add( (row.plane_id, str(row.departure_time)[:10]) )
+                
+                if force and row.id is not None:
+                    replaced.append(row.id)
+            
+            if nRows == chunkSize:
+                if replaced:
+                    self._markFlights(replaced)
+                    replaced= []
+                    
+                self._insertChunk(command, tableInfo, nRows, data, statements)
+                data= []
+                nRows= 0
+
+        if nRows:
+            if replaced:
+                self._markFlights(replaced)
+                
+            self._insertChunk(command, tableInfo, nRows, data, statements)
+
+
+    def _insertChunk(self, command, tableInfo, nRows, data, statements):
+        """Send a single multi-row insert statement to the server
+        
+        Arguments:
+            command (str): Statement prefix up to and including ``VALUES``
+            tableInfo (:class:`.db.Table`): Table to insert into
+            nRows (int): Number of rows in *data*
+            data (list): Flat list with the column values of all rows
+            statements (dict): Cache of statements by number of rows
+        """
+        statement= statements.get(nRows)
+        
+        if statement is None:
+            statement= command + tableInfo.format(nRows)
+            statements[nRows]= statement
+        
+        self._execute(statement, data)
          
     
-    def insertUsers(self, users, force=False):
+    def insertUsers(self, users, force=False, chunkSize=None):
         """Insert users.
         
         Shortcut for
         
         .. code-block:: python
         
-           self.insert(cls=User, table=users, force=force)
+           self.insert(cls=User, table=users, force=force, chunkSize=chunkSize)
         
         Arguments:
             users (iterable): List of users to insert
             force (bool): Overwrite existing users. Defaults to False.
+            chunkSize (int): Maximum number of rows per statement. Defaults to
+               :attr:`chunkSize`.
         """
-        self.insert(User, users, force)
+        self.insert(User, users, force, chunkSize)
     
                 
-    def insertFlights(self, flights, force=False):
+    def insertFlights(self, flights, force=False, chunkSize=None):
         """Insert flights.
         
         Shortcut for
         
         .. code-block:: python
         
-           self.insert(cls=Flight, table=flights, force=force)
+           self.insert(cls=Flight, table=flights, force=force,
+                       chunkSize=chunkSize)
         
         Arguments:
             flights (iterable): List of flights to insert
             force (bool): Overwrite existing flights. Defaults to False.
+            chunkSize (int): Maximum number of rows per statement. Defaults to
+               :attr:`chunkSize`.
         """
-        self.insert(Flight, flights, force)
+        self.insert(Flight, flights, force, chunkSize)
 
 
-    def insertPilots(self, pilots, force=False):
+    def insertPilots(self, pilots, force=False, chunkSize=None):
         """Insert pilots.
         
         Shortcut for
         
         .. code-block:: python
         
-           self.insert(cls=Pilot, table=flights, force=force)
+           self.insert(cls=Pilot, table=flights, force=force,
+                       chunkSize=chunkSize)
         
         Arguments:
             pilots (iterable): List of pilots to insert
             force (bool): Overwrite existing pilots. Defaults to False.
+            chunkSize (int): Maximum number of rows per statement. Defaults to
+               :attr:`chunkSize`.
         """
-        self.insert(Pilot, pilots, force)
+        self.insert(Pilot, pilots, force, chunkSize)
 
 
     def orderTable(self, cls):
@@ -381,23 +1750,36 @@ class Database(object):
     def delete(self, cls, filter=None, data=None):
         """Delete records from table                
         
+        Deleted flights are recorded for the rollup table, if it exists (see
+        :meth:`rebuildRollup`).
+        
         Arguments:
             cls (class): Class representing the table from which to delete.
                Must provide a static method tableName, which returns the name of
                the selected table
-            filter (str): Passed verbatim to *SQL*'s ``WHERE`` clause
-               to identify the rows to be deleted. If filter is *None* or the
-               empty string, all rows will be deleted. Defaults to *None*.
+            filter (:class:`.db.Filter`): Filter passed to *SQL*'s ``WHERE``
+               clause to identify the rows to be deleted. Strings are passed
+               verbatim. If filter is *None* or the empty string, all rows will
+               be deleted. Defaults to *None*.
             data:  Data argument passed verbatim to
                `cursor.execute <http://dev.mysql.com/doc/connector-python/en/connector-python-api-mysqlcursor-execute.html>`_.
-               as second argument (*param*). Defaults to *None*.
+               as second argument (*param*), if *filter* is a string. Defaults
+               to *None*.
         """
         command= "DELETE FROM {0}".format( cls.tableName() )
         
+        if isinstance(filter, Filter):
+            data= filter.params or None
+            filter= filter.expression
+        
         if filter:
             command+= " WHERE {0}".format(filter)
         
-        self._cursor.execute(command, data)
+        if cls is Flight and self.hasRollup():
+            self._markRollup(filter, data)
+        
+        self._invalidate(cls)
+        self._execute(command, data)
 
 
     def deleteById(self, cls, ids):
@@ -412,9 +1794,7 @@ class Database(object):
         if not ids:
             return
             
-        filter= "id IN (" + ",".join( len(ids) * ['%s'] ) + ')'
-                
-        self.delete(cls, filter=filter, data=ids)        
+        self.delete(cls, filter=Filter.isIn("id", ids))
 
 
     def deleteFlights(self, ids):
@@ -505,14 +1885,16 @@ class Database(object):
     def update(self, cls, assignment, filter=None):
         """Update value in table
         
-        Uses mysql ``UPDATE`` statement to update values of a table.
+        Uses mysql ``UPDATE`` statement to update values of a table. Updated
+        flights are recorded for the rollup table, if it exists (see
+        :meth:`rebuildRollup`).
         
         Arguments:
             cls (class): Class for which to update the respective table
             assignment (str): Update information in format compatible with MySQL
                ``SET`` clause of ``UPDATE`` statement
-            filter (str): Optional filter string passed verbatim to ``WHERE``
-               statement.
+            filter (:class:`.db.Filter`): Optional filter passed to ``WHERE``
+               statement. Strings are passed verbatim.
 
         Example:
             Assuming *db* is a connected :class:`.db.Database` instance, the
@@ -527,11 +1909,24 @@ class Database(object):
           
         """
         command="UPDATE {0} SET {1}".format(cls.tableName(), assignment)
+        data= None
+        
+        if isinstance(filter, Filter):
+            data= filter.params or None
+            filter= filter.expression
         
         if filter:
             command= " ".join([command, "WHERE", filter])
         
-        self._cursor.execute(command)
+        ids= None
+        if cls is Flight and self.hasRollup():
+            ids= self._markRollup(filter, data)
+        
+        self._invalidate(cls)
+        self._execute(command, data)
+        
+        if ids:
+            self._markFlights(ids)
                 
 
     def updateFlight(self, assignment, filter=None):
@@ -540,18 +1935,21 @@ class Database(object):
         Arguments:
             assignment (str): Update information in format compatible with MySQL
                ``SET`` clause of ``UPDATE`` statement.
-            filter (str): Optional filter string passed verbatim to ``WHERE``
-               statement.
+            filter (:class:`.db.Filter`): Optional filter passed to ``WHERE``
+               statement. Strings are passed verbatim.
         """
-        self.update(assignment, filter)
+        self.update(Flight, assignment, filter)
         
         
     def unique(self, cls, filter):
         """Get unique result of a query
         
+        The query is never streamed, so lookups are possible while a stream is
+        open (see :meth:`iterate`).
+        
         Arguments:
             cls (class): Class to select
-            filter (str): Filter criteria
+            filter (:class:`.db.Filter`): Filter criteria
         
         Return:
             Instance of *cls* matching query, if and only if the query returns
@@ -559,7 +1957,7 @@ class Database(object):
         """        
         retval= None
         
-        for result in self.iterate(cls, filter=filter):
+        for result in self.iterate(cls, filter=filter, stream=False):
             if not retval:
                 retval= result
             else:
@@ -575,6 +1973,9 @@ class Database(object):
     def uniqueById(self, cls, id):
         """Get unique result of a query
         
+        If the identity map is enabled (see :meth:`enableCache`), the query is
+        only sent to the server, if the record is not cached yet.
+        
         Arguments:
             cls (class): Class to select
             id (int): ID of item to select
@@ -585,8 +1986,17 @@ class Database(object):
         """
         if not id:
             return None
-            
-        return self.unique(cls, filter="id={0}".format(id))
+        
+        if self._identityMap is None:
+            return self.unique(cls, filter=Filter.equal("id", id))
+
+        retval= self._identityMap.get(cls.tableName(), id)
+        
+        if retval is None:
+            retval= self.unique(cls, filter=Filter.equal("id", id))
+            self._identityMap.put(cls.tableName(), id, retval)
+        
+        return retval
 
 
     def pilot(self, id):
@@ -641,8 +2051,8 @@ class Database(object):
         Return:
             Matching :class:`db.model.Pilot` instance
         """
-        selection="first_name='{0}' AND last_name='{1}'".format( firstName,
-                                                                 lastName )                 
+        selection= ( Filter.equal("first_name", firstName)
+                   & Filter.equal("last_name", lastName) )
         return self.unique(Pilot, selection)
 
             
@@ -658,7 +2068,8 @@ class Database(object):
         Return:
             Matching :class:`db.model.Airplane` instance
         """
-        return self.unique(Airplane, filter="registration='{0}'".format(registration))        
+        return self.unique( Airplane,
+                            filter=Filter.equal("registration", registration) )
 
         
     def getLaunchMethodByName(self, name, allowShortNames=True):
@@ -675,11 +2086,10 @@ class Database(object):
         Return:
             Matching :class:`db.model.LaunchMethod` instance
         """
-        selection="name='{0}'".format(name)
+        selection= Filter.equal("name", name)
         
         if allowShortNames:
-            selection= "".join([ selection,
-                                 " OR (short_name='{0}')".format(name) ])
+            selection|= Filter.equal("short_name", name)
         
         return self.unique(LaunchMethod, filter=selection)
 
@@ -696,9 +2106,8 @@ class Database(object):
         Return:
             Matching :class:`db.model.LaunchMethod` instance
         """
-        selection= "".join([ "(type='airtow') AND (towplane_registration = '",
-                             registration,
-                             "')" ])
+        selection= ( Filter.equal("type", "airtow")
+                   & Filter.equal("towplane_registration", registration) )
                 
         return self.unique(LaunchMethod, filter=selection)
 
@@ -714,22 +2123,140 @@ class Database(object):
             *flights*.
         """
         for flight in flights:
-            rec= Record(flight= flight,
-                        plane= self.plane(flight.plane_id),
-                        pilot= self.pilot(flight.pilot_id),
-                        copilot= self.pilot(flight.copilot_id),
-                        towpilot= self.pilot(flight.towpilot_id),
-                        launch_method= self.launchMethod(flight.launch_method_id) )
-
-            if rec.launch_method.type == 'airtow':
-                #towplane_id is never set on flight
-                #set towplane for record
-                towplane= rec.launch_method.towplane_registration
-                if towplane:
-                    rec.towplane= self.getPlaneByRegistration(towplane)
-                    rec.towplane_id= rec.towplane.id
-            
-            yield rec
+            yield self._makeRecord( flight,
+                                    self.pilot,
+                                    self.plane,
+                                    self.launchMethod,
+                                    self.getPlaneByRegistration )
+
+
+    def iterRecords(self, flights, chunkSize=None):
+        """Convert flights into full records in chunks
+        
+        Yields the same records as :meth:`makeRecords`, but instead of up to
+        five queries per flight, *flights* is consumed in chunks and the
+        pilots, planes and launch methods of a chunk, which have not been read
+        before, are selected with one query per table. Memory consumption
+        depends on the chunk size and the number of distinct pilots and planes
+        only, i.e. *flights* may be a stream.
+        
+        Arguments:
+            flights (iterable): Iterable of :class:`.db.model.Flight` objects
+            chunkSize (int): Number of flights per chunk. Defaults to
+               :attr:`fetchSize`.
+        
+        Return:
+            Generator yielding a :class:`.db.Record` instance per flight in
+            *flights*. Raises a :class:`KeyError` if a referenced pilot, plane
+            or launch method does not exist.
+        """
+        if not chunkSize:
+            chunkSize= self.fetchSize
+        
+        pilots= dict()
+        planes= dict()
+        launchMethods= dict()
+        towplanes= dict() # registration -> plane
+        
+        def lookup(cls, cache):
+            def get(id):
+                if not id:
+                    return None
+                
+                if id not in cache:
+                    raise KeyError( "No {0} with id {1}"
+                                    .format(cls.tableName(), id) )
+                return cache[id]
+            
+            return get
+        
+        def towplane(registration):
+            if registration not in towplanes:
+                towplanes[registration]= self.getPlaneByRegistration(
+                                                                 registration)
+            return towplanes[registration]
+        
+        getPilot= lookup(Pilot, pilots)
+        getPlane= lookup(Airplane, planes)
+        getLaunchMethod= lookup(LaunchMethod, launchMethods)
+        
+        flights= iter(flights)
+        chunk= list( islice(flights, chunkSize) )
+        
+        while chunk:
+            self._readById( Pilot, pilots,
+                            ( id for f in chunk for id in ( f.pilot_id,
+                                                            f.copilot_id,
+                                                            f.towpilot_id ) ))
+            self._readById( Airplane, planes, (f.plane_id for f in chunk) )
+            self._readById( LaunchMethod, launchMethods,
+                            (f.launch_method_id for f in chunk) )
+            
+            for flight in chunk:
+                yield self._makeRecord( flight,
+                                        getPilot,
+                                        getPlane,
+                                        getLaunchMethod,
+                                        towplane )
+            
+            chunk= list( islice(flights, chunkSize) )
+
+
+    def _readById(self, cls, cache, ids, chunkSize=500):
+        """Select records by id, which are not cached yet
+        
+        The records are read without streaming, so an open stream is not
+        disturbed.
+        
+        Arguments:
+            cls (class): Class specifying the table
+            cache (dict): Records by id. Selected records are added.
+            ids (iterable): IDs to select. Empty IDs are ignored.
+            chunkSize (int): Maximum number of IDs per query. Defaults to 500.
+        """
+        ids= sorted( set( id for id in ids if id and id not in cache ) )
+        
+        for i in xrange(0, len(ids), chunkSize):
+            for row in self.iterate( cls,
+                                     filter= Filter.isIn("id",
+                                                         ids[i:i + chunkSize]),
+                                     stream= False ):
+                cache[row.id]= row
+
+
+    @staticmethod
+    def _makeRecord(flight, pilot, plane, launchMethod, towplane):
+        """Assemble the record of a flight
+        
+        Arguments:
+            flight (:class:`.db.model.Flight`): Flight
+            pilot (callable): Function returning the pilot with a given id
+            plane (callable): Function returning the plane with a given id
+            launchMethod (callable): Function returning the launch method with
+               a given id
+            towplane (callable): Function returning the plane with a given
+               registration
+        
+        Return:
+            :class:`.db.Record` instance
+        """
+        rec= Record(flight= flight,
+                    plane= plane(flight.plane_id),
+                    pilot= pilot(flight.pilot_id),
+                    copilot= pilot(flight.copilot_id),
+                    towpilot= pilot(flight.towpilot_id),
+                    launch_method= launchMethod(flight.launch_method_id) )
+
+        if rec.launch_method.type == 'airtow':
+            #towplane_id is never set on flight
+            #set towplane for record
+            registration= rec.launch_method.towplane_registration
+            if registration:
+                rec.towplane= towplane(registration)
+                rec.towplane_id= rec.towplane.id
+        
+        return rec
+
 
     @staticmethod    
     def copy(src, dest, ignoreID=True):
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sys import maxint
+
+
+def _truncate(time):
+    """Truncate time to minutes
+
+    The *SQL* overlap filter (see :meth:`~.db.Database.overlapFilter`)
+    compares with times formatted as :data:`~.db.model.flight.TIME_FORMAT`,
+    i.e. seconds are dropped.
+
+    Arguments:
+        time (:class:`datetime`): Time to truncate
+
+    Return:
+        :class:`datetime` instance
+    """
+    return time.replace(second=0, microsecond=0)
+
+
+def _flightId(id):
+    """Convert a flight id to integer
+
+    Flights read from csv files carry their id as string. The database
+    compares ids numerically, so does the index.
+
+    Arguments:
+        id: Flight id as integer or string
+
+    Return:
+        Integer id or *None*, if *id* is empty
+    """
+    if id is None or id == "":
+        return None
+
+    return int(id)
+
+
+
+class _Intervals(object):
+    """Flights of a single pilot or plane sorted by departure time
+    """
+
+    def __init__(self):
+        self.items= [] # sorted list of (departure_time, id)
+        self.maxDuration= timedelta(0)
+
+
+    def add(self, flight, id):
+        insort(self.items, (flight.departure_time, id))
+        self.maxDuration= max(self.maxDuration, flight.duration())
+
+
+    def remove(self, flight, id):
+        key= (flight.departure_time, id)
+        i= bisect_left(self.items, key)
+
+        if i < len(self.items) and self.items[i] == key:
+            del self.items[i]
+
+
+    def iterIds(self, begin, end):
+        """Iterate over ids of all flights, which may overlap a time span
+
+        Arguments:
+            begin (:class:`datetime`): Begin of time span
+            end (:class:`datetime`): End of time span
+
+        Yield:
+            IDs of all flights departing between *begin* minus the maximum
+            flight duration and *end*
+        """
+        lo= 0
+        if begin > datetime.min + self.maxDuration:
+            lo= bisect_left(self.items, (begin - self.maxDuration,))
+
+        hi= bisect_right(self.items, (end, maxint))
+
+        for i in xrange(lo, hi):
+            yield self.items[i][1]
+
+
+
+class FlightIndex(object):
+    """In-memory interval index of local flights by pilot and plane
+
+    Answers the same question as :meth:`~.db.Database.iterSimilarFlights` for
+    the flights stored in the index, i.e. the local flights of the same pilot,
+    copilot or plane overlapping with a given flight. Lookups take
+    *O(log n + k)* time, where *k* is the number of flights of the respective
+    pilots and plane departing within the maximum flight duration of each
+    other.
+
+    The index is meant to hold all flights of the database within a time
+    window *[begin, end]*. Lookups are only valid for flights covered by that
+    window (see :meth:`covers`). The owner is responsible for keeping the
+    index in sync with the database by calling :meth:`add` and
+    :meth:`remove`.
+
+    Arguments:
+        flights (iterable): Initial :class:`~.db.model.Flight` instances.
+           Defaults to an empty list.
+        begin (:class:`datetime`): Begin of time window. If *None*, the
+           window is unbounded. Defaults to *None*.
+        end (:class:`datetime`): End of time window. If *None*, the window is
+           unbounded. Defaults to *None*.
+    """
+
+    def __init__(self, flights=(), begin=None, end=None):
+        """Create new flight index
+        """
+        self.begin= begin
+        self.end= end
+        self._flights= dict() # id -> flight
+        self._persons= defaultdict(_Intervals) # pilot or copilot id
+        self._planes= defaultdict(_Intervals) # plane id
+
+        for flight in flights:
+            self.add(flight)
+
+
+    def __len__(self):
+        """Get number of indexed flights
+
+        Return:
+            Number of flights stored in the index
+        """
+        return len(self._flights)
+
+
+    def __contains__(self, id):
+        """Check if a flight is indexed
+
+        Arguments:
+            id (int): Flight id
+
+        Return:
+            ``True`` if and only if a flight with the given id is indexed
+        """
+        return _flightId(id) in self._flights
+
+
+    def _lists(self, flight):
+        """Get all interval lists a flight belongs to
+
+        Arguments:
+            flight (:class:`~.db.model.Flight`): Flight
+
+        Return:
+            List of :class:`_Intervals` instances
+        """
+        retval= [ self._persons[id] for id in self._personIds(flight) ]
+
+        if flight.plane_id is not None:
+            retval.append( self._planes[flight.plane_id] )
+
+        return retval
+
+
+    @staticmethod
+    def _personIds(flight):
+        """Get the ids of pilot and copilot of a flight
+
+        Like the SQL query, an id of 0 is treated as missing person.
+
+        Arguments:
+            flight (:class:`~.db.model.Flight`): Flight
+
+        Return:
+            Set of the ids of pilot and copilot, which are set
+        """
+        return set( id for id in (flight.pilot_id, flight.copilot_id) if id )
+
+
+    def covers(self, flight):
+        """Check if the index holds all flights overlapping a flight
+
+        Arguments:
+            flight (:class:`~.db.model.Flight`): Flight to check
+
+        Return:
+            ``True`` if and only if the time span of *flight* lies within the
+            time window of the index
+        """
+        if flight.landing_time is None:
+            # The SQL query does not match anything in this case
+            return True
+
+        if flight.departure_time is None:
+            return self.begin is None
+
+        return ( (self.begin is None
+                  or self.begin <= _truncate(flight.departure_time))
+                 and (self.end is None
+                  or _truncate(flight.landing_time) <= self.end) )
+
+
+    def add(self, flight):
+        """Add or replace a flight
+
+        Flights, which are not local or lack departure time, landing time or
+        id are never matched by a lookup and are not stored. An indexed flight
+        with the same id is replaced. String ids, e.g. read from a csv file,
+        are converted to integer.
+
+        Arguments:
+            flight (:class:`~.db.model.Flight`): Flight to add
+        """
+        id= _flightId(flight.id)
+        self.remove(id)
+
+        if ( id is None
+             or flight.mode != "local"
+             or flight.departure_time is None
+             or flight.landing_time is None ):
+            return
+
+        self._flights[id]= flight
+
+        for intervals in self._lists(flight):
+            intervals.add(flight, id)
+
+
+    def remove(self, id):
+        """Remove a flight
+
+        Arguments:
+            id (int): ID of flight to remove. Unknown ids are ignored.
+        """
+        id= _flightId(id)
+        flight= self._flights.pop(id, None)
+
+        if flight is None:
+            return
+
+        for intervals in self._lists(flight):
+            intervals.remove(flight, id)
+
+
+    def similarFlights(self, flight, minId=0):
+        """Get all indexed flights similar to a given flight
+
+        See :meth:`.db.Database.iterSimilarFlights` for the definition of
+        similarity.
+
+        Arguments:
+            flight (:class:`~.db.model.Flight`): Flight for which to get
+               similar flights
+            minId (int): Only flights with an id larger than *minId* are
+               returned. Strings are converted to integer. Defaults to 0.
+
+        Return:
+            List of similar :class:`~.db.model.Flight` instances sorted by id
+        """
+        if flight.landing_time is None:
+            return []
+
+        minId= _flightId(minId) or 0
+        end= _truncate(flight.landing_time)
+
+        if flight.departure_time is None:
+            begin= datetime.min
+        else:
+            begin= _truncate(flight.departure_time)
+
+        lists= [ self._persons[id] for id in self._personIds(flight)
+                                   if id in self._persons ]
+
+        if flight.plane_id in self._planes:
+            lists.append( self._planes[flight.plane_id] )
+
+        ids= set()
+        for intervals in lists:
+            ids.update( intervals.iterIds(begin, end) )
+
+        retval= []
+        for id in sorted(ids):
+            other= self._flights[id]
+
+            if ( id > minId
+                 and other.landing_time >= begin
+                 and other.departure_time <= end ):
+                retval.append(other)
+
+        return retval
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from collections import OrderedDict
+
+
+class IdentityMap(object):
+    """Bounded cache of database records keyed by table name and id
+    
+    Entries are evicted in least recently used order once more than *maxSize*
+    records are stored. All methods are thread-safe.
+    
+    Arguments:
+        maxSize (int): Maximum number of records kept in the map. Defaults to
+           1024.
+    """
+    
+    def __init__(self, maxSize=1024):
+        """Create new identity map
+        """
+        self.maxSize= maxSize
+        self.hits= 0   #: Number of successful lookups
+        self.misses= 0 #: Number of failed lookups
+        self._items= OrderedDict()
+        self._lock= threading.Lock()
+        
+        
+    def __len__(self):
+        """Get number of cached records
+        
+        Return:
+            Number of records currently stored in the map
+        """
+        return len(self._items)
+        
+        
+    def __contains__(self, key):
+        """Check if a record is cached without touching the statistics
+        
+        Arguments:
+            key (tuple): Tuple ``(tableName, id)``
+        
+        Return:
+            ``True`` if and only if a record is stored for *key*
+        """
+        return key in self._items
+
+
+    def get(self, tableName, id):
+        """Get cached record
+        
+        Updates :attr:`hits` and :attr:`misses` and marks the record as most
+        recently used.
+        
+        Arguments:
+            tableName (str): Name of table
+            id (int): ID of record
+        
+        Return:
+            Cached record or ``None`` if no such record is cached
+        """
+        key= (tableName, id)
+        
+        with self._lock:
+            try:
+                item= self._items.pop(key)
+            except KeyError:
+                self.misses+= 1
+                return None
+                
+            self._items[key]= item
+            self.hits+= 1
+            return item
+
+
+    def put(self, tableName, id, item):
+        """Add record to the map
+        
+        Evicts the least recently used records, if the map is full.
+        
+        Arguments:
+            tableName (str): Name of table
+            id (int): ID of record
+            item (object): Record to store
+        """
+        key= (tableName, id)
+        
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key]= item
+            
+            while len(self._items) > self.maxSize:
+                self._items.popitem(last=False)
+
+
+    def invalidate(self, tableName, id=None):
+        """Remove records from the map
+        
+        Arguments:
+            tableName (str): Name of table
+            id (int): ID of record to remove. If *None*, all records of table
+               *tableName* are removed. Defaults to *None*.
+        """
+        with self._lock:
+            if id is not None:
+                self._items.pop( (tableName, id), None)
+                return
+                
+            for key in [k for k in self._items if k[0] == tableName]:
+                del self._items[key]
+            
+            
+    def clear(self):
+        """Remove all records from the map
+        
+        The statistics counters are not reset.
+        """
+        with self._lock:
+            self._items.clear()
+
+
+    def hitRate(self):
+        """Get fraction of successful lookups
+        
+        Return:
+            Ratio of :attr:`hits` to the total number of lookups or ``0.`` if
+            no lookups were made
+        """
+        n= self.hits + self.misses
+        
+        if not n:
+            return 0.
+            
+        return float(self.hits) / n
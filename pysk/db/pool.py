@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+
+import threading
+from time import time
+from contextlib import contextmanager
+
+
+class ConnectionPool(object):
+    """Thread-safe pool of database connections
+    
+    Connections are created on demand by *factory* up to *maxSize* connections.
+    Idle connections are checked with *healthCheck* before they are handed out,
+    if they have not been used for more than *checkInterval* seconds. Broken
+    connections are discarded and replaced by new ones.
+    
+    Arguments:
+        factory (callable): Function without arguments returning a new
+           connection.
+        minSize (int): Number of connections opened immediately. Defaults to 1.
+        maxSize (int): Maximum number of open connections. Defaults to 4.
+        timeout (float): Maximum time in seconds to wait for a free connection.
+           If *None*, callers wait forever. Defaults to *None*.
+        healthCheck (callable): Function called with an idle connection, which
+           raises an exception if the connection is unusable. Defaults to
+           calling the connection's ``ping`` method.
+        checkInterval (float): Idle time in seconds after which a connection is
+           checked before reuse. Defaults to 30.
+    """
+    
+    def __init__(self, factory,
+                       minSize=1,
+                       maxSize=4,
+                       timeout=None,
+                       healthCheck=None,
+                       checkInterval=30.):
+        """Create new pool
+        """
+        if maxSize < 1 or minSize > maxSize:
+            raise ValueError("Invalid pool size {0}..{1}"
+                             .format(minSize, maxSize) )
+            
+        self.minSize= minSize
+        self.maxSize= maxSize
+        self.timeout= timeout
+        self.checkInterval= checkInterval
+        self._factory= factory
+        self._healthCheck= healthCheck or (lambda conn: conn.ping())
+        self._idle= [] # list of (connection, time of release)
+        self._size= 0  # number of open connections
+        self._closed= False
+        self._cond= threading.Condition()
+
+        for i in xrange(minSize):
+            self._idle.append( (self._factory(), time()) )
+            self._size+= 1
+        
+
+    def __len__(self):
+        """Get number of open connections
+        
+        Return:
+            Number of connections currently opened by this pool
+        """
+        return self._size
+
+
+    def acquire(self):
+        """Check out a connection
+        
+        Blocks until a connection becomes available. Raises a
+        :class:`RuntimeError`, if no connection is available within
+        :attr:`timeout` seconds or if the pool has been closed.
+        
+        Return:
+            Connection, which has to be returned by :meth:`release`
+        """
+        deadline= None
+        
+        if self.timeout is not None:
+            deadline= time() + self.timeout
+        
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed.")
+                    
+                if self._idle:
+                    conn, released= self._idle.pop()
+                    break
+                
+                if self._size < self.maxSize:
+                    self._size+= 1
+                    conn, released= None, None
+                    break
+
+                if deadline is None:
+                    self._cond.wait()
+                    continue
+                    
+                remaining= deadline - time()
+                
+                if remaining <= 0:
+                    raise RuntimeError("No database connection available "
+                                       "within {0} s.".format(self.timeout) )
+                self._cond.wait(remaining)
+        
+        if conn is None:
+            return self._newConnection()
+            
+        if time() - released > self.checkInterval:
+            try:
+                self._healthCheck(conn)
+            except Exception:
+                self._close(conn)
+                return self._newConnection()
+        
+        return conn
+
+
+    def release(self, conn, discard=False):
+        """Return a connection to the pool
+        
+        Arguments:
+            conn: Connection obtained by :meth:`acquire`
+            discard (bool): If ``True``, the connection is closed instead of
+               being reused, e.g. after an error. Defaults to ``False``.
+        """
+        if discard or self._closed:
+            self._close(conn)
+            
+            with self._cond:
+                self._size-= 1
+                self._cond.notify()
+            return
+
+        with self._cond:
+            self._idle.append( (conn, time()) )
+            self._cond.notify()
+
+
+    @contextmanager
+    def connection(self):
+        """Context manager checking out a connection
+        
+        The connection is discarded, if an exception is raised in the managed
+        block.
+        
+        Yield:
+            Connection
+        """
+        conn= self.acquire()
+        
+        try:
+            yield conn
+        except:
+            self.release(conn, discard=True)
+            raise
+        
+        self.release(conn)
+        
+        
+    def close(self):
+        """Close all idle connections and refuse further requests
+        
+        Connections still checked out are closed upon release.
+        """
+        with self._cond:
+            self._closed= True
+            idle= self._idle
+            self._idle= []
+            self._size-= len(idle)
+            self._cond.notify_all()
+            
+        for conn, released in idle:
+            self._close(conn)
+
+
+    def _newConnection(self):
+        """Create a connection for a reserved slot
+        
+        Return:
+            New connection
+        """
+        try:
+            return self._factory()
+        except:
+            with self._cond:
+                self._size-= 1
+                self._cond.notify()
+            raise
+
+
+    @staticmethod
+    def _close(conn):
+        """Close a connection ignoring errors
+        
+        Arguments:
+            conn: Connection to close
+        """
+        try:
+            conn.close()
+        except Exception:
+            pass
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+
+
+class Filter(object):
+    """Parameterised filter expression for *SQL* ``WHERE`` clauses
+    
+    The expression contains a ``%s`` placeholder for each parameter. The
+    parameters are passed separately to the database driver, which takes care
+    of quoting. Literal percent signs in the expression have to be written as
+    ``%%``, if parameters are present.
+    
+    Filters can be combined with ``&`` (``AND``) and ``|`` (``OR``).
+    
+    Arguments:
+        expression (str): *SQL* expression with placeholders
+        params: One value per placeholder in *expression*
+        
+    Example:
+        .. code-block:: python
+        
+           f= Filter.equal("plane_id", 3) & Filter("departure_time >= %s", t0)
+           db.iterFlights(filter=f)
+    """
+
+    def __init__(self, expression, *params):
+        """Create new filter
+        """
+        self.expression= expression
+        self.params= params
+        
+        
+    def __and__(self, other):
+        """Combine two filters with ``AND``
+        
+        Arguments:
+            other (:class:`~.db.Filter`): Other filter. If ``None``, *self* is
+               returned.
+        
+        Return:
+            Combined :class:`~.db.Filter` instance
+        """
+        return self._combine("AND", other)
+
+
+    def __or__(self, other):
+        """Combine two filters with ``OR``
+        
+        Arguments:
+            other (:class:`~.db.Filter`): Other filter. If ``None``, *self* is
+               returned.
+        
+        Return:
+            Combined :class:`~.db.Filter` instance
+        """
+        return self._combine("OR", other)
+
+
+    def __str__(self):
+        """Convert filter to string with parameters inserted for display
+        
+        The result is intended for messages only and must not be sent to the
+        server.
+        
+        Return:
+            Expression with each placeholder replaced by the respective
+            parameter
+        """
+        if not self.params:
+            return self.expression
+            
+        return self.expression % tuple( repr(p) for p in self.params )
+        
+        
+    def __repr__(self):
+        return ("Startkladde Python Interface::Filter('{0}')"
+               .format(self.__str__()))
+
+
+    def _combine(self, operator, other):
+        """Combine two filters
+        
+        Arguments:
+            operator (str): *SQL* operator used to combine both expressions
+            other (:class:`~.db.Filter`): Other filter or ``None``.
+        
+        Return:
+            Combined :class:`~.db.Filter` instance
+        """
+        if other is None:
+            return self
+
+        return Filter( "({0}) {1} ({2})".format( self.expression,
+                                                 operator,
+                                                 other.expression ),
+                       *(self.params + other.params) )
+
+
+    @staticmethod
+    def equal(column, value):
+        """Create filter matching rows where a column equals a value
+        
+        Arguments:
+            column (str): Column name
+            value: Value to match
+        
+        Return:
+            :class:`~.db.Filter` instance
+        """
+        return Filter("{0}=%s".format(column), value)
+
+
+    @staticmethod
+    def isIn(column, values):
+        """Create filter matching rows where a column is contained in a list
+        
+        Arguments:
+            column (str): Column name
+            values (iterable): Values to match. Must not be empty.
+        
+        Return:
+            :class:`~.db.Filter` instance
+        """
+        values= tuple(values)
+        
+        return Filter( "{0} IN ({1})".format( column,
+                                              ",".join( len(values) * ["%s"] )),
+                       *values )
+
+
+    @staticmethod
+    def all(*filters):
+        """Combine an arbitrary number of filters with ``AND``
+        
+        Arguments:
+            filters: :class:`~.db.Filter` instances. ``None`` is ignored.
+        
+        Return:
+            Combined :class:`~.db.Filter` instance or ``None`` if no filters
+            are passed.
+        """
+        return Filter._reduce("AND", filters)
+
+
+    @staticmethod
+    def any(*filters):
+        """Combine an arbitrary number of filters with ``OR``
+        
+        Arguments:
+            filters: :class:`~.db.Filter` instances. ``None`` is ignored.
+        
+        Return:
+            Combined :class:`~.db.Filter` instance or ``None`` if no filters
+            are passed.
+        """
+        return Filter._reduce("OR", filters)
+
+
+    @staticmethod
+    def _reduce(operator, filters):
+        """Combine a sequence of filters with the same operator
+        
+        Arguments:
+            operator (str): *SQL* operator
+            filters (iterable): Filters or ``None``
+        
+        Return:
+            Combined :class:`~.db.Filter` instance or ``None``
+        """
+        filters= [f for f in filters if f is not None]
+        
+        if not filters:
+            return None
+        
+        if len(filters) == 1:
+            return filters[0]
+        
+        params= ()
+        for f in filters:
+            params+= f.params
+            
+        return Filter( " {0} ".format(operator).join( "({0})".format(f.expression)
+                                                      for f in filters ),
+                       *params )
+
+
+    @staticmethod
+    def fromString(filter):
+        """Convert legacy filter strings to filters
+        
+        Arguments:
+            filter: Filter string, :class:`~.db.Filter` instance or ``None``.
+               Strings are used verbatim as expression without parameters.
+        
+        Return:
+            :class:`~.db.Filter` instance or ``None``
+        """
+        if filter is None or isinstance(filter, Filter):
+            return filter
+            
+        if not filter:
+            return None
+        
+        return Filter(filter)
+
+
+
+class Query(object):
+    """Parameterised ``SELECT`` statement on a single table
+    
+    Statement templates of parameterised queries are cached by table, columns,
+    filter expression and order, such that repeated queries differing only by
+    their parameters reuse the same statement text. Queries with legacy filter
+    strings are not cached, since these usually contain literal values.
+    
+    Arguments:
+        cls (class): Class specifying the table. Must provide a static method
+           :meth:`tableName`.
+        filter (:class:`~.db.Filter`): Filter or legacy filter string. Defaults
+           to ``None``.
+        order (str): Passed verbatim to ``ORDER BY``. Defaults to ``None``.
+        columns (iterable): Names of selected columns. If ``None`` all columns
+           are selected. Defaults to ``None``.
+    """
+    
+    #: Cache of statement templates
+    templates= dict()
+    
+    #: Maximum number of cached templates
+    maxTemplates= 256
+
+    def __init__(self, cls, filter=None, order=None, columns=None):
+        """Create new query
+        """
+        self.tableName= cls.tableName()
+        self.filter= Filter.fromString(filter)
+        self.order= order
+        self.columns= tuple(columns) if columns else None
+
+
+    def statement(self):
+        """Get statement text
+        
+        Return:
+            *SQL* statement with placeholders
+        """
+        if self.filter is None:
+            expression= None
+        elif self.filter.params:
+            expression= self.filter.expression
+        else:
+            return self._build(self.filter.expression)
+            
+        key= (self.tableName, self.columns, expression, self.order)
+        
+        retval= Query.templates.get(key)
+        
+        if retval is None:
+            if len(Query.templates) >= Query.maxTemplates:
+                Query.templates.clear()
+                
+            retval= self._build(expression)
+            Query.templates[key]= retval
+            
+        return retval
+
+
+    def params(self):
+        """Get statement parameters
+        
+        Return:
+            Tuple of parameters or ``None`` if the statement has no parameters
+        """
+        if self.filter is None or not self.filter.params:
+            return None
+            
+        return self.filter.params
+
+
+    def _build(self, expression):
+        """Build statement text
+        
+        Arguments:
+            expression (str): Filter expression or ``None``
+        
+        Return:
+            *SQL* statement with placeholders
+        """
+        parts= [ "SELECT",
+                 ",".join(self.columns) if self.columns else "*",
+                 "FROM",
+                 self.tableName ]
+        
+        if expression:
+            parts.extend(["WHERE", expression])
+        
+        if self.order:
+            parts.extend(["ORDER BY", self.order])
+        
+        return " ".join(parts)
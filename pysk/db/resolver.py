@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+from collections import defaultdict
+
+from pysk.db.model import Airplane, LaunchMethod, Pilot
+
+
+def _key(*values):
+    """Normalise lookup key
+
+    Strings are compared case insensitively and without trailing blanks,
+    similar to the default collation of the MySQL server.
+
+    Arguments:
+        values: Key fields
+
+    Return:
+        Tuple of normalised fields
+    """
+    return tuple( v.rstrip().lower() if isinstance(v, basestring) else v
+                  for v in values )
+
+
+def _add(index, key, item):
+    """Add item to index
+
+    Keys containing ``NULL`` fields are skipped, since they never match in a
+    *SQL* comparison.
+
+    Arguments:
+        index (dict): Index mapping keys to lists of items
+        key (tuple): Normalised key
+        item: Item to add
+    """
+    if None not in key:
+        index[key].append(item)
+
+
+
+class Resolver(object):
+    """In-memory lookup of pilots, planes and launch methods
+
+    Replaces the lookups :meth:`~.db.Database.getPilotByName`,
+    :meth:`~.db.Database.getPlaneByRegistration`,
+    :meth:`~.db.Database.getLaunchMethodByName` and
+    :meth:`~.db.Database.getLaunchMethodByTowplane` by hash indexes. Each table
+    is read once on first use, such that resolving the names of an imported
+    record does not cost any query.
+
+    As the database methods, all lookups raise a :class:`KeyError` if either
+    no or more than one item matches. The returned instances are shared
+    between lookups and must not be modified. Call :meth:`clear` after the
+    tables have been changed.
+
+    Arguments:
+        db (:class:`~.db.Database`): Database to read the tables from
+    """
+
+    def __init__(self, db):
+        """Create new resolver
+        """
+        self.db= db
+        self._indexes= dict() # index name -> key -> list of items
+
+
+    def clear(self):
+        """Drop all indexes
+
+        The tables are read again on next use.
+        """
+        self._indexes.clear()
+
+
+    def _index(self, name):
+        """Get index by name, loading the respective table if necessary
+
+        Arguments:
+            name (str): Name of index
+
+        Return:
+            Dictionary mapping keys to lists of items
+        """
+        index= self._indexes.get(name)
+
+        if index is None:
+            self._load(name.split(".")[0])
+            index= self._indexes[name]
+
+        return index
+
+
+    def _load(self, tableName):
+        """Read table and build all of its indexes
+
+        Arguments:
+            tableName (str): Name of table
+        """
+        if tableName == Pilot.tableName():
+            names= defaultdict(list)
+
+            for pilot in self.db.iterPilots():
+                _add(names, _key(pilot.last_name, pilot.first_name), pilot)
+
+            self._indexes["people.name"]= names
+        elif tableName == Airplane.tableName():
+            registrations= defaultdict(list)
+
+            for plane in self.db.iterPlanes():
+                _add(registrations, _key(plane.registration), plane)
+
+            self._indexes["planes.registration"]= registrations
+        else:
+            names= defaultdict(list)
+            shortNames= defaultdict(list)
+            towplanes= defaultdict(list)
+
+            for method in self.db.iterate(LaunchMethod):
+                _add(names, _key(method.name), method)
+                _add(shortNames, _key(method.short_name), method)
+
+                if method.type == "airtow":
+                    _add( towplanes, _key(method.towplane_registration),
+                          method )
+
+            self._indexes["launch_methods.name"]= names
+            self._indexes["launch_methods.short_name"]= shortNames
+            self._indexes["launch_methods.towplane_registration"]= towplanes
+
+
+    @staticmethod
+    def _unique(items, description):
+        """Get the single element of a list of matches
+
+        Arguments:
+            items (list): Matching items
+            description (str): Description of the lookup used in error message
+
+        Return:
+            Single element of *items*. A :class:`KeyError` is raised, if
+            *items* does not contain exactly one element.
+        """
+        if not items:
+            raise KeyError("Found no result matching {0}".format(description))
+
+        if len(items) > 1:
+            raise KeyError("Found more than one result matching {0}"
+                           .format(description))
+
+        return items[0]
+
+
+    def getPilotByName(self, firstName, lastName):
+        """Get pilot by name
+
+        Arguments:
+            firstName (str): First name of pilot
+            lastName (str): Last name of pilot
+
+        Return:
+            Matching :class:`~.db.model.Pilot` instance
+        """
+        items= self._index("people.name").get( _key(lastName, firstName) )
+        return self._unique( items,
+                             "name '{0}, {1}'".format(lastName, firstName) )
+
+
+    def getPlaneByRegistration(self, registration):
+        """Get aircraft by registration
+
+        Arguments:
+            registration (str): Registration ID of aircraft
+
+        Return:
+            Matching :class:`~.db.model.Airplane` instance
+        """
+        items= self._index("planes.registration").get( _key(registration) )
+        return self._unique( items,
+                             "registration '{0}'".format(registration) )
+
+
+    def getLaunchMethodByName(self, name, allowShortNames=True):
+        """Get launch method by name
+
+        Arguments:
+            name (str): Name of launch method to find
+            allowShortNames (bool): If True, name and short name of launch
+               method are searched. Otherwise only the long name is matched.
+
+        Return:
+            Matching :class:`~.db.model.LaunchMethod` instance
+        """
+        key= _key(name)
+        items= self._index("launch_methods.name").get(key, [])
+
+        if allowShortNames:
+            items= items + [ m for m in
+                             self._index("launch_methods.short_name").get(key, [])
+                             if m not in items ]
+
+        return self._unique(items, "name '{0}'".format(name))
+
+
+    def getLaunchMethodByTowplane(self, registration):
+        """Get launch method by registration of towplane
+
+        Like :meth:`.Database.getLaunchMethodByTowplane`, only launch methods
+        of type ``airtow`` are considered.
+
+        Arguments:
+            registration (str): Towplane registration ID
+
+        Return:
+            Matching :class:`~.db.model.LaunchMethod` instance
+        """
+        items= self._index("launch_methods.towplane_registration").get(
+                                                            _key(registration) )
+        return self._unique( items,
+                             "towplane '{0}'".format(registration) )
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+
+from sys import stderr, maxint
+from collections import defaultdict
+from copy import copy
+
+from .conflict_handler import ConflictHandler, CONFLICT_COLUMNS, NONE
+from .conflict_handler import INTERACTIVE, IGNORE_ALL_CONFLICTS, REJECT_ON_CONFLICT
+from .flight_index import FlightIndex
+
+
+class StagedConflictHandler(ConflictHandler):
+    """Conflict handler resolving the conflicts of many candidates at once
+
+    Non-interactive alternative to :class:`~.db.ConflictHandler` for large
+    imports. Candidates are collected until the next checkpoint. Then all
+    pending flights are loaded into a staging table (see
+    :meth:`~.db.Database.stageFlights`), similar flights in the database are
+    found by a few joins (see :meth:`~.db.Database.iterStagedConflicts`) and
+    the result is written by bulk deletes and inserts. Conflicts between the
+    pending candidates themselves are looked up in a
+    :class:`~.db.FlightIndex`.
+
+    The modes :data:`~.db.conflict_handler.IGNORE_ALL_CONFLICTS` and
+    :data:`~.db.conflict_handler.REJECT_ON_CONFLICT` keep and delete the same
+    flights as :class:`~.db.ConflictHandler`, i.e. as if the candidates were
+    processed one by one in the given order, with two exceptions: Conflicts
+    between pending candidates are detected by comparing times to the minute
+    as done by MySQL, and candidates without id are assumed to receive an id
+    larger than the ids of all other candidates. The latter holds, if the ids
+    of imported flights stem from the same database.
+
+    Since nothing is written before a checkpoint, a commit interval should be
+    given for large imports. If no interval is given, all candidates are
+    written at once by ``checkpoint(force=True)``.
+
+    Arguments:
+        db (:class:`~.db.Database`): Database
+        mode (int): Conflict handling mode. Defaults to
+           :data:`~.db.conflict_handler.IGNORE_ALL_CONFLICTS`.
+        verbose (int): Verbosity level. Defaults to 1.
+        logFunctor (callable): Log function. Defaults to ``stderr.write``.
+        commitInterval (int): Number of records resolved and committed at
+           once. If *None* or 0, all records are kept until the final
+           checkpoint. Defaults to *None*.
+        commitTime (float): Maximum time in seconds between checkpoints. If
+           *None* or 0, the time is not limited. Defaults to *None*.
+        checkpointFunctor (callable): Function called with the handler after
+           each commit. Defaults to *None*.
+    """
+
+    def __init__(self, db=None,
+                       mode=IGNORE_ALL_CONFLICTS,
+                       verbose=1,
+                       logFunctor=stderr.write,
+                       commitInterval=None,
+                       commitTime=None,
+                       checkpointFunctor=None):
+
+        if mode == INTERACTIVE:
+            raise ValueError("Staged conflict handling is not available in "
+                             "interactive mode.")
+
+        super(StagedConflictHandler, self).__init__( db=db,
+                                                     mode=mode,
+                                                     verbose=verbose,
+                                                     logFunctor=logFunctor,
+                                                     commitInterval=commitInterval,
+                                                     commitTime=commitTime,
+                                                     checkpointFunctor=checkpointFunctor )
+        self._pending= [] # records collected since the last checkpoint
+
+
+    def __call__(self, rec, key=None):
+        """Add record to the pending candidates
+
+        The candidate is resolved at the next checkpoint.
+
+        Arguments:
+            rec: Record to import
+            key: Ignored, since no replies are recorded in non-interactive
+               modes
+        """
+        self._pending.append(rec)
+
+        self.nProcessed+= 1
+        self._nPending+= 1
+        self.checkpoint()
+
+
+    def checkpoint(self, force=False):
+        """Resolve and write the pending candidates, if the commit interval has
+        elapsed, and commit
+
+        Arguments:
+            force (bool): Write pending candidates regardless of the commit
+               interval. Defaults to ``False``.
+
+        Return:
+            ``True`` if and only if a commit was issued
+        """
+        if not self._nPending:
+            return False
+
+        if not (force or self.isDue()):
+            return False
+
+        with self._db.session():
+            self.flush()
+            return super(StagedConflictHandler, self).checkpoint(force=True)
+
+
+    def flush(self):
+        """Resolve the conflicts of all pending candidates and write them
+        """
+        records= self._pending
+        self._pending= []
+
+        if not records:
+            return
+
+        self._db.stageFlights([ rec.flight for rec in records ])
+
+        conflicts= defaultdict(list) # position of candidate -> flights
+        for seq, flight in self._db.iterStagedConflicts(columns=CONFLICT_COLUMNS):
+            conflicts[seq].append(flight)
+
+        self._db.dropStagedFlights()
+
+        index= FlightIndex() # candidates kept so far
+        touched= set() # ids replaced or deleted by preceding candidates
+        final= dict() # id -> (position, flight) or (position, None) if deleted
+        new= [] # (position, flight) for kept candidates without id
+
+        for seq, rec in enumerate(records):
+            flight= rec.flight
+            id= flight.id
+
+            if self.keepCandidate( rec,
+                                   [ other for other in conflicts[seq]
+                                     if other.id not in touched ],
+                                   index ):
+                if id is None:
+                    new.append( (seq, flight) )
+
+                    # provisional id for the index only
+                    flight= copy(flight)
+                    flight.id= maxint - seq
+                else:
+                    final[id]= (seq, flight)
+
+                index.add(flight)
+            elif id is not None:
+                final[id]= (seq, None)
+                index.remove(id)
+                self.nDeleted+= 1
+
+            if id is not None:
+                touched.add(id)
+
+        deleted= [ id for id, (seq, flight) in final.iteritems()
+                   if flight is None ]
+
+        for i in xrange(0, len(deleted), self._db.chunkSize):
+            self._db.deleteFlights( deleted[i:i + self._db.chunkSize] )
+
+        inserted= sorted( [ item for item in final.itervalues()
+                            if item[1] is not None ] + new )
+
+        self._db.insertFlights( [ flight for seq, flight in inserted ],
+                                force=True )
+        self.nInserted+= len(inserted)
+
+
+    def keepCandidate(self, rec, conflicts, index):
+        """Decide whether to keep a single candidate
+
+        Arguments:
+            rec: Candidate record
+            conflicts (list): Similar flights in the database, which have not
+               been replaced or deleted by preceding candidates
+            index (:class:`~.db.FlightIndex`): Preceding candidates kept
+
+        Return:
+            ``True`` if the candidate is to be inserted, ``False`` if it is to
+            be skipped
+        """
+        self._candidate= rec
+        self._warnings= NONE
+        flight= rec.flight
+
+        if not self.isValid(flight):
+            if self.verbose > 1:
+                self.log("\nCandidate:\n  {0}\nhas warnings:\n -> {1}\n"
+                         .format(rec, "\n -> ".join(self.warnings()) ))
+
+            if self.mode == REJECT_ON_CONFLICT:
+                return False
+
+        self._conflicts= conflicts + index.similarFlights( flight,
+                                                           minId= flight.id or 0 )
+
+        for other in self._conflicts:
+            if self.isDuplicate(flight, other):
+                return False
+
+        if self._conflicts and self.mode == REJECT_ON_CONFLICT:
+            return False
+
+        return True
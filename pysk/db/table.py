@@ -38,13 +38,23 @@ class Table():
         return len(self.columns)
 
 
-    def format(self):
+    def format(self, nRows=1):
         """Returns a tuple to be passed to INSERT INTO VALUES command.
         
+        Arguments:
+            nRows (int): Number of rows. If greater than one, a comma separated
+               list of *nRows* tuples is returned for multi-row inserts.
+               Defaults to 1.
+        
         Return:
             format string
         """
-        return "(" + ",".join( self.nColumns() * ["%s"] ) + ")"
+        row= "(" + ",".join( self.nColumns() * ["%s"] ) + ")"
+        
+        if nRows == 1:
+            return row
+            
+        return ",".join( nRows * [row] )
         
         
     def getColumnByName(self, name):
@@ -7,4 +7,5 @@ from .set_pilot_email import SetPilotEmail
 from .stats import Stats
 from .update_users import UpdateUsers
 from .export import Export
+from .rebuild_rollup import RebuildRollup
         
\ No newline at end of file
@@ -5,8 +5,10 @@ import sys
 from os import path as osPath
 import csv
 import io
+from cStringIO import StringIO
 
 from .tool_base import ToolBase
+from pysk.db import Filter
 
 
 DATE_FORMAT="%Y-%m-%d"
@@ -15,6 +17,13 @@ TIME_FORMAT="%H:%M"
 
 class Export(ToolBase):
     """Export Database
+    
+    The export is a streaming pipeline: flights are fetched from the server in
+    chunks, the pilots, planes and launch methods of each chunk are looked up
+    together (see :meth:`~pysk.db.Database.iterRecords`) and the CSV rows are
+    collected in an in-memory buffer, which is written to the output whenever
+    it exceeds ``--buffer-size`` bytes. Memory consumption does not depend on
+    the number of exported flights.
   
     Arguments:
         parent (:class:`~pysk.tools.ToolBase`): Parent tool
@@ -59,10 +68,15 @@ class Export(ToolBase):
     def writeCsv(self, os):
         """Write output to csv file
         
+        Rows are formatted into a buffer, which is written to *os* and flushed
+        once it holds at least :attr:`config.buffer_size` bytes.
+        
         Arguments:
             os (stream): Output stream        
         """        
-        writer= csv.writer(os, dialect='excel')
+        buffer= StringIO()
+        bufferSize= self.config.buffer_size
+        writer= csv.writer(buffer, dialect='excel')
         writer.writerow([
             "Datum",
             "Nummer",
@@ -164,18 +178,43 @@ class Export(ToolBase):
                     rec.flight.id
                 ])
                 count+= 1
+            
+            if buffer.tell() >= bufferSize:
+                self.flush(buffer, os)
+        
+        self.flush(buffer, os)
+
+
+    @staticmethod
+    def flush(buffer, os):
+        """Write the content of a buffer to a stream and empty the buffer
+        
+        Arguments:
+            buffer (:class:`cStringIO.StringIO`): Buffer to write
+            os (stream): Output stream
+        """
+        os.write( buffer.getvalue() )
+        os.flush()
+        
+        buffer.seek(0)
+        buffer.truncate()
 
             
     def records(self):
         """Filter records in database
         
+        The flights are streamed from the server and converted into records
+        in chunks, such that memory consumption does not depend on the number
+        of exported flights.
+        
         Return:
             Iterable: Record instances matching time constraints
         """
         timeFilter= self.timeConstraints()
         db= self.parent.db
-        return db.makeRecords(db.iterFlights(filter=timeFilter,
-                                             order="departure_time"))
+        return db.iterRecords(db.iterFlights(filter=timeFilter,
+                                             order="departure_time",
+                                             stream=True))
 
 
     def _initCmdLineArguments(self):
@@ -192,11 +231,19 @@ class Export(ToolBase):
                                  default= self.config.force,
                                  action="store_true")
 
+        self.parser.add_argument("-B", "--buffer-size",
+                                 help="Number of bytes collected before "
+                                      "writing to the output. Defaults to "
+                                      "{0}.".format(self.config.buffer_size),
+                                 default= self.config.buffer_size,
+                                 type=int)
+
     def timeConstraints(self):
-        """Convert user specified time constraints to MySQL search string
+        """Convert user specified time constraints to filter
         
         Return:
-            str: MySQL compatible search string specifying the time range to search
+            :class:`~pysk.db.Filter`: Filter specifying the time ranges to
+            search or ``None`` if no time range is specified
         """
         begin= None
         end  = None
@@ -217,16 +264,15 @@ class Export(ToolBase):
                                     .format(self.config.time) )
             parts=[]
             if begin:
-                 parts.append( "(departure_time >= '{0}')"
-                              .format( datetime.strftime(begin, DATE_FORMAT) ) )
+                parts.append( Filter( "departure_time >= %s",
+                                      datetime.strftime(begin, DATE_FORMAT) ))
             if end:
-                parts.append( "(departure_time < '{0}')"
-                              .format( datetime.strftime(end, DATE_FORMAT) ) )
+                parts.append( Filter( "departure_time < %s",
+                                      datetime.strftime(end, DATE_FORMAT) ))
 
-            if parts:
-                retval.append(u"".join(["(", " AND ".join(parts), ")"]))
+            retval.append( Filter.all(*parts) )
         
-        return u" OR ".join(retval)
+        return Filter.any(*retval)
                 
 
     @staticmethod    
@@ -273,6 +319,7 @@ class Export(ToolBase):
         """
         config.time  = None
         config.ofile = "-"
+        config.buffer_size= 1 << 20
 
         return config        
 
@@ -1,15 +1,54 @@
 # -*- coding: utf-8 -*-
 
 import io, os
+from datetime import datetime, timedelta
+from itertools import islice
+from multiprocessing import Pool, cpu_count
 from traceback import print_exc
 
 from .tool_base import ToolBase
 from pysk.utils.iterMembers import copyMembers
+from pysk.utils.journal import Journal
 from pysk.db.record import RecordError
 from pysk.db import CsvReader
-from pysk.db import ConflictHandler
+from pysk.db import ConflictHandler, StagedConflictHandler, Resolver
 from pysk.db.conflict_handler import INTERACTIVE, IGNORE_ALL_CONFLICTS, REJECT_ON_CONFLICT
 
+DATE_FORMAT="%Y-%m-%d"
+
+def _parseSpan(path, span, options):
+    """Parse a span of a csv file in a worker process
+    
+    Towflights are not merged, since a towflight may be listed in another
+    span than its glider flight.
+    
+    Arguments:
+        path (str): Path to input file
+        span (tuple): Byte offsets as returned by :meth:`.CsvReader.splitFile`
+        options (dict): Keyword arguments passed to :class:`.CsvReader` and
+           :meth:`.CsvReader.__call__`
+    
+    Return:
+        List of :class:`~.db.Record` instances
+    """
+    csv= CsvReader( verbose=options["verbose"], debug=options["debug"] )
+    
+    return csv( path,
+                delimiter=options["delimiter"],
+                encoding=options["encoding"],
+                dateformat=options["dateformat"],
+                timeformat=options["timeformat"],
+                mergeTowflights=False,
+                span=span )
+
+
+def _departureKey(rec):
+    """Sort key of records by departure time, records without departure last
+    """
+    time= rec.flight.departure_time if rec.flight else None
+    
+    return (time is None, time)
+
 
 class ImportFlights(ToolBase):
     """Import flights from csv file
@@ -32,6 +71,7 @@ class ImportFlights(ToolBase):
                 
         self._currentFile= None
         self._currentLine= 0
+        self._resolver= None
         
 
     def msg(self, message):
@@ -55,16 +95,37 @@ class ImportFlights(ToolBase):
             self.displayHelp()
             return
         
+        if self.config.staged and self.config.mode == "interactive":
+            self.error("Staged import requires mode 'ignore' or 'replace'.\n")
+            return
+        
+        if self.config.resume and self.config.jobs != 1:
+            self.error("Resuming an import requires --jobs 1.\n")
+            return
+        
         #read aliases, if any
         if self.config.alias_file:
             self.importAliases(self.config.alias_file)
 
         self.parent.connectDatabase()
+        self._resolver= Resolver( self.db() )
         
         #read records from input file
 
+        if self.config.jobs != 1:
+            self.createFlights( self.parseParallel(self.config.inputFiles) )
+            return
+
         for path in self.config.inputFiles:
-            self.createFlights( self.importCsv(path) )
+            journal= None
+            
+            if self.config.resume:
+                journal= self.openJournal(path)
+                
+                if journal is None:
+                    continue
+            
+            self.createFlights( self.importCsv(path), journal )
 
 
 
@@ -81,6 +142,19 @@ class ImportFlights(ToolBase):
                                  help="Restrict records to pilots/ planes, "
                                       "which belong to the given club")
 
+        self.parser.add_argument("-R", "--date-range",
+                                 help="Restrict records to a single date or "
+                                      "date range. Format is YYYY-MM-DD for a "
+                                      "single date and <begin>:<end> for a "
+                                      "range.")
+
+        self.parser.add_argument("-y", "--flight-type",
+                                 help="Restrict records to the given flight "
+                                      "type. May be given multiple times.",
+                                 action="append",
+                                 choices=sorted( set( CsvReader.flightTypeMap
+                                                      .values() )))
+
         self.parser.add_argument( "-m", "--mode",
                                   help="Conflict handling. Specifies how to"
                                        "handle existing records",
@@ -91,6 +165,64 @@ class ImportFlights(ToolBase):
                                   help="Field separator for csv records",
                                   default=self.config.separator)
 
+        self.parser.add_argument( "-n", "--commit-interval",
+                                  help="Commit after the given number of "
+                                       "records. Records committed before an "
+                                       "abort are kept. Defaults to 0, i.e. a "
+                                       "single commit at the end.",
+                                  type=int,
+                                  default=self.config.commit_interval)
+
+        self.parser.add_argument( "-t", "--commit-time",
+                                  help="Commit at least every given number of "
+                                       "seconds. 0 disables the time limit.",
+                                  type=float,
+                                  default=self.config.commit_time)
+
+        self.parser.add_argument( "-I", "--index-conflicts",
+                                  help="Load all flights of the imported time "
+                                       "span at once and check for conflicts "
+                                       "in memory. Flights added by other "
+                                       "clients during the import are not "
+                                       "considered.",
+                                  default=self.config.index_conflicts,
+                                  action="store_true")
+
+        self.parser.add_argument( "-B", "--staged",
+                                  help="Resolve conflicts of all records "
+                                       "within a commit interval at once by "
+                                       "a staging table and bulk statements. "
+                                       "Not available in interactive mode.",
+                                  default=self.config.staged,
+                                  action="store_true")
+
+        self.parser.add_argument( "-w", "--merge-window",
+                                  help="Maximum number of records between a "
+                                       "flight and its towflight. 0 reads the "
+                                       "complete file before importing.",
+                                  type=int,
+                                  default=self.config.merge_window)
+
+        self.parser.add_argument( "-j", "--jobs",
+                                  help="Parse input files in the given number "
+                                       "of processes. Large files are split "
+                                       "into ranges of lines. Records of all "
+                                       "files are imported at once ordered by "
+                                       "departure time. 0 uses all cores.",
+                                  type=int,
+                                  default=self.config.jobs)
+
+        self.parser.add_argument( "-r", "--resume",
+                                  help="Continue an aborted import after the "
+                                       "last committed record, reusing the "
+                                       "replies given so far. Progress is "
+                                       "kept in '<input file>.journal'. "
+                                       "Combine with --commit-interval or "
+                                       "--commit-time to keep the progress "
+                                       "of an aborted import.",
+                                  default=self.config.resume,
+                                  action="store_true")
+
         self.parser.add_argument("-D", "--date-format",
                                  help="Date format (in strftime notation)",
                                  default=self.config.date_format )
@@ -217,12 +349,15 @@ class ImportFlights(ToolBase):
 
     def importCsv(self, path):
         """Import records from csv file
+        
+        The file is parsed while the records are consumed, such that the
+        records do not have to be kept in memory.
                 
         Arguments:
             path (str): Path to input file
             
-        Return:
-            Iterable of imported records
+        Yield:
+            Imported records
         """
         csv= CsvReader( logStream= self.config.logStream,
                         verbose=self.config.verbose,
@@ -231,13 +366,17 @@ class ImportFlights(ToolBase):
         self.log("\nParsing input file '{0}' ...\n".format(path))
         self._currentFile= os.path.basename(path)            
             
+        nRecords= 0
         try:
-            retval= csv( path,
-                         delimiter=self.config.separator,
-                         encoding=self.config.encoding,
-                         dateformat=self.config.date_format,
-                         timeformat=self.config.time_format,
-                         mergeTowflights=True )
+            for rec in csv.iterate( path,
+                                    delimiter=self.config.separator,
+                                    encoding=self.config.encoding,
+                                    dateformat=self.config.date_format,
+                                    timeformat=self.config.time_format,
+                                    mergeTowflights=True,
+                                    window=self.config.merge_window ):
+                nRecords+= 1
+                yield rec
             
         except Exception as ex:
             self.error("{0}\n".format(ex))
@@ -245,12 +384,116 @@ class ImportFlights(ToolBase):
             if self.config.debug:
                 print_exc()                
                 
-        self.log("-> Imported {0} records\n".format( len(retval) ))
+        self.log("-> Imported {0} records\n".format(nRecords))
+
+
+    def parseParallel(self, paths):
+        """Parse csv files in a process pool
+        
+        Each file is split into up to ``--jobs`` spans of lines (see
+        :meth:`.CsvReader.splitFile`), which are parsed by the worker
+        processes. Towflights are merged per file after all of its spans
+        have been parsed. A file, which cannot be parsed, is skipped.
+        
+        Arguments:
+            paths (list): Paths to input files
         
+        Return:
+            List of the records of all files sorted by departure time
+        """
+        jobs= self.config.jobs or cpu_count()
+        options= { "verbose": self.config.verbose,
+                   "debug": self.config.debug,
+                   "delimiter": self.config.separator,
+                   "encoding": self.config.encoding,
+                   "dateformat": self.config.date_format,
+                   "timeformat": self.config.time_format }
+        
+        csv= CsvReader( logStream= self.config.logStream,
+                        verbose=self.config.verbose,
+                        debug=self.config.debug)
+        
+        nSpans= -(-jobs // len(paths))
+        
+        pool= Pool(jobs)
+        try:
+            tasks= [ (path, [ pool.apply_async(_parseSpan, (path, span, options))
+                              for span in CsvReader.splitFile(path, nSpans) ])
+                     for path in paths ]
+            
+            retval= []
+            for path, results in tasks:
+                self.log("\nParsing input file '{0}' ...\n".format(path))
+                
+                try:
+                    records= [ rec for r in results for rec in r.get() ]
+                except Exception as ex:
+                    self.error("{0}\n".format(ex))
+                    
+                    if self.config.debug:
+                        print_exc()
+                    continue
+                
+                csv.merge(records)
+                self.log("-> Imported {0} records\n".format(len(records)))
+                retval.extend(records)
+        
+        finally:
+            pool.close()
+            pool.join()
+        
+        retval.sort(key=_departureKey)
+        self._currentFile= "input files"
+        if len(paths) == 1:
+            self._currentFile= os.path.basename(paths[0])
+            
         return retval
 
 
-    def createFlights(self, records):
+    def openJournal(self, path):
+        """Open the journal of an input file
+        
+        The journal is stored next to the input file and only used with
+        ``--resume``. The progress of a previous import is read from an
+        existing journal.
+        
+        Arguments:
+            path (str): Path to input file
+        
+        Return:
+            :class:`~.utils.journal.Journal` instance or *None*, if the
+            existing journal does not match the input file or options
+        """
+        options= { "separator": self.config.separator,
+                   "encoding": self.config.encoding,
+                   "date_format": self.config.date_format,
+                   "time_format": self.config.time_format,
+                   "merge_window": self.config.merge_window,
+                   "mode": self.config.mode,
+                   "club": self.config.club,
+                   "date_range": self.config.date_range,
+                   "flight_type": self.config.flight_type }
+        
+        journal= Journal(path + ".journal", path, options)
+        
+        if not journal.exists():
+            self.warn("No journal found for '{0}'. Importing all records.\n"
+                      .format(path))
+            return journal
+        
+        try:
+            journal.load()
+        except (ValueError, KeyError) as ex:
+            self.error("{0}. File skipped.\n".format(ex))
+            return None
+        
+        self.log("\nResuming import of '{0}' after record {1}\n"
+                 .format(path, journal.committed))
+        
+        return journal
+
+
+    def createFlights(self, records, journal=None):
         """Add flights to database
         
         Iterates over all records and extracts the flights which are going to
@@ -263,9 +506,34 @@ class ImportFlights(ToolBase):
         - If mode is 'interactive', the user is promted for an action for each
           collision. This is the default.
         - If mode is 'replace', existing flights are overwritten
-         
+        
+        Each record passes the following stages:
+        
+        1. Filters on the values read from file (``--club``,
+           ``--date-range`` and ``--flight-type``, see :meth:`filterRecord`).
+        2. Pilots, planes and launch methods are resolved through a
+           :class:`~.db.Resolver`, i.e. the respective tables are read only
+           once.
+        3. The flight is completed and validated.
+        4. The flight is passed to the conflict handler.
+        
+        Filtered records are neither resolved nor reported as missing.
+        
+        Changes are committed in chunks of ``--commit-interval`` records or
+        after ``--commit-time`` seconds (see :class:`~.db.ConflictHandler`)
+        and once at the end. With ``--staged``, the records of each chunk are
+        resolved at once by a :class:`~.db.StagedConflictHandler`.
+        
+        If a journal is given, the number of committed records is saved at
+        each checkpoint and the replies given to conflicts are saved when the
+        import ends. Records committed according to the journal are skipped.
+        The journal is removed after a successful import. Failing to write
+        the journal is reported as warning and does not abort the import.
+        
         Arguments:
             records (iterable): Input records
+            journal (:class:`~.utils.journal.Journal`): Progress of the import.
+               Defaults to *None*.
         """
         missing= {"pilots": dict(),
                   "planes" : dict(),
@@ -275,39 +543,89 @@ class ImportFlights(ToolBase):
                       "interactive" : INTERACTIVE, 
                       "replace" : REJECT_ON_CONFLICT }
 
-        conflictHandler= ConflictHandler(db= self.parent.db,
-                                         mode= modeNumbers[self.config.mode],
-                                         verbose= self.config.verbose,
-                                         logFunctor= self.msg)
+        options= {}
+        if journal is not None:
+            options["checkpointFunctor"]= lambda handler: \
+                                             self._saveJournal(journal)
+            
+            if not self.config.staged:
+                options["decisions"]= journal.decisions
+        
+        handlerClass= ConflictHandler
+        if self.config.staged:
+            handlerClass= StagedConflictHandler
+
+        conflictHandler= handlerClass(db= self.parent.db,
+                                      mode= modeNumbers[self.config.mode],
+                                      verbose= self.config.verbose,
+                                      logFunctor= self.msg,
+                                      commitInterval= self.config.commit_interval,
+                                      commitTime= self.config.commit_time,
+                                      **options)
+        
+        first= 1
+        if journal is not None and journal.committed:
+            first= journal.committed + 1
+            records= islice(records, journal.committed, None)
+
+        if self.config.index_conflicts and not self.config.staged:
+            records= list(records)
+            self._loadIndex(conflictHandler, records)
+
+        nErrors= self.nErrors
+        try:
+            nFiltered= self._createFlights( records, first, conflictHandler,
+                                            missing )
+            conflictHandler.checkpoint(force=True)
+        finally:
+            if journal is not None:
+                self._writeJournal(journal, journal.save)
+        
+        if journal is not None and self.nErrors == nErrors:
+            self._writeJournal(journal, journal.remove)
+        
+        if nFiltered:
+            self.log( "\nSkipped {0} records not matching the filters\n"
+                      .format(nFiltered) )
+        
+        self.log( "\nInserted {0} records\n".format(conflictHandler.nInserted) )        
+        self.log( "Deleted {0} records\n".format(conflictHandler.nDeleted) )        
 
-        club= None
-        if self.config.club:
-            club= self.config.club.lower()
+        for k,v in missing.iteritems():
+            self._reportMissing(k, sorted( v.values() ) )
+
+
+    def _createFlights(self, records, first, conflictHandler, missing):
+        """Pass the flights of the records to the conflict handler
+        
+        Arguments:
+            records (iterable): Input records
+            first (int): Number of the first record
+            conflictHandler (:class:`~.db.ConflictHandler`): Conflict handler
+            missing (dict): Pilots, planes and launch methods not found in the
+               database by category
+        
+        Return:
+            Number of records skipped by the filters
+        """
+        filters= self.filters()
+        nFiltered= 0
 
-        for self._currentLine, rec in enumerate(records, 1):
+        for self._currentLine, rec in enumerate(records, first):
 
             if not rec.flight:
                 self.msg("No flight information. Record skipped\n\n")
                 continue
-                            
-            #Look up pilots, plane and launch method in data base
-            self._updatePlane(rec.plane, missing["planes"])
-            self._updatePlane(rec.towplane, missing["planes"])
-            self._updatePilot(rec.pilot, missing["pilots"])
-            self._updatePilot(rec.copilot, missing["pilots"])
-            self._updatePilot(rec.towpilot, missing["pilots"])
-            self._updateLaunchMethod( rec.launch_method,
-                                      missing["launch methods"] )
-
-            # Skip record if club does not match       
-            if( club
-                and (not rec.pilot.club or club != rec.pilot.club.lower())
-                and (not rec.copilot.club or club != rec.copilot.club.lower())
-                and (not rec.plane.club or club != rec.plane.club.lower())):
-
+            
+            reason= self.filterRecord(rec, **filters)
+            if reason:
+                nFiltered+= 1
+                
                 if self.config.verbose > 1:                
-                    self.msg("Club mismatch. Record skipped\n\n")
+                    self.msg("{0}. Record skipped\n\n".format(reason))
                 continue
+                            
+            self._resolveRecord(rec, missing)
 
             # Make sure record has necessary fields
             try:
@@ -320,17 +638,194 @@ class ImportFlights(ToolBase):
             if warnings and self.config.verbose > 1:
                 self.msg( "".join([ "\n ->", "\n -> ".join(warnings), "\n"]))
 
-            conflictHandler(rec)     
+            conflictHandler(rec, key=self._currentLine)
         
-        self.log( "\nInserted {0} records\n".format(conflictHandler.nInserted) )        
-        self.log( "Deleted {0} records\n".format(conflictHandler.nDeleted) )        
+        return nFiltered
+
+
+    def filters(self):
+        """Convert the filter options to arguments of :meth:`filterRecord`
+        
+        Return:
+            Dictionary of keyword arguments
+        """
+        club= None
+        if self.config.club:
+            club= self.config.club.lower()
+        
+        begin= None
+        end  = None
+        if self.config.date_range:
+            tmp= self.config.date_range.split(":")
+            if len(tmp) == 1:
+                begin= datetime.strptime(tmp[0], DATE_FORMAT)
+                end= begin + timedelta(days=1)
+            elif len(tmp) == 2:
+                if tmp[0]:
+                    begin= datetime.strptime(tmp[0], DATE_FORMAT)
+                
+                if tmp[1]:
+                    end= datetime.strptime(tmp[1], DATE_FORMAT)
+            else:
+                raise RuntimeError( "Invalid date range '{0}'"
+                                    .format(self.config.date_range) )
+        
+        types= None
+        if self.config.flight_type:
+            types= set(self.config.flight_type)
+        
+        return { "club": club, "begin": begin, "end": end, "types": types }
+
+
+    def filterRecord(self, rec, club=None, begin=None, end=None, types=None):
+        """Check a record against the filters before it is resolved
+        
+        The date and flight type are taken from the values read from file.
+        The club of pilots and planes found in the database is taken from the
+        database, as the respective members are overwritten by
+        :meth:`_resolveRecord` later on. Aliases are applied. The record is not
+        modified.
+        
+        Arguments:
+            rec (:class:`~.db.Record`): Record with flight
+            club (str): Lower case club name. Defaults to *None* (any club).
+            begin (datetime): Earliest departure. Defaults to *None*.
+            end (datetime): Departure limit (exclusive). Defaults to *None*.
+            types (set): Flight types. Defaults to *None* (any type).
+        
+        Return:
+            Reason for skipping the record or *None*, if the record passes
+        """
+        flight= rec.flight
+        
+        if types is not None and flight.type not in types:
+            return "Flight type mismatch"
+        
+        if begin is not None or end is not None:
+            time= flight.departure_time or flight.landing_time
+            
+            if( time is None
+                or (begin is not None and time < begin)
+                or (end is not None and time >= end) ):
+                return "Date out of range"
+        
+        if club:
+            clubs= ( self._pilotClub(rec.pilot),
+                     self._pilotClub(rec.copilot),
+                     self._planeClub(rec.plane) )
+            
+            if not any( c and c.lower() == club for c in clubs ):
+                return "Club mismatch"
+        
+        return None
+
+
+    def _pilotClub(self, pilot):
+        """Get club of pilot as after :meth:`_updatePilot`
+        
+        Arguments:
+            pilot (:class:`~.db.model.Pilot`): Pilot read from file
+        
+        Return:
+            Club stored in database or read from file
+        """
+        if not (pilot.last_name or pilot.first_name):
+            return pilot.club
+        
+        lastName, firstName= self.aliases["pilots"].get(
+                                 (pilot.last_name, pilot.first_name),
+                                 (pilot.last_name, pilot.first_name) )
+        
+        try:
+            return self._resolver.getPilotByName(firstName, lastName).club
+        except KeyError:
+            return pilot.club
 
-        for k,v in missing.iteritems():
-            self._reportMissing(k, sorted( v.values() ) )
 
-        self.db().commit()
+    def _planeClub(self, plane):
+        """Get club of plane as after :meth:`_updatePlane`
+        
+        Arguments:
+            plane (:class:`~.db.model.Plane`): Plane read from file
+        
+        Return:
+            Club stored in database or read from file
+        """
+        if not plane.registration:
+            return plane.club
+        
+        registration= self.aliases["planes"].get(plane.registration)
+        
+        try:
+            return self._resolver.getPlaneByRegistration( registration
+                                                          or plane.registration
+                                                        ).club
+        except KeyError:
+            return plane.club
                        
+
+
+
+    def _resolveRecord(self, rec, missing):
+        """Look up pilots, planes and launch method of a record in database
+        
+        Arguments:
+            rec (:class:`~.db.Record`): Record to update
+            missing (dict): Pilots, planes and launch methods not found in the
+               database by category
+        """
+        self._updatePlane(rec.plane, missing["planes"])
+        self._updatePlane(rec.towplane, missing["planes"])
+        self._updatePilot(rec.pilot, missing["pilots"])
+        self._updatePilot(rec.copilot, missing["pilots"])
+        self._updatePilot(rec.towpilot, missing["pilots"])
+        self._updateLaunchMethod( rec.launch_method,
+                                  missing["launch methods"] )
+
+
+    def _saveJournal(self, journal):
+        """Record the current record as committed in the journal
+        
+        Arguments:
+            journal (:class:`~.utils.journal.Journal`): Progress of the import
+        """
+        journal.committed= max(journal.committed, self._currentLine)
+        self._writeJournal(journal, journal.save)
+
+
+    def _writeJournal(self, journal, method):
+        """Save or remove the journal, warning instead of failing on errors
+        
+        Arguments:
+            journal (:class:`~.utils.journal.Journal`): Progress of the import
+            method (callable): Bound method of *journal* to call
+        """
+        try:
+            method()
+        except (IOError, OSError) as ex:
+            self.warn("Cannot write journal '{0}': {1}\n"
+                      .format(journal.path, ex))
+
                         
+    def _loadIndex(self, conflictHandler, records):
+        """Load existing flights in the time span of the records into an index
+        
+        Arguments:
+            conflictHandler (:class:`~.db.ConflictHandler`): Conflict handler
+               to load the index of
+            records (list): Imported records
+        """
+        times= [ t for rec in records if rec.flight
+                   for t in (rec.flight.departure_time, rec.flight.landing_time)
+                   if t is not None ]
+        
+        if not times:
+            return
+            
+        conflictHandler.loadIndex( min(times).replace(second=0, microsecond=0),
+                                   max(times) )
+
+
     def _updatePilot(self, pilot, missing):
         """Try to complete pilot information with information in database
         
@@ -353,7 +848,7 @@ class ImportFlights(ToolBase):
             pilot.last_name= alias[0]
 
         try:
-            copyMembers( self.db().getPilotByName( pilot.first_name,
+            copyMembers( self._resolver.getPilotByName( pilot.first_name,
                                                    pilot.last_name ),
                          pilot )
         except KeyError:
@@ -381,7 +876,7 @@ class ImportFlights(ToolBase):
             plane.registration= alias
             
         try:
-            copyMembers( self.db().getPlaneByRegistration(plane.registration),
+            copyMembers( self._resolver.getPlaneByRegistration(plane.registration),
                          plane )
         except KeyError:
             missing[plane.registration]= plane
@@ -407,7 +902,7 @@ class ImportFlights(ToolBase):
             method.name= alias
 
         try:
-            copyMembers( self.db().getLaunchMethodByName(method.name),
+            copyMembers( self._resolver.getLaunchMethodByName(method.name),
                          method )
             return 
         except KeyError:
@@ -416,14 +911,14 @@ class ImportFlights(ToolBase):
         if method.type == "airtow":            
 
             try:
-                copyMembers( self.db().getLaunchMethodByTowplane(method.towplane_registration),
+                copyMembers( self._resolver.getLaunchMethodByTowplane(method.towplane_registration),
                               method )
                 return
             except KeyError:
                 pass
             
             try:
-                copyMembers( self.db().getLaunchMethodByName("Airtow (other)"),
+                copyMembers( self._resolver.getLaunchMethodByName("Airtow (other)"),
                              method )
                 return
             except KeyError:
@@ -432,7 +927,7 @@ class ImportFlights(ToolBase):
         elif method.type == "self":
             
             try:
-                copyMembers( self.db().getLaunchMethodByName("Self launch"),
+                copyMembers( self._resolver.getLaunchMethodByName("Self launch"),
                              method )
                 return
             except KeyError:
@@ -476,6 +971,15 @@ class ImportFlights(ToolBase):
         config.time_format="%H:%M"
         config.encoding="utf-8"
         config.separator=","
+        config.commit_interval= 0
+        config.commit_time= 0
+        config.index_conflicts= False
+        config.merge_window= 100
+        config.jobs= 1
+        config.staged= False
+        config.resume= False
+        config.date_range= None
+        config.flight_type= None
 
         return config        
                 
\ No newline at end of file
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+from .tool_base import ToolBase
+
+
+class RebuildRollup(ToolBase):
+    """Rebuild the daily plane log rollup table
+
+    The rollup table holds landings and flight time per plane, day and pilot in
+    command, the checkpoints the totals of each plane at the start of every
+    month (see :meth:`~pysk.db.Database.rebuildRollup`). Both are created by
+    the first rebuild and maintained by all changes made through :mod:`pysk`
+    afterwards. Flights changed by other clients, e.g. startkladde itself,
+    make the table drift. Run the tool with ``--check`` to list the affected
+    days and without to recompute the table from all flights.
+
+    Arguments:
+        parent (:class:`~.tools.ToolBase`): Parent tool
+    """
+
+    def __init__(self, parent):
+        description= str( "Create or rebuild the table of landings and flight "
+                          "time per plane and day used by stats" )
+
+        super(RebuildRollup, self).__init__( description=description,
+                                             parent=parent )
+
+        self.config= self.defaultConfiguration(self.config)
+        self._initCmdLineArguments()
+
+
+    def _exec(self):
+        """Execute the tool
+        """
+        self.parent.connectDatabase()
+        db= self.parent.db
+
+        if self.config.drop:
+            self.log("Dropping rollup table ...\n")
+            db.dropRollup()
+            db.commit()
+            return
+
+        if self.config.check:
+            self.check()
+            return
+
+        self.log("Rebuilding rollup table ...\n")
+        nRows= db.rebuildRollup()
+        db.commit()
+        self.log("Wrote {0} rows\n".format(nRows))
+
+
+    def check(self):
+        """Report rows of the rollup table and checkpoints differing from the
+        flights
+
+        Each differing row is counted as error.
+        """
+        db= self.parent.db
+
+        if not db.hasRollup():
+            self.error("Rollup table does not exist. Run without --check to "
+                       "create it.\n")
+            return
+
+        for planeId, day, pic in db.checkRollup():
+            self.error( "Rollup of plane {0} on {1} (PIC {2}) differs from "
+                        "flights\n".format(planeId, day, pic) )
+
+        for planeId, monthStart in db.checkCheckpoints():
+            self.error( "Checkpoint of plane {0} at {1} differs from "
+                        "flights\n".format(planeId, monthStart) )
+
+        if not self.nErrors:
+            self.log("Rollup table is up to date\n")
+
+
+    def _initCmdLineArguments(self):
+        """Initialise all command line arguments.
+        """
+        self.parser.add_argument("-c", "--check",
+                                 help="Compare the rollup table with the "
+                                      "flights instead of rebuilding it",
+                                 default=self.config.check,
+                                 action="store_true")
+
+        self.parser.add_argument("-D", "--drop",
+                                 help="Drop the rollup table. Changes of "
+                                      "flights are not tracked afterwards.",
+                                 default=self.config.drop,
+                                 action="store_true")
+
+
+    @staticmethod
+    def defaultConfiguration(config=ToolBase.defaultConfiguration()):
+        """Get default configuration options
+
+        Arguments:
+            config (object): Input configuration. Existing attributes will be
+               overwritten.
+
+        Return:
+            Default configuration object
+        """
+        config.check= False
+        config.drop= False
+
+        return config
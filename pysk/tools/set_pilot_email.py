@@ -2,6 +2,7 @@
 
 import re, io
 from .tool_base import ToolBase
+from pysk.db import Filter
 
 
 class SetPilotEmail(ToolBase):
@@ -106,9 +107,9 @@ class SetPilotEmail(ToolBase):
         """
         filter= None
         if self.config.club:
-            filter="club='{0}'".format(self.config.club)
+            filter= Filter.equal("club", self.config.club)
             
-        nUpdated= 0        
+        updated= []
         for p in self.parent.db.iterPilots(filter=filter):
             email= self.emails.get( " ".join([ p.last_name.replace("'", ""), 
                                                p.first_name.replace("'", "")]))
@@ -120,11 +121,11 @@ class SetPilotEmail(ToolBase):
                     continue
                 
             p.setCommentField("email", email)
-            nUpdated+= 1
+            updated.append(p)
 
-            self.parent.db.insertPilots([p], force=True)
+        self.parent.db.insertPilots(updated, force=True)
 
-        return nUpdated
+        return len(updated)
 
 
         
@@ -3,208 +3,235 @@
 from datetime import datetime, timedelta
 
 from .tool_base import ToolBase
+from pysk.db import Filter
+from pysk.db.model import Airplane, Flight
 
 DATE_FORMAT="%Y-%m-%d"
 TIME_FORMAT="%H:%M"
 
+#: Columns of table flights needed for the plane log
+COLUMNS= ( "id",
+           "plane_id",
+           "pilot_id",
+           "copilot_id",
+           "type",
+           "departure_location",
+           "landing_location",
+           "departure_time",
+           "landing_time" )
+
+#: Length of the date prefix identifying a period of ``--summary``
+PERIODS= { "day": 10,
+           "month": 7,
+           "year": 4 }
+
+
+class PlaneLog(object):
+    """Plane log of a single plane
+
+    Accumulates the flights of a plane in order of departure and collects the
+    lines of the log. Flights of the same day, pilot in command and route are
+    summarised in one entry.
 
-class Stats(ToolBase):
-    """Create plane logs for a given time period
-  
     Arguments:
-        parent (:class:`~.tools.ToolBase`): Parent tool
+        plane (:class:`~.db.model.Airplane`): Plane
+        pilot (callable): Function returning the :class:`~.db.model.Pilot`
+           with a given id
+        landingOffset (int): Offset added to total number of landings.
+           Defaults to 0.
+        timeOffset (:class:`timedelta`): Offset added to total flight time.
+           Defaults to 0.
+        nonStrict (bool): Allow summation of flights with different PICs.
+           Defaults to ``False``.
     """
-    
-    def __init__(self, parent):
 
-        super(Stats, self).__init__(description=
-            "Calculate statistics for a given plane", parent=parent )
+    def __init__(self, plane, pilot, landingOffset=0, timeOffset=timedelta(),
+                       nonStrict=False):
+        self.plane= plane
+        self.lines= [] # lines of the log
 
-        self.config= self.defaultConfiguration(self.config)
-        self._initCmdLineArguments()        
+        self._pilot= pilot
+        self._nonStrict= nonStrict
 
-        self._plane= None
-        
         self._currentPic = None
         self._currentFrom= None
         self._currentTo  = None
         self._currentDay = None
         self._seats      = None
-        
+
         self._firstStart= None
-        self._lastLanding= None        
-        
+        self._lastLanding= None
+
         self._nLandings     = 0
         self._nLandingsToday= 0
-        self._nLandingsTotal= 0
-        
+        self._nLandingsTotal= int(landingOffset)
+
         self.flightTime     = timedelta()
         self.flightTimeToday= timedelta()
-        self.flightTimeTotal= timedelta()
+        self.flightTimeTotal= timeOffset
 
-        self._mandatoryFields= ["departure_time",
-                                "landing_time",
-                                "departure_location",
-                                "landing_location"]
 
+    def output(self, message):
+        """Append message to the log
 
-    def _exec(self):
-        """Execute tool.
-        
-        Method called by super class
+        Arguments:
+            message (string): Message to append
         """
-        if not self.config.registrations:
-            self.error("The registration of at least one plane has to be "
-                       "specified!")
-            self.displayHelp()
+        self.lines.append(message)
+
+
+    def add(self, flight):
+        """Add next flight of the plane
+
+        Arguments:
+            flight (:class:`~.db.model.Flight`): Flight departing not earlier
+               than the flights added before
+        """
+        # If this is the first flight -> create new entry
+        if not self._currentPic:
+            self.newDay( self.date(flight) )
+            self.newEntry(flight)
+            self.printHeader()
             return
-        
-        if self.config.time_offset:
-            times=self.config.time_offset.split(":")
-            if len(times) != 2:
-                self.error("Expected time-offset with format HH:MM, got {0}\n"
-                           .format(self.config.time_offset) )
-                return
-            self.config.time_offset=timedelta( hours=int(times[0]),
-                                               minutes=int(times[1]) )
-        else:
-            self.config.time_offset= timedelta()
 
-        self.parent.connectDatabase()
-        
-        #read records from input file
-        for registration in self.config.registrations:
-            self.printStats( registration )
+        # If we may add to an existing record -> add
+        if self.mayAdd(flight):
+            self.addEntry(flight)
+            return
 
+        # Print current entry
+        self.printEntry()
+
+        #Check if sums shall be printed.
+        if self._currentDay != self.date(flight):
+            self.printDailySums()
+            self.newDay( self.date(flight) )
+            self.printHeader()
+
+        self.newEntry(flight)
+
+
+    def addSummary(self, day, pic, departureLocation, landingLocation,
+                         firstStart, lastLanding, nLandings, flightTime,
+                         seats):
+        """Add next entry aggregated in database
+
+        Entries must be added in the order, in which :meth:`add` would create
+        them (see :meth:`~.db.Database.iterPlaneLogEntries`). The log is the
+        same as if the flights of the entry had been added one by one.
 
-    def printStats(self, registration):
-        """Print stats for a plane
-        
         Arguments:
-            registration (str): Registration of plane for which to print stats
-        
-        Raise:
-            :class:`KeyError` if no plane with this registration exists in
-            Database
-        """        
-        #reset sums
-        self._nLandingsTotal= int(self.config.landing_offset)
-        self.flightTimeTotal= self.config.time_offset 
-        for flight in self.flights(registration):
-
-            # Make sure all required fields are present
-            errors= self.hasErrors(flight)
-            if errors:
-                self.error("In flight\n  {0}\n -> {1}\n"
-                    .format( self.parent.db.makeRecord(flight) ,
-                             "\n -> ".join(errors) ) )
-                       
-            # If this is the first flight -> create new entry            
-            if not self._currentPic:
-                self.newDay(flight)
-                self.newEntry(flight)
-                self.printHeader()
-                continue
+            day (str): Date of the flights as ``YYYY-MM-DD``
+            pic (int): ID of the pilot in command of the first flight
+            departureLocation (str): Departure location
+            landingLocation (str): Landing location
+            firstStart (datetime): Departure time of the first flight
+            lastLanding (datetime): Landing time of the last flight
+            nLandings (int): Number of flights
+            flightTime (timedelta): Total flight time
+            seats (set): Seat counts of the flights as strings
+        """
+        if not self._currentPic:
+            self.newDay(day)
+            self.printHeader()
+        else:
+            self.printEntry()
 
-            # If we may add to an existing record -> add
-            if self.mayAdd(flight):
-                self.addEntry(flight)
-                continue
-            
-            # Print current entry
-            self.printEntry()            
-            
-            #Check if sums shall be printed.
-            if self._currentDay != self.date(flight):
+            if self._currentDay != day:
                 self.printDailySums()
-                self.newDay(flight)
+                self.newDay(day)
                 self.printHeader()
-                
-            self.newEntry(flight)
-       
+
+        self._currentPic = pic
+        self._currentFrom= departureLocation
+        self._currentTo  = landingLocation
+        self._seats= seats
+
+        self._firstStart = firstStart
+        self._lastLanding= lastLanding
+
+        self._nLandings      = nLandings
+        self._nLandingsToday+= nLandings
+        self._nLandingsTotal+= nLandings
+
+        self.flightTime      = flightTime
+        self.flightTimeToday+= flightTime
+        self.flightTimeTotal+= flightTime
+
+
+    def finish(self):
+        """Print the pending entry and the sums of the last day
+
+        Return:
+            Log as string
+        """
         if self._currentPic:
             self.printEntry()
             self.printDailySums()
         else:
-            self.write("\n++++++++++No flights found!+++++++++++\n")
-            
+            self.output("\n++++++++++No flights found!+++++++++++\n")
 
-    def hasErrors(self, flight):
-        """Make sure flight is valid
-        
-        Arguments:
-            flight (:class:`~.db.model.Flight`): Flight to validate
-            
-        Return:
-            List containing errors
-        """
-        errors=[]
-
-        for field in self._mandatoryFields:
-            if not getattr(flight, field):
-                errors.append("missing {0}".format(field))
-                
-        return errors
+        return u"".join(self.lines)
 
 
     def mayAdd(self, flight):
         """Check if flight may be added to current entry
-        
+
         Arguments:
-            flight (:class:`~.db.model.Flight`): Flight to add        
-        
+            flight (:class:`~.db.model.Flight`): Flight to add
+
         Return:
-            ``True`` if and only if flight may be added to current entry        
+            ``True`` if and only if flight may be added to current entry
         """
         if self._currentFrom != flight.departure_location:
             return False
-            
+
         if self._currentTo != flight.landing_location:
             return False
 
         if self._currentDay != self.date( flight):
             return False
-            
-        if not self.config.non_strict and self._currentPic != flight.pic():
+
+        if not self._nonStrict and self._currentPic != flight.pic():
             return False
 
         return True
-        
-        
+
+
     def newEntry(self, flight):
         """Start new entry in plane log
-        
+
         Arguments:
             flight (:class:`~.db.model.Flight`): Flight to initialise entry with
         """
         self._currentPic = flight.pic()
         self._currentFrom= flight.departure_location
         self._currentTo  = flight.landing_location
-                                              
+
         self._seats= set()
-        
+
         self._firstStart = flight.departure_time
         self._nLandings     = 0
         self.flightTime     = timedelta()
-        
+
         self.addEntry(flight)
 
 
-    def newDay(self, flight):
+    def newDay(self, day):
         """Start new day
-        
+
         Arguments:
-            flight (:class:`~.db.model.Flight`): Flight to initialise day with
+            day (str): Date as ``YYYY-MM-DD``
         """
-        self._currentDay = self.date(flight)
-                                              
+        self._currentDay = day
+
         self._nLandingsToday     = 0
         self.flightTimeToday     = timedelta()
-        
+
 
     def addEntry(self, flight):
         """Add flight to current entry
-        
+
         Arguments:
             flight (:class:`~.db.model.Flight`): Flight to add to current entry
         """
@@ -213,38 +240,48 @@ class Stats(ToolBase):
         else:
             self._seats.add("1")
 
-        self._lastLanding= flight.landing_time        
+        self._lastLanding= flight.landing_time
 
         self._nLandings     += 1
         self._nLandingsToday+= 1
         self._nLandingsTotal+= 1
-        
-        dt= flight.duration()        
-        
+
+        dt= flight.duration()
+
         self.flightTime     += dt
-        self.flightTimeToday+= dt 
+        self.flightTimeToday+= dt
         self.flightTimeTotal+= dt
 
 
+    def totals(self):
+        """Get the running totals
+
+        Return:
+            Tuple *(nLandings, flightTime)* of the total number of landings and
+            the total flight time as :class:`timedelta` including the offsets
+        """
+        return self._nLandingsTotal, self.flightTimeTotal
+
+
     def printHeader(self):
-        """Print log book header to log stream
+        """Print log book header
         """
         self.output(80*"+" + "\n")
         self.output( u"Datum|Nachname,      |Anz|Startort       |Start|# Ldg\n"
                      u"     |Vorname        |Crw|Landeort       |Ldg  |Zeit\n")
-      
+
 
     def printEntry(self):
-        """Print current entry to log stream
+        """Print current entry
         """
-        pilot= self.parent.db.pilot(self._currentPic)
+        pilot= self._pilot(self._currentPic)
 
         if self._nLandings == self._nLandingsToday:
             #First entry of the day -> user header delimiter
             self.output(80*"+" + "\n")
         else:
             self.output(80*"-" + "\n")
-       
+
         self.output( u"{0}.{1}|{3:15s}|{5:3s}|{6:15s}|{8}|{10:5d}|{12:8d}\n"
                      u"{2} |{4:15s}|   |{7:15s}|{9}|{11}|{13:>8s}\n"
                    .format( self._currentDay[8:10],
@@ -264,7 +301,7 @@ class Stats(ToolBase):
 
 
     def printDailySums(self):
-        """Print daily sums to log stream
+        """Print daily sums
         """
         self.output(80*"=" + "\n")
         self.output( "{0}{1:5d}\n"
@@ -273,31 +310,447 @@ class Stats(ToolBase):
                            self._nLandingsToday,
                            self.flightTimeStr(self.flightTimeToday)))
 
-        self.output("\n\n")    
-    
-    
-    def printTotals(self):
-        self.output("Total: TODO")
+        self.output("\n\n")
 
 
-    def flights(self, registration):
-        """Filter flights in database to plane and time constraints
+    @staticmethod
+    def date(flight):
+        """Get date of flight as string
         
         Arguments:
-            registration (str): Plan registration        
+            flight (:class:`~.db.model.Flight`): Flight to check            
         
         Return:
-            Iterable of flights matching *registration*
+            Departure date of flight as string
         """
-        timeFilter= self.timeConstraints()
+        return datetime.strftime(flight.departure_time, DATE_FORMAT)        
+
 
-        if timeFilter:
-            timeFilter=" AND ({0})".format(timeFilter)
+    @staticmethod
+    def flightTimeStr(dt):
+        """Print flight time to string
         
-        self._plane= self.parent.db.getPlaneByRegistration(registration)
-        filter="(plane_id = '{0}'){1}".format(self._plane.id, timeFilter)
+        Arguments:
+            dt (:class:`datetime`): datetime object containing time span
+            
+        Return:
+            Time span as string in format ``HH``\:``MM``.
+        """
+        s=int( dt.total_seconds() )
+        hrs= s // 3600
+        minutes= (s - hrs * 3600) // 60
+        return "{0:02d}:{1:02d}".format(hrs, minutes)        
+
+
+
+
+class Stats(ToolBase):
+    """Create plane logs for a given time period
+
+    The logs of all requested planes are created in a single pass over one
+    query ordered by departure time. Each plane has its own
+    :class:`PlaneLog`, pilots are looked up once for all logs. With
+    ``--aggregate``, the entries of the logs are computed by the database and
+    only one row per entry is transferred, if the database supports window
+    functions. With ``--summary``, only the
+    landings and flight time per day, month or year are printed. These are read
+    from the rollup table maintained by :mod:`pysk`, if it exists (see
+    :class:`~.tools.RebuildRollup`). With ``--cumulative``, the running totals
+    start with all flights before the time range, which are read from the
+    monthly checkpoints of the rollup.
+
+    Arguments:
+        parent (:class:`~.tools.ToolBase`): Parent tool
+    """
+
+    def __init__(self, parent):
+
+        super(Stats, self).__init__(description=
+            "Calculate statistics for a given plane", parent=parent )
+
+        self.config= self.defaultConfiguration(self.config)
+        self._initCmdLineArguments()
+
+        self._pilots= dict() # pilot id -> pilot, shared by all plane logs
+
+        self._mandatoryFields= ["departure_time",
+                                "landing_time",
+                                "departure_location",
+                                "landing_location"]
+
+
+    def _exec(self):
+        """Execute tool.
+
+        Method called by super class
+        """
+        if not self.config.registrations:
+            self.error("The registration of at least one plane has to be "
+                       "specified!")
+            self.displayHelp()
+            return
+
+        if self.config.time_offset:
+            times=self.config.time_offset.split(":")
+            if len(times) != 2:
+                self.error("Expected time-offset with format HH:MM, got {0}\n"
+                           .format(self.config.time_offset) )
+                return
+            self.config.time_offset=timedelta( hours=int(times[0]),
+                                               minutes=int(times[1]) )
+        else:
+            self.config.time_offset= timedelta()
+
+        self.parent.connectDatabase()
+
+        self.printStats(self.config.registrations)
+
+
+    def printStats(self, registrations):
+        """Print stats for planes
+
+        The logs are printed in the order of *registrations*.
+
+        Arguments:
+            registrations (list): Registrations of planes for which to print
+               stats
+
+        Raise:
+            :class:`KeyError` if no unique plane with one of the registrations
+            exists in Database
+        """
+        planes= self.planes(registrations)
+        offsets= self.offsets(planes)
+
+        if self.config.summary:
+            self.printTotals( self.printSummary(planes, self.config.summary,
+                                                offsets) )
+            return
+
+        logs= [ PlaneLog( plane,
+                          self.pilot,
+                          landingOffset= offsets[plane.id][0],
+                          timeOffset= offsets[plane.id][1],
+                          nonStrict= self.config.non_strict )
+                for plane in planes ]
+
+        byId= dict( (log.plane.id, log) for log in logs )
+
+        aggregate= self.config.aggregate
+        if aggregate and not self.parent.db.hasWindowFunctions():
+            self.warn("The database does not support window functions. "
+                      "Entries are not aggregated in database.\n")
+            aggregate= False
+
+        if aggregate:
+            self.aggregate(byId)
+        else:
+            for flight in self.flights( byId.keys() ):
+                self.checkFlight(flight)
+                byId[flight.plane_id].add(flight)
+
+        for log in logs:
+            self.output( log.finish() )
+
+        self.printTotals([ (log.plane,) + log.totals() for log in logs ])
+
+
+    def offsets(self, planes):
+        """Get the initial running totals of planes
+
+        The offsets given on the command line apply to all planes. With
+        ``--cumulative``, the flights of each plane before the time range are
+        added. They are read from the checkpoints maintained by :mod:`pysk`,
+        if these exist (see :meth:`~pysk.db.Database.planeTotals`).
+
+        Arguments:
+            planes (list): :class:`~.db.model.Airplane` instances
+
+        Return:
+            Dictionary with plane id as key and tuples *(landingOffset,
+            timeOffset)* as value
+        """
+        landingOffset= int(self.config.landing_offset)
+        timeOffset= self.config.time_offset
+
+        retval= dict( (plane.id, (landingOffset, timeOffset))
+                      for plane in planes )
+
+        begin, end= self.timeRange()
+        if self.config.cumulative and begin:
+            totals= self.parent.db.planeTotals( retval.keys(),
+                                                datetime.strftime(begin,
+                                                                  DATE_FORMAT) )
+            for planeId, (nFlights, seconds) in totals.iteritems():
+                retval[planeId]= ( landingOffset + nFlights,
+                                   timeOffset + timedelta(seconds=seconds) )
+
+        return retval
+
+
+    def aggregate(self, logs):
+        """Add the entries aggregated in database to the plane logs
+
+        Flights with missing fields are reported as when streaming. Flights
+        without departure or landing time are not aggregated.
+
+        Arguments:
+            logs (dict): Plane logs by plane id
+        """
+        db= self.parent.db
+        planes= Filter.isIn("plane_id", logs.keys())
+        times= Filter.all( Filter("departure_time IS NOT NULL"),
+                           Filter("landing_time IS NOT NULL") )
+
+        missing= Filter.any(*[ Filter("{0} IS NULL OR {0} = ''".format(field))
+                               if "location" in field else
+                               Filter("{0} IS NULL".format(field))
+                               for field in self._mandatoryFields ])
+
+        for flight in db.iterFlights( filter= Filter.all( planes,
+                                                          self.timeConstraints(),
+                                                          missing ),
+                                      order="departure_time, id",
+                                      columns=COLUMNS ):
+            self.checkFlight(flight)
+
+        for ( planeId, day, pic, departureLocation, landingLocation,
+              firstStart, lastLanding, nFlights, seconds, nWithCopilot ) \
+            in db.iterPlaneLogEntries( filter= Filter.all( planes,
+                                                           self.timeConstraints(),
+                                                           times ),
+                                       strict= not self.config.non_strict ):
+            seats= set()
+            if nWithCopilot:
+                seats.add("2")
+            if nWithCopilot < nFlights:
+                seats.add("1")
+
+            logs[planeId].addSummary( day, pic,
+                                      departureLocation, landingLocation,
+                                      firstStart, lastLanding,
+                                      nFlights, timedelta(seconds=seconds),
+                                      seats )
+
+
+    def printSummary(self, planes, period, offsets):
+        """Print landings and flight time per period
+
+        The sums per day are read from the rollup table, if it exists, i.e.
+        no flights are scanned (see :meth:`~pysk.db.Database.iterPlaneDays`).
+        Flights without departure or landing time are not counted.
+
+        Arguments:
+            planes (list): :class:`~.db.model.Airplane` instances
+            period (str): Key of :data:`PERIODS`
+            offsets (dict): Initial running totals by plane id as returned by
+               :meth:`offsets`
+
+        Return:
+            List of tuples *(plane, nLandings, flightTime)* with the running
+            totals at the end of the time range
+        """
+        begin, end= [ datetime.strftime(t, DATE_FORMAT) if t else None
+                      for t in self.timeRange() ]
+
+        sums= dict() # plane id -> list of [period, nLandings, seconds]
+        for planeId, day, pic, nFlights, seconds, nWithCopilot \
+            in self.parent.db.iterPlaneDays( [ plane.id for plane in planes ],
+                                             begin, end ):
+            rows= sums.setdefault(planeId, [])
+            key= day[:PERIODS[period]]
+
+            if not rows or rows[-1][0] != key:
+                rows.append([key, 0, 0])
+
+            rows[-1][1]+= nFlights
+            rows[-1][2]+= seconds
+
+        totals= []
+        for plane in planes:
+            rows= sums.get(plane.id, [])
+            landingOffset, timeOffset= offsets[plane.id]
+
+            self.output( self.summary(plane, rows, landingOffset, timeOffset) )
+            totals.append( ( plane,
+                             landingOffset + sum(row[1] for row in rows),
+                             timeOffset + timedelta( seconds= sum( row[2]
+                                                     for row in rows )) ))
+
+        return totals
+
+
+    def summary(self, plane, rows, landingOffset=0, timeOffset=timedelta()):
+        """Format the summary of a plane
+
+        Arguments:
+            plane (:class:`~.db.model.Airplane`): Plane
+            rows (list): Lists *[period, nLandings, seconds]* in order of time
+            landingOffset (int): Initial total number of landings. Defaults to
+               0.
+            timeOffset (:class:`timedelta`): Initial total flight time.
+               Defaults to 0.
+
+        Return:
+            Summary as string
+        """
+        lines= [ 80*"+" + "\n",
+                 u"{0}\n".format( plane.registration.decode("utf8") ),
+                 u"Zeitraum  |  # Ldg|     Zeit|Ldg total|Zeit total\n",
+                 80*"-" + "\n" ]
+
+        if not rows:
+            lines.append("\n++++++++++No flights found!+++++++++++\n\n")
+            return u"".join(lines)
+
+        nLandingsTotal= landingOffset
+        flightTimeTotal= timeOffset
+        nLandings= 0
+        flightTime= timedelta()
+
+        for key, n, seconds in rows:
+            dt= timedelta(seconds=seconds)
+
+            nLandings+= n
+            flightTime+= dt
+            nLandingsTotal+= n
+            flightTimeTotal+= dt
+
+            lines.append( u"{0:10s}|{1:7d}|{2:>9s}|{3:9d}|{4:>10s}\n"
+                          .format( key, n,
+                                   PlaneLog.flightTimeStr(dt),
+                                   nLandingsTotal,
+                                   PlaneLog.flightTimeStr(flightTimeTotal) ))
+
+        lines.append(80*"=" + "\n")
+        lines.append( u"{0:10s}|{1:7d}|{2:>9s}\n\n\n"
+                      .format( "Summe", nLandings,
+                               PlaneLog.flightTimeStr(flightTime) ))
+
+        return u"".join(lines)
+
+
+    def checkFlight(self, flight):
+        """Report missing fields of a flight
+
+        The plane log selects only :data:`COLUMNS`, so the complete flight is
+        read from database for the report.
+
+        Arguments:
+            flight (:class:`~.db.model.Flight`): Flight to validate
+        """
+        errors= self.hasErrors(flight)
+        if errors:
+            db= self.parent.db
+            record= next( db.makeRecords([ db.uniqueById(Flight, flight.id) ]) )
+
+            self.error("In flight\n  {0}\n -> {1}\n"
+                .format( record, "\n -> ".join(errors) ) )
+
+
+    def hasErrors(self, flight):
+        """Make sure flight is valid
+
+        Arguments:
+            flight (:class:`~.db.model.Flight`): Flight to validate
+
+        Return:
+            List containing errors
+        """
+        errors=[]
+
+        for field in self._mandatoryFields:
+            if not getattr(flight, field):
+                errors.append("missing {0}".format(field))
+
+        return errors
+
+
+    def printTotals(self, totals):
+        """Print the running totals of all planes at the end of the time range
+
+        Arguments:
+            totals (list): Tuples *(plane, nLandings, flightTime)* with
+               :class:`~.db.model.Airplane` instances and the total flight time
+               as :class:`timedelta`
+        """
+        self.output(80*"#" + "\n")
+        self.output(u"Kennzeichen    |Ldg total|Zeit total\n")
+
+        for plane, nLandings, flightTime in totals:
+            self.output( u"{0:15s}|{1:9d}|{2:>10s}\n"
+                         .format( plane.registration.decode("utf8"),
+                                  nLandings,
+                                  PlaneLog.flightTimeStr(flightTime) ))
+
+
+    def pilot(self, id):
+        """Get pilot by id
+
+        Pilots are read from database once and cached for all plane logs.
+
+        Arguments:
+            id (int): ID of pilot
+
+        Return:
+            :class:`~.db.model.Pilot` instance
+        """
+        retval= self._pilots.get(id)
+
+        if retval is None:
+            retval= self.parent.db.pilot(id)
+            self._pilots[id]= retval
+
+        return retval
+
+
+    def planes(self, registrations):
+        """Get planes by registration in a single query
+
+        Arguments:
+            registrations (list): Plane registrations. Duplicates are ignored.
+
+        Return:
+            List of :class:`~.db.model.Airplane` instances in the order of
+            *registrations*. Raises a :class:`KeyError` if either no plane or
+            more than one plane with one of the registrations exist.
+        """
+        registrations= sorted( set(registrations),
+                               key=registrations.index )
+
+        found= dict()
+        for plane in self.parent.db.iterate( Airplane,
+                                             filter= Filter.isIn("registration",
+                                                                 registrations) ):
+            found.setdefault(plane.registration, []).append(plane)
+
+        retval= []
+        for registration in registrations:
+            planes= found.get(registration, [])
+
+            if len(planes) != 1:
+                raise KeyError("Found {0} planes with registration '{1}'"
+                               .format(len(planes), registration))
+
+            retval.append(planes[0])
+
+        return retval
+
+
+    def flights(self, planeIds):
+        """Filter flights in database to planes and time constraints
+
+        Arguments:
+            planeIds (list): IDs of planes
+
+        Return:
+            Iterable of flights of the planes ordered by departure time
+        """
+        filter= Filter.all( Filter.isIn("plane_id", planeIds),
+                            self.timeConstraints() )
         return self.parent.db.iterFlights( filter=filter,
-                                           order="departure_time")
+                                           order="departure_time, id",
+                                           columns=COLUMNS )
 
 
     def _initCmdLineArguments(self):
@@ -326,12 +779,39 @@ class Stats(ToolBase):
                                  default=self.config.non_strict,
                                  action="store_true")
 
+        self.parser.add_argument("-A", "--aggregate",
+                                 help="Aggregate the log entries in the "
+                                      "database. Requires support of window "
+                                      "functions (MySQL 8.0, MariaDB 10.2, "
+                                      "SQLite 3.25). Otherwise the log is "
+                                      "computed from the flights.",
+                                 default=self.config.aggregate,
+                                 action="store_true")
 
-    def timeConstraints(self):
-        """Convert user specified time constraints to MySQL search string
+        self.parser.add_argument("-c", "--cumulative",
+                                 help="Start the running totals with all "
+                                      "flights before the time range. Read "
+                                      "from the checkpoints of the rollup "
+                                      "table, if it exists (see "
+                                      "rebuild-rollup).",
+                                 default=self.config.cumulative,
+                                 action="store_true")
+
+        self.parser.add_argument("-s", "--summary",
+                                 help="Print only landings and flight time "
+                                      "per period. Read from the rollup table, "
+                                      "if it exists (see rebuild-rollup).",
+                                 choices=sorted(PERIODS),
+                                 default=self.config.summary)
+
+
+    def timeRange(self):
+        """Convert user specified time constraints to a range of days
         
         Return:
-            MySQL compatible search string specifying the time range to search
+            Tuple *(begin, end)* of :class:`datetime` instances of the first
+            day and the day after the last day. Each is *None*, if the range
+            is unbounded.
         """
         begin= None
         end  = None
@@ -350,43 +830,26 @@ class Stats(ToolBase):
             else:
                 raise RuntimeError( "Invalid time string '{0}'"
                                     .format(self.config.time) )
-        parts=[]
-        if begin:
-            parts.append( "(departure_time >= '{0}')"
-                          .format( datetime.strftime(begin, DATE_FORMAT) ) )
-        if end:
-            parts.append( "(departure_time < '{0}')"
-                          .format( datetime.strftime(end, DATE_FORMAT) ) )
-        return " AND ".join(parts)
-                
-
-    @staticmethod    
-    def date(flight):
-        """Get date of flight as string
-        
-        Arguments:
-            flight (:class:`~.db.model.Flight`): Flight to check            
-        
-        Return:
-            Departure date of flight as string
-        """
-        return datetime.strftime(flight.departure_time, DATE_FORMAT)        
+        return begin, end
 
 
-    @staticmethod
-    def flightTimeStr(dt):
-        """Print flight time to string
+    def timeConstraints(self):
+        """Convert user specified time constraints to filter
         
-        Arguments:
-            dt (:class:`datetime`): datetime object containing time span
-            
         Return:
-            Time span as string in format ``HH``\:``MM``.
+            :class:`~pysk.db.Filter` specifying the time range to search or
+            ``None`` if no time range is specified
         """
-        s=int( dt.total_seconds() )
-        hrs= s // 3600
-        minutes= (s - hrs * 3600) // 60
-        return "{0:02d}:{1:02d}".format(hrs, minutes)        
+        begin, end= self.timeRange()
+        parts=[]
+        if begin:
+            parts.append( Filter( "departure_time >= %s",
+                                  datetime.strftime(begin, DATE_FORMAT) ))
+        if end:
+            parts.append( Filter( "departure_time < %s",
+                                  datetime.strftime(end, DATE_FORMAT) ))
+        return Filter.all(*parts)
+                
 
 
     @staticmethod
@@ -403,7 +866,9 @@ class Stats(ToolBase):
         config.time= None
         config.landing_offset= 0
         config.non_strict=False
+        config.aggregate=False
+        config.summary=None
+        config.cumulative=False
 
         return config        
 
-                    
\ No newline at end of file
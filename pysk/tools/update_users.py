@@ -108,6 +108,7 @@ class UpdateUsers(ToolBase):
         self.log("Creating user accounts {0} ...\n".format(clubMessage),
                  verbose=1)
         
+        users= []
         for pilot, user, pwd in self.parent.db.createUsersFromPilots():
        
             self.log("Creating account for pilot {0} ...\n".format(pilot),
@@ -133,14 +134,11 @@ class UpdateUsers(ToolBase):
                          subject= self.config.subject,
                          sender= self.config.sender )
             
-            self.log("Adding user '{0}' to database ...\n"
-                     .format(user.username),
-                     verbose=3)
-
-            self.parent.db.insertUsers([user])
-            self.log("Successfully added user {0}\n".format(user.username),
-                     verbose=2)        
+            users.append(user)
         
+        self.log("Adding {0} users to database ...\n".format(len(users)),
+                 verbose=2)
+        self.parent.db.insertUsers(users)
         self.parent.db.commit()
 
 
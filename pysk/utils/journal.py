@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+import io, os, json
+from hashlib import sha1
+
+
+def fileHash(path, blockSize=1<<20):
+    """Compute SHA-1 hash of a file
+
+    Arguments:
+        path (str): Path to file
+        blockSize (int): Number of bytes read at once. Defaults to 1 MiB.
+
+    Return:
+        Hex digest of the file content
+    """
+    digest= sha1()
+
+    with io.open(path, "rb") as iFile:
+        for block in iter(lambda: iFile.read(blockSize), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+
+class Journal(object):
+    """On-disk progress record of an import
+
+    Stores the hash of the input file, the options affecting how the file is
+    parsed, the number of records committed so far and the replies given to
+    conflicts, such that an aborted import can be resumed. The journal is
+    written to a temporary file, which replaces the previous journal, i.e. an
+    abort while saving leaves the previous state intact.
+
+    Arguments:
+        path (str): Path to journal file
+        source (str): Path to input file
+        options (dict): Options the import depends on. Defaults to *None*
+           (empty dictionary).
+    """
+
+    def __init__(self, path, source, options=None):
+        """Create new journal
+        """
+        self.path= path
+        self.source= source
+        self.sha1= fileHash(source)
+        self.options= dict(options or {})
+        self.committed= 0 # number of records committed
+        self.decisions= dict() # recorded replies by candidate key
+
+
+    def exists(self):
+        """Check if the journal file exists
+
+        Return:
+            ``True`` if and only if the journal has been saved before
+        """
+        return os.path.exists(self.path)
+
+
+    def load(self):
+        """Read progress from journal file
+
+        Raises a :class:`ValueError` if the journal belongs to another input
+        file or was written with different options.
+        """
+        with io.open(self.path, "rb") as iFile:
+            data= json.load(iFile)
+
+        if data.get("sha1") != self.sha1:
+            raise ValueError("Journal '{0}' does not match input file '{1}'"
+                             .format(self.path, self.source))
+
+        if data.get("options") != json.loads( json.dumps(self.options) ):
+            raise ValueError("Journal '{0}' was written with different options"
+                             .format(self.path))
+
+        self.committed= data["committed"]
+        self.decisions.clear()
+        self.decisions.update( data.get("decisions", {}) )
+
+
+    def save(self):
+        """Write progress to journal file
+        """
+        data= { "source": os.path.basename(self.source),
+                "sha1": self.sha1,
+                "options": self.options,
+                "committed": self.committed,
+                "decisions": self.decisions }
+
+        tmpPath= self.path + ".tmp"
+
+        with io.open(tmpPath, "wb") as oFile:
+            json.dump(data, oFile, sort_keys=True)
+            oFile.flush()
+            os.fsync( oFile.fileno() )
+
+        os.rename(tmpPath, self.path)
+
+
+    def remove(self):
+        """Delete journal file, if any
+        """
+        if self.exists():
+            os.remove(self.path)
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+
+import re
+from datetime import datetime
+
+
+#: Supported :func:`strptime` directives. Each directive is mapped to the index
+#: of the respective field in the tuple returned by :class:`TimeParser` and
+#: the regular expression used by :func:`strptime` itself.
+DIRECTIVES= {
+    'Y': (0, r"(\d\d\d\d)"),
+    'y': (0, r"(\d\d)"),
+    'm': (1, r"(1[0-2]|0[1-9]|[1-9])"),
+    'd': (2, r"(3[01]|[12]\d|0[1-9]|[1-9]| [1-9])"),
+    'H': (3, r"(2[0-3]|[0-1]\d|\d)"),
+    'M': (4, r"([0-5]\d|\d)"),
+    'S': (5, r"(6[0-1]|[0-5]\d|\d)")
+}
+
+#: Fields not specified by a format take the same default values as in
+#: :func:`strptime`
+DEFAULTS= (1900, 1, 1, 0, 0, 0)
+
+#: Indexes of the date fields
+DATE_FIELDS= (0, 1, 2)
+
+#: Indexes of the time fields
+TIME_FIELDS= (3, 4, 5)
+
+
+class TimeParser(object):
+    """Parser for date or time strings in :func:`strptime` notation
+
+    Formats consisting of the directives in :data:`DIRECTIVES`, ``%%`` and
+    literal characters are compiled into a single regular expression, which
+    matches the same strings as :func:`strptime`. Other formats are parsed by
+    :func:`strptime`. Results are cached, since the same dates and times occur
+    many times in flight records.
+
+    Arguments:
+        format (str): Format in :func:`strptime` notation
+        cacheSize (int): Maximum number of cached results. Defaults to 4096.
+    """
+
+    def __init__(self, format, cacheSize=4096):
+        """Create new parser
+        """
+        self.format= format
+        self.cacheSize= cacheSize
+        self.fields= None # indexes of parsed fields, None if not compiled
+        self._regex= None
+        self._cache= dict()
+        self._compile()
+
+
+    def _compile(self):
+        """Translate format to regular expression
+        """
+        pattern= []
+        fields= []
+        i= 0
+
+        while i < len(self.format):
+            c= self.format[i]
+
+            if c != '%':
+                if c.isspace():
+                    if not pattern or pattern[-1] != r"\s+":
+                        pattern.append(r"\s+")
+                else:
+                    pattern.append( re.escape(c) )
+                i+= 1
+                continue
+
+            directive= self.format[i+1:i+2]
+            i+= 2
+
+            if directive == '%':
+                pattern.append("%")
+                continue
+
+            if directive not in DIRECTIVES:
+                return
+
+            index, regex= DIRECTIVES[directive]
+
+            if index in fields:
+                return
+
+            fields.append(index)
+            pattern.append(regex)
+
+        self.fields= fields
+        self._twoDigitYear= "%y" in self.format
+        self._regex= re.compile("".join(pattern) + r"\Z", re.IGNORECASE)
+
+
+    def compiled(self):
+        """Check if the format has been compiled
+
+        Return:
+            ``True`` if and only if strings are parsed without :func:`strptime`
+        """
+        return self._regex is not None
+
+
+    def __call__(self, string):
+        """Parse string
+
+        Raises a :class:`ValueError` if *string* does not match the format.
+
+        Arguments:
+            string (str): String to parse
+
+        Return:
+            Tuple ``(year, month, day, hour, minute, second)``
+        """
+        retval= self._cache.get(string)
+
+        if retval is None:
+            retval= self._parse(string)
+
+            if len(self._cache) >= self.cacheSize:
+                self._cache.clear()
+
+            self._cache[string]= retval
+
+        return retval
+
+
+    def _parse(self, string):
+        """Parse string without cache
+
+        Arguments:
+            string (str): String to parse
+
+        Return:
+            Tuple ``(year, month, day, hour, minute, second)``
+        """
+        if self._regex is None:
+            return datetime.strptime(string, self.format).timetuple()[:6]
+
+        match= self._regex.match(string)
+
+        if match is None:
+            raise ValueError("time data '{0}' does not match format '{1}'"
+                             .format(string, self.format))
+
+        retval= list(DEFAULTS)
+
+        for index, value in zip(self.fields, match.groups()):
+            retval[index]= int(value)
+
+        if self._twoDigitYear:
+            retval[0]+= 2000 if retval[0] <= 68 else 1900
+
+        # validate day of month
+        datetime(*retval)
+
+        return tuple(retval)
+
+
+
+class DateTimeParser(object):
+    """Parser combining separate date and time strings to :class:`datetime`
+
+    Equivalent to ``datetime.strptime(date + "T" + time, dateformat + "T" +
+    timeformat)``. If the date format contains date fields only and the time
+    format contains time fields only, both parts are parsed and cached
+    separately by a :class:`TimeParser`. Otherwise :func:`strptime` is used.
+
+    Arguments:
+        dateformat (str): Date format in :func:`strptime` notation
+        timeformat (str): Time format in :func:`strptime` notation
+    """
+
+    def __init__(self, dateformat, timeformat):
+        """Create new parser
+        """
+        self.format= dateformat + "T" + timeformat
+        self._date= TimeParser(dateformat)
+        self._time= TimeParser(timeformat)
+
+        if not ( self._date.compiled() and self._time.compiled()
+                 and set(self._date.fields) <= set(DATE_FIELDS)
+                 and set(self._time.fields) <= set(TIME_FIELDS) ):
+            self._date= None
+            self._time= None
+
+
+    def __call__(self, date, time):
+        """Parse date and time
+
+        Raises a :class:`ValueError` if either string does not match the
+        respective format.
+
+        Arguments:
+            date (str): Date string
+            time (str): Time string
+
+        Return:
+            :class:`datetime` instance
+        """
+        if self._date is None:
+            return datetime.strptime(date + "T" + time, self.format)
+
+        return datetime( *(self._date(date)[:3] + self._time(time)[3:]) )
@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 
 import unittest
-from pysk.db import ConflictHandler
+import random
+from datetime import datetime, timedelta
+from pysk.db import ConflictHandler, Database, Record, SQLiteBackend
+from pysk.db.model import Flight, Pilot, Airplane
 import pysk.db.conflict_handler as ch
 
 # The following tests assume that a database startkladde-test exists with a
@@ -32,8 +35,102 @@ class ConflictHandlerTestCase(unittest.TestCase):
 
         self.assertEqual( self.warnString(), "missing landing time"
                                              ",missing departure location")
+
+
+    def test_commitInterval(self):
+        db= Database( backend= SQLiteBackend(":memory:") )
+        handler= ConflictHandler( db, mode= ch.IGNORE_ALL_CONFLICTS,
+                                  verbose= 0,
+                                  commitInterval= 3 )
+        t0= datetime(2015, 5, 1, 10, 0)
+        
+        for i in xrange(7):
+            dt= timedelta(hours=i)
+            handler( Record( Flight( plane_id=1, pilot_id=1, mode="local",
+                                     departure_location="A",
+                                     landing_location="A",
+                                     departure_time= t0 + dt,
+                                     landing_time= t0 + dt
+                                                   + timedelta(minutes=30) )))
         
+        self.assertEqual(handler.nProcessed, 7)
+        self.assertEqual(handler.nCommits, 2)
         
+        db.rollback()
+        self.assertEqual(len( list(db.iterFlights()) ), 6)
+        
+        handler.checkpoint(force=True)
+        self.assertEqual(handler.nCommits, 3)
+
+
+    def importRandomFlights(self, useIndex):
+        rng= random.Random(7)
+        db= Database( backend= SQLiteBackend(":memory:") )
+        handler= ConflictHandler( db, mode= ch.REJECT_ON_CONFLICT, verbose= 0 )
+        
+        if useIndex:
+            handler.loadIndex( datetime(2015, 5, 1), datetime(2015, 5, 3) )
+        
+        for i in xrange(300):
+            departure= ( datetime(2015, 5, 1)
+                         + timedelta(seconds= rng.randrange(86400)) )
+            flight= Flight( plane_id= rng.randint(1, 20),
+                            pilot_id= rng.randint(1, 40),
+                            mode="local",
+                            departure_location="A",
+                            landing_location="A",
+                            departure_time= departure,
+                            landing_time= departure
+                                          + timedelta(minutes=rng.randint(1, 60)) )
+            handler( Record(flight) )
+        
+        return [ (f.id, f.pilot_id, f.departure_time)
+                 for f in db.iterFlights(order="id") ]
+
+
+    def test_index(self):
+        self.assertEqual( self.importRandomFlights(useIndex=True),
+                          self.importRandomFlights(useIndex=False) )
+
+
+    def test_decisions(self):
+        db= Database( backend= SQLiteBackend(":memory:") )
+        t0= datetime(2015, 5, 1, 10, 0)
+
+        def flight(plane_id):
+            return Flight( plane_id=plane_id, pilot_id=1, mode="local",
+                           departure_location="A", landing_location="A",
+                           departure_time=t0,
+                           landing_time=t0 + timedelta(minutes=30) )
+
+        db.insert(Pilot, [ Pilot(id=1, last_name="Doe", first_name="John") ])
+        db.insert(Airplane, [ Airplane(id=i, registration="D-000{0}".format(i))
+                              for i in xrange(1, 5) ])
+        db.insertFlights([ flight(1) ])
+
+        decisions= dict()
+        checkpoints= []
+        handler= ConflictHandler( db, verbose=0, commitInterval=1,
+                                  decisions=decisions,
+                                  checkpointFunctor=checkpoints.append )
+        handler._dialog= lambda selection: 'i'
+        handler( next(db.makeRecords([ flight(2) ])), key=7 )
+
+        self.assertEqual(decisions, {"7/conflicts": 'i'})
+        self.assertEqual(checkpoints, [handler])
+
+        def dialog(selection):
+            raise AssertionError("Recorded reply not reused")
+
+        handler= ConflictHandler( db, verbose=0, decisions=decisions )
+        handler._dialog= dialog
+        handler( next(db.makeRecords([ flight(3) ])), key=7 )
+
+        self.assertEqual(len( list(db.iterFlights()) ), 3)
+
+        with self.assertRaises(AssertionError):
+            handler( next(db.makeRecords([ flight(4) ])), key=8 )
+
         
 
 #TODO: More tests required        
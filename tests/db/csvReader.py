@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import os
+from StringIO import StringIO
+from tempfile import mkstemp
+from pysk.db import CsvReader
+
+
+HEADER= ( "Datum;Kennzeichen;Pilot Vorname;Pilot Nachname;Begleiter Vorname;"
+          "Begleiter Nachname;Flugtyp;Anzahl Landungen;Modus;Startzeit;"
+          "Landezeit;Startart;Modus Schleppflugzeug;Startort;Zielort;"
+          "Bemerkungen;Abrechnungshinweis;DBID\n" )
+
+
+def line(id, time, registration="D-1234", type="Normalflug"):
+    """Create csv line of a local flight
+    """
+    return ( "2015-05-01;{1};John;Doe;;;{2};1;Lokal;{3};{3};Winde;;Home;Home;;;"
+             "{0}\n".format(id, registration, type, time) )
+
+
+def towLine(id, time):
+    """Create csv line of a towflight
+    """
+    return line(id, time, registration="D-KXYZ", type="Schlepp")
+
+
+
+class CsvReaderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path= mkstemp(suffix=".csv")
+        os.close(fd)
+        self.log= StringIO()
+        self.reader= CsvReader(logStream=self.log, verbose=0)
+
+
+    def tearDown(self):
+        os.remove(self.path)
+
+
+    def read(self, lines, window=100):
+        with open(self.path, "w") as oFile:
+            oFile.write(HEADER)
+            oFile.writelines(lines)
+            
+        return list( self.reader.iterate(self.path, window=window) )
+
+
+    def test_iterate(self):
+        records= self.read([ line(i, "10:{0:02d}".format(i))
+                             for i in xrange(1, 11) ])
+        
+        self.assertEqual( [rec.flight.id for rec in records],
+                          [str(i) for i in xrange(1, 11)] )
+        self.assertEqual( records[0].pilot.last_name, "Doe" )
+
+
+    def test_mergeTowflights(self):
+        records= self.read([ line(1, "10:00"),
+                             line(2, "10:05"),
+                             towLine(1, "10:00"),
+                             towLine(3, "10:10"),
+                             line(4, "10:15"),
+                             line(3, "10:10") ], window=2)
+        
+        self.assertEqual( [rec.flight.id for rec in records],
+                          ["1", "2", "4", "3"] )
+        self.assertEqual( records[0].towplane.registration, "D-KXYZ" )
+        self.assertEqual( records[3].towplane.registration, "D-KXYZ" )
+        self.assertEqual( records[1].towplane.registration, None )
+
+
+    def test_call(self):
+        with open(self.path, "w") as oFile:
+            oFile.write(HEADER)
+            oFile.writelines([ towLine(2, "10:05"),
+                               line(1, "10:00"),
+                               line(2, "10:05"),
+                               towLine(1, "10:00"),
+                               towLine(3, "10:10") ])
+            
+        records= self.reader(self.path)
+        
+        self.assertEqual( [rec.flight.id for rec in records], ["1", "2", "3"] )
+        self.assertEqual( records[0].towplane.registration, "D-KXYZ" )
+        self.assertEqual( records[1].towplane.registration, "D-KXYZ" )
+        self.assertIn( "No matching flight for towflight 3", self.log.getvalue() )
+
+
+    def test_window(self):
+        records= self.read([ line(1, "10:00"),
+                             line(2, "10:05"),
+                             line(3, "10:10"),
+                             towLine(1, "10:00") ], window=2)
+        
+        self.assertEqual( [rec.flight.id for rec in records],
+                          ["1", "2", "3", "1"] )
+        self.assertIn( "Towflight 1", self.log.getvalue() )
+
+
+    def test_mismatch(self):
+        records= self.read([ line(1, "10:00"), towLine(1, "10:01") ])
+        
+        self.assertEqual( len(records), 2 )
+        self.assertIn( "mismatch", self.log.getvalue() )
+
+
+    def test_splitFile(self):
+        with open(self.path, "w") as oFile:
+            oFile.write(HEADER)
+            
+            for i in xrange(1, 51):
+                oFile.write( line(i, "10:{0:02d}".format(i)) )
+                
+                if i % 2:
+                    oFile.write( towLine(i, "10:{0:02d}".format(i)) )
+        
+        spans= CsvReader.splitFile(self.path, 4, minSize=1)
+        
+        self.assertEqual( len(spans), 4 )
+        self.assertEqual( spans[0][0], len(HEADER) )
+        self.assertEqual( spans[-1][1], os.path.getsize(self.path) )
+        
+        records= [ rec for span in spans
+                       for rec in self.reader( self.path,
+                                               mergeTowflights=False,
+                                               span=span ) ]
+        self.assertEqual( len(records), 75 )
+        
+        self.reader.merge(records)
+        expected= self.reader(self.path)
+        
+        self.assertEqual( [ (rec.flight.id, rec.towplane.registration)
+                            for rec in records ],
+                          [ (rec.flight.id, rec.towplane.registration)
+                            for rec in expected ] )
+        self.assertEqual( CsvReader.splitFile(self.path, 4),
+                          [ (spans[0][0], spans[-1][1]) ] )
+
+
+    def test_encoding(self):
+        with open(self.path, "w") as oFile:
+            oFile.write(HEADER)
+            oFile.write( line(1, "10:00").replace("Doe", "M\xfcller") )
+            
+        records= list( self.reader.iterate(self.path, encoding="windows-1252") )
+        
+        self.assertEqual( records[0].pilot.last_name, "M\xc3\xbcller" )
+
+
+    def test_decodeError(self):
+        records= self.read([ line(1, "10:00"),
+                             line(2, "10:05").replace("Doe", "M\xfcller"),
+                             line(3, "10:10") ])
+        
+        self.assertEqual( [rec.flight.id for rec in records], ["1", "3"] )
+        self.assertEqual( self.reader.nErrors, 1 )
+        self.assertIn( "line 3", self.log.getvalue() )
+
+
+    def test_missingColumn(self):
+        with open(self.path, "w") as oFile:
+            oFile.write( HEADER.replace("Startzeit;", "") )
+            
+        with self.assertRaises(KeyError):
+            list( self.reader.iterate(self.path) )
+
+
+
+def suite():
+    """Get Test suite object
+    """
+    return unittest.TestLoader().loadTestsFromTestCase(CsvReaderTestCase)
+
+
+
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run( suite() )
@@ -1,31 +1,287 @@
 # -*- coding: utf-8 -*-
 
 import unittest
-from pysk.db import Database
+import sqlite3
+from datetime import datetime, timedelta
+from pysk.db import Database, Filter, MySQLBackend, SQLiteBackend
+from pysk.db.model import Airplane, Flight, LaunchMethod, Pilot
 
-# The following tests assume that a database startkladde-test exists with a
-# user sk-test-user with password sk
+# The following tests run against an in-memory SQLite database. The same tests
+# can be run against a MySQL database startkladde-test with a user
+# sk-test-user and password sk by replacing the backend.
 
 class DatabaseTestCase(unittest.TestCase):
 
-    @classmethod
-    def setUpClass(cls):
-        cls.db= Database( user="sk-test-user",
-                          dbName="startkladde-test",
-                          password="sk")
+    def setUp(self):
+        self.db= Database( backend= SQLiteBackend(":memory:") )
+        self.db.insertPilots([ Pilot(1, "Doe", "John", "LSV"),
+                               Pilot(2, "Roe", "Jane", "LSV"),
+                               Pilot(3, "Poe", "Edgar", "FSV") ])
+        self.db.insertFlights([
+            Flight( id=1, plane_id=1, pilot_id=1, mode="local",
+                    departure_time= datetime(2015, 5, 1, 10, 0),
+                    landing_time= datetime(2015, 5, 1, 11, 0) ),
+            Flight( id=2, plane_id=2, pilot_id=2, mode="local",
+                    departure_time= datetime(2015, 5, 1, 10, 30),
+                    landing_time= datetime(2015, 5, 1, 12, 0) ),
+            Flight( id=3, plane_id=1, pilot_id=3, mode="local",
+                    departure_time= datetime(2015, 5, 2, 10, 0),
+                    landing_time= datetime(2015, 5, 2, 10, 5) ) ])
+        self.db.commit()
 
-    @classmethod
-    def tearDownClass(cls):
-        cls.db.disconnect()
+
+    def tearDown(self):
+        self.db.disconnect()
 
 
     def test_reconnect(self):
         self.db.disconnect()
-        self.db.connect( user="sk-test-user",
-                         dbName="startkladde-test",
-                         password="sk")
+        self.db.connect()
+        self.assertEqual(list(self.db.iterPilots()), [])
+
+
+    def test_tables(self):
+        tables= self.db.getTables()
+        
+        for name in ["flights", "people", "planes", "launch_methods", "users"]:
+            self.assertIn(name, tables)
+            
+        self.assertTrue( tables["flights"].columns[0].isPrimaryIndex() )
+        self.assertTrue( tables["flights"].columns[0].hasAutoIncrement() )
+
+
+    def test_iterate(self):
+        flights= list( self.db.iterFlights(order="id") )
+        
+        self.assertEqual([f.id for f in flights], [1, 2, 3])
+        self.assertEqual(flights[0].departure_time, datetime(2015, 5, 1, 10, 0))
+        
+        selection= Filter("departure_time >= %s", "2015-05-02")
+        self.assertEqual([f.id for f in self.db.iterFlights(selection)], [3])
+
+
+    def test_stream(self):
+        streamed= [ f.id for f in self.db.iterFlights(order="id", stream=True,
+                                                      columns=("id",)) ]
+        self.assertEqual(streamed, [1, 2, 3])
+
+
+    def test_unique(self):
+        self.assertEqual(self.db.getPilotByName("Jane", "Roe").id, 2)
+        self.assertEqual(self.db.pilot(3).last_name, "Poe")
+        self.assertRaises(KeyError, self.db.pilot, 4)
+
+
+    def test_uniqueWhileStreaming(self):
+        self.db.streaming= True
+        self.db.fetchSize= 2
+
+        names= [ self.db.pilot(f.pilot_id).last_name
+                 for f in self.db.iterFlights(order="id") ]
+        self.assertEqual(names, ["Doe", "Roe", "Poe"])
+
+        similar= [ len(list( self.db.iterSimilarFlights(f) ))
+                   for f in self.db.iterFlights(order="id") ]
+        self.assertEqual(similar, [1, 1, 1])
+
+
+    def test_similarFlights(self):
+        similar= self.db.iterSimilarFlights( Flight( plane_id=2, pilot_id=1,
+            departure_time= datetime(2015, 5, 1, 10, 45),
+            landing_time= datetime(2015, 5, 1, 10, 50) ))
+        
+        self.assertEqual(sorted(f.id for f in similar), [1, 2])
+
+
+    def test_insert(self):
+        pilots= [ Pilot(None, "Doe", str(i)) for i in xrange(10) ]
+        self.db.insertPilots(pilots, chunkSize=3)
+        self.assertEqual( len(list(self.db.iterPilots())), 13 )
+        
+        self.db.insertPilots([Pilot(1, "Doe", "Jim")])
+        self.assertEqual(self.db.pilot(1).first_name, "John")
+        
+        self.db.insertPilots([Pilot(1, "Doe", "Jim")], force=True)
+        self.assertEqual(self.db.pilot(1).first_name, "Jim")
+
+
+    def test_delete(self):
+        self.db.deleteFlights([1, 3])
+        self.assertEqual([f.id for f in self.db.iterFlights()], [2])
+        
+        self.db.delete(Pilot, Filter.equal("club", "LSV"))
+        self.assertEqual([p.id for p in self.db.iterPilots()], [3])
+
+
+    def test_update(self):
+        self.db.updateFlight("pilot_id=3", Filter.equal("pilot_id", 1))
+        self.assertEqual( sorted(f.id for f in self.db.iterFlights(
+                                                Filter.equal("pilot_id", 3))),
+                          [1, 3] )
+
+
+    def test_rollback(self):
+        self.db.deletePilots([1])
+        self.db.rollback()
+        self.assertEqual(self.db.pilot(1).id, 1)
+
+
+    def test_planeLogEntries(self):
+        if not self.db.hasWindowFunctions():
+            self.skipTest("SQLite without window functions")
+
+        t0= datetime(2015, 5, 1, 12, 0)
+        self.db.insertFlights([
+            Flight( id=10 + i, plane_id=3, pilot_id=pilot, copilot_id=copilot,
+                    type=type, mode="local",
+                    departure_location="A", landing_location="A",
+                    departure_time= t0 + timedelta(minutes=10*i),
+                    landing_time= t0 + timedelta(minutes=10*i + 5, seconds=30) )
+            for i, (pilot, copilot, type) in enumerate([ (1, None, "normal"),
+                                                         (1, 2, "normal"),
+                                                         (2, 1, "training_2"),
+                                                         (2, None, "normal"),
+                                                         (1, None, "normal") ])
+        ])
+
+        entries= self.db.iterPlaneLogEntries( Filter.equal("plane_id", 3) )
+
+        self.assertEqual( [ entry[2] for entry in entries ], [1, 2, 1] )
+        self.assertEqual( entries[0], ( 3, "2015-05-01", 1, "A", "A",
+                                        t0 + timedelta(minutes=0),
+                                        t0 + timedelta(minutes=25, seconds=30),
+                                        3, 990, 2 ) )
+
+        entries= self.db.iterPlaneLogEntries( Filter.equal("plane_id", 3),
+                                              strict=False )
+        self.assertEqual( [ (entry[2], entry[7]) for entry in entries ],
+                          [ (1, 5) ] )
+
+
+    def test_windowFunctions(self):
+        self.assertEqual( self.db.hasWindowFunctions(),
+                          sqlite3.sqlite_version_info >= (3, 25) )
+
+        sqlite= SQLiteBackend()
+        self.assertFalse( sqlite.supportsWindowFunctions("3.24.0") )
+        self.assertTrue( sqlite.supportsWindowFunctions("3.25.0") )
+
+        mysql= MySQLBackend()
+        self.assertFalse( mysql.supportsWindowFunctions("5.7.42-log") )
+        self.assertTrue( mysql.supportsWindowFunctions("8.0.33") )
+        self.assertFalse( mysql.supportsWindowFunctions("10.1.48-MariaDB") )
+        self.assertTrue( mysql.supportsWindowFunctions("10.6.12-MariaDB") )
+
+
+    def test_rollup(self):
+        expected= [ (1, "2015-05-01", 1, 1, 3600, 0),
+                    (1, "2015-05-02", 3, 1, 300, 0),
+                    (2, "2015-05-01", 2, 1, 5400, 0) ]
+
+        self.assertFalse( self.db.hasRollup() )
+        self.assertEqual( self.db.iterPlaneDays([1, 2]), expected )
+
+        self.assertEqual( self.db.rebuildRollup(), 3 )
+        self.db.commit()
+        self.assertTrue( self.db.hasRollup() )
+        self.assertEqual( self.db.iterPlaneDays([1, 2]), expected )
+        self.assertEqual( self.db.iterPlaneDays([1], begin="2015-05-02"),
+                          expected[1:2] )
+
+        self.db.insertFlights([
+            Flight( id=4, plane_id=1, pilot_id=1, copilot_id=2, mode="local",
+                    departure_time= datetime(2015, 5, 1, 14, 0),
+                    landing_time= datetime(2015, 5, 1, 14, 30) ) ])
+        self.db.insertFlights([
+            Flight( id=3, plane_id=2, pilot_id=3, mode="local",
+                    departure_time= datetime(2015, 5, 2, 10, 0),
+                    landing_time= datetime(2015, 5, 2, 10, 5) ) ], force=True)
+        self.db.commit()
+        self.assertEqual( self.db.iterPlaneDays([1]),
+                          [ (1, "2015-05-01", 1, 2, 5400, 1) ] )
+
+        self.db.updateFlight("plane_id=1", Filter.equal("id", 2))
+        self.db.deleteFlights([1])
+        self.db.commit()
+        self.assertEqual( self.db.checkRollup(), [] )
+
+        self.db.deleteFlights([4])
+        self.db.rollback()
+        self.assertEqual( self.db.checkRollup(), [] )
+
+        self.db.delete(Flight, "id=4")
+        self.assertEqual( self.db.checkRollup(), [(1, "2015-05-01", 1)] )
+        self.assertEqual( len( self.db.iterPlaneDays([1]) ), 1 )
+        self.assertEqual( self.db.checkRollup(), [] )
+
+
+    def test_planeTotals(self):
+        self.db.insertFlights([
+            Flight( id=4, plane_id=1, pilot_id=1, mode="local",
+                    departure_time= datetime(2015, 6, 3, 10, 0),
+                    landing_time= datetime(2015, 6, 3, 10, 10) ) ])
+
+        expected= { 1: (2, 3900), 2: (1, 5400) }
+        self.assertEqual( self.db.planeTotals([1, 2], "2015-06-03"), expected )
+
+        self.db.rebuildRollup()
+        self.db.commit()
+        self.assertEqual( self.db.planeTotals([1, 2], "2015-06-03"), expected )
+        self.assertEqual( self.db.planeTotals([1, 2], "2015-05-02"),
+                          { 1: (1, 3600), 2: (1, 5400) } )
+        self.assertEqual( self.db.planeTotals([1, 3], "2015-07-02"),
+                          { 1: (3, 4500), 3: (0, 0) } )
+
+        self.db.deleteFlights([1])
+        self.db.commit()
+        self.assertEqual( self.db.planeTotals([1], "2015-07-02"),
+                          { 1: (2, 900) } )
+        self.assertEqual( self.db.checkCheckpoints(), [] )
+
+
+    def test_iterRecords(self):
+        self.db.insert( Airplane, [ Airplane(1, "D-1234"),
+                                    Airplane(2, "D-5678"),
+                                    Airplane(3, "D-KXYZ") ])
+        self.db.insert( LaunchMethod, [
+            LaunchMethod(1, "Winch", "W", type="winch"),
+            LaunchMethod(2, "Airtow D-KXYZ", "D-KXYZ", type="airtow",
+                         towplane_registration="D-KXYZ") ])
+        self.db.updateFlight("launch_method_id=1")
+        self.db.insertFlights([
+            Flight( id=4, plane_id=2, pilot_id=1, copilot_id=2, towpilot_id=3,
+                    launch_method_id=2, mode="local",
+                    departure_time= datetime(2015, 5, 3, 10, 0),
+                    landing_time= datetime(2015, 5, 3, 10, 30) ) ])
+
+        def ids(records):
+            return [ ( rec.flight.id, rec.plane.id, rec.pilot.id,
+                       rec.copilot.id, rec.towpilot.id, rec.launch_method.id,
+                       rec.towplane.id )
+                     for rec in records ]
+
+        flights= list( self.db.iterFlights(order="id") )
+        expected= ids( self.db.makeRecords(flights) )
+
+        self.assertEqual( expected[3], (4, 2, 1, 2, 3, 2, 3) )
+        self.assertEqual( ids( self.db.iterRecords(flights, chunkSize=2) ),
+                          expected )
+        self.assertEqual( ids( self.db.iterRecords(
+                                   self.db.iterFlights(order="id",
+                                                       stream=True) )),
+                          expected )
+
+        flights[0].pilot_id= 5
+        self.assertRaises( KeyError, list, self.db.iterRecords(flights) )
+
+
+    def test_escapedPercent(self):
+        self.assertEqual( self.db.unique( Pilot,
+                                          filter=Filter("last_name LIKE 'D%%' "
+                                                        "AND id = %s", 1) ).id,
+                          1 )
+
 
-#TODO: More tests required        
 
 def suite():
     """Get Test suite object
@@ -35,4 +291,4 @@ def suite():
 
 
 if __name__ == '__main__':
-    unittest.TextTestRunner(verbosity=2).run( suite() )
\ No newline at end of file
+    unittest.TextTestRunner(verbosity=2).run( suite() )
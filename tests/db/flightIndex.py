@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import random
+from datetime import datetime, timedelta
+from pysk.db import Database, Filter, FlightIndex, SQLiteBackend
+from pysk.db.model import Flight
+
+
+def randomFlight(rng, id=None):
+    """Create flight with random crew, plane and times within one week
+    """
+    departure= datetime(2015, 5, 1) + timedelta(seconds=rng.randrange(7*86400))
+    
+    return Flight( id= id,
+                   plane_id= rng.randint(1, 5),
+                   pilot_id= rng.randint(1, 10),
+                   copilot_id= rng.choice([None, rng.randint(1, 10)]),
+                   mode= rng.choice(["local", "local", "local", "inbound"]),
+                   departure_time= departure,
+                   landing_time= departure
+                                 + timedelta(seconds=rng.randrange(4*3600)) )
+
+
+
+class FlightIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.rng= random.Random(42)
+        self.db= Database( backend= SQLiteBackend(":memory:") )
+        self.db.insertFlights([ randomFlight(self.rng, id)
+                                for id in xrange(1, 501) ])
+
+
+    def tearDown(self):
+        self.db.disconnect()
+
+
+    def assertSameResults(self, index, flight, minId=0):
+        expected= self.db.iterSimilarFlights( flight,
+                                              filter=Filter("id > %s", minId) )
+        
+        self.assertEqual( sorted(f.id for f in expected),
+                          [f.id for f in index.similarFlights(flight, minId)] )
+
+
+    def test_similarFlights(self):
+        index= FlightIndex( self.db.iterFlights() )
+        
+        for i in xrange(200):
+            self.assertSameResults( index, randomFlight(self.rng),
+                                    self.rng.choice([0, 250]) )
+
+
+    def test_update(self):
+        index= FlightIndex( self.db.iterFlights() )
+        
+        ids= self.rng.sample(xrange(1, 501), 100)
+        self.db.deleteFlights(ids)
+        for id in ids:
+            index.remove(id)
+        
+        flights= [ randomFlight(self.rng, id) for id in xrange(400, 600) ]
+        self.db.insertFlights(flights, force=True)
+        for flight in flights:
+            index.add(flight)
+        
+        for i in xrange(200):
+            self.assertSameResults(index, randomFlight(self.rng))
+
+
+    def test_noCopilot(self):
+        flights= [ Flight( id=1000 + i, plane_id=10 + i, pilot_id=20 + i,
+                           copilot_id=0, mode="local",
+                           departure_time= datetime(2015, 6, 1, 10, 0),
+                           landing_time= datetime(2015, 6, 1, 11, 0) )
+                   for i in xrange(2) ]
+        self.db.insertFlights(flights[:1])
+
+        index= FlightIndex( self.db.iterFlights() )
+
+        self.assertEqual( index.similarFlights(flights[1]), [] )
+        self.assertSameResults(index, flights[1])
+
+
+    def test_covers(self):
+        index= FlightIndex( begin= datetime(2015, 5, 1),
+                            end= datetime(2015, 5, 2) )
+        
+        self.assertTrue( index.covers( Flight(
+            departure_time= datetime(2015, 5, 1, 10, 0, 30),
+            landing_time= datetime(2015, 5, 2, 0, 0, 30) ))) 
+        self.assertFalse( index.covers( Flight(
+            departure_time= datetime(2015, 4, 30, 23, 59, 30),
+            landing_time= datetime(2015, 5, 1, 10) )))
+        self.assertFalse( index.covers( Flight(
+            landing_time= datetime(2015, 5, 1, 10) )))
+
+
+
+def suite():
+    """Get Test suite object
+    """
+    return unittest.TestLoader().loadTestsFromTestCase(FlightIndexTestCase)
+
+
+
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run( suite() )
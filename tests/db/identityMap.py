@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+from pysk.db.identity_map import IdentityMap
+
+
+class IdentityMapTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.map= IdentityMap(maxSize=2)
+
+
+    def test_lookup(self):
+        self.assertIsNone( self.map.get("people", 1) )
+        self.map.put("people", 1, "first")
+        self.assertEqual( self.map.get("people", 1), "first" )
+        self.assertIsNone( self.map.get("planes", 1) )
+        self.assertEqual( (self.map.hits, self.map.misses), (1, 2) )
+
+
+    def test_eviction(self):
+        self.map.put("people", 1, "first")
+        self.map.put("people", 2, "second")
+        self.map.get("people", 1)
+        self.map.put("people", 3, "third")
+        
+        self.assertEqual( len(self.map), 2 )
+        self.assertIn( ("people", 1), self.map )
+        self.assertNotIn( ("people", 2), self.map )
+        self.assertIn( ("people", 3), self.map )
+
+
+    def test_invalidate(self):
+        self.map.put("people", 1, "first")
+        self.map.put("planes", 1, "plane")
+        self.map.invalidate("people", 1)
+        self.assertNotIn( ("people", 1), self.map )
+        
+        self.map.put("people", 2, "second")
+        self.map.invalidate("people")
+        self.assertEqual( len(self.map), 1 )
+        self.assertIn( ("planes", 1), self.map )
+
+
+
+def suite():
+    """Get Test suite object
+    """
+    return unittest.TestLoader().loadTestsFromTestCase(IdentityMapTestCase)
+
+
+
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run( suite() )
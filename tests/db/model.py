@@ -1,54 +1,82 @@
 # -*- coding: utf-8 -*-
 
 import unittest
-from pysk.db import Database
+from pysk.db import Database, SQLiteBackend
 from pysk.db.model import Airplane, Flight, LaunchMethod, Pilot, User
 
-# The following tests assume that a database startkladde-test exists with a
-# user sk-test-user with password sk
 
-class ModelTestCase(unittest.TestCase):
-
-    @classmethod
-    def setUpClass(cls):
-        cls.db= Database( user="sk-test-user",
-                          dbName="startkladde-test",
-                          password="sk")
+class ModelTests(object):
+    """Tests comparing the models with the tables of :attr:`db`
+    """
 
     @classmethod
     def tearDownClass(cls):
         cls.db.disconnect()
 
-        
-        
+
+
     def assertIsSameModel(self, cls):
         """Helper function to assert that model and table are identical
-        
+
         Arguments:
             cls Model instance
         """
         table= self.db.getTables()[ cls.tableName() ]
-        
+
         for x in table.iterColumns(cls):
             self.assertIsNone(x)
 
 
 
     def test_Models(self):
-        self.assertIsSameModel( Airplane() )        
-        self.assertIsSameModel( Flight() )        
-        self.assertIsSameModel( LaunchMethod() )        
-        self.assertIsSameModel( Pilot() )        
-        self.assertIsSameModel( User() )        
+        self.assertIsSameModel( Airplane() )
+        self.assertIsSameModel( Flight() )
+        self.assertIsSameModel( LaunchMethod() )
+        self.assertIsSameModel( Pilot() )
+        self.assertIsSameModel( User() )
+
+
+
+class ModelTestCase(ModelTests, unittest.TestCase):
+    """Compare the models with the reference schema of Startkladde
+
+    The tests assume that a MySQL database startkladde-test exists with a user
+    sk-test-user with password sk. They are skipped, if the database is not
+    available.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            cls.db= Database( user="sk-test-user",
+                              dbName="startkladde-test",
+                              password="sk")
+        except Exception as ex:
+            raise unittest.SkipTest("MySQL database startkladde-test not "
+                                    "available: {0}".format(ex))
+
+
+
+class SQLiteModelTestCase(ModelTests, unittest.TestCase):
+    """Compare the models with the schema created by the SQLite backend
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.db= Database( backend= SQLiteBackend(":memory:") )
 
 
 
 def suite():
     """Get Test suite object
     """
-    return unittest.TestLoader().loadTestsFromTestCase(ModelTestCase)
+    loader= unittest.TestLoader()
+
+    return unittest.TestSuite([
+        loader.loadTestsFromTestCase(ModelTestCase),
+        loader.loadTestsFromTestCase(SQLiteModelTestCase) ])
 
 
 
 if __name__ == '__main__':
-    unittest.TextTestRunner(verbosity=2).run( suite() )
\ No newline at end of file
+    unittest.TextTestRunner(verbosity=2).run( suite() )
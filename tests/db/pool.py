@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import os, threading
+from tempfile import mkstemp
+from pysk.db import Database, SQLiteBackend
+from pysk.db.model import Pilot
+from pysk.db.pool import ConnectionPool
+
+
+class Connection(object):
+    """Dummy connection"""
+    
+    def __init__(self):
+        self.closed= False
+        self.healthy= True
+        
+    def ping(self):
+        if not self.healthy:
+            raise IOError("Connection lost")
+    
+    def close(self):
+        self.closed= True
+
+
+
+class ConnectionPoolTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.pool= ConnectionPool(Connection, minSize=1, maxSize=2, timeout=0.01)
+
+
+    def test_reuse(self):
+        self.assertEqual( len(self.pool), 1 )
+        
+        with self.pool.connection() as c1:
+            with self.pool.connection() as c2:
+                self.assertIsNot(c1, c2)
+                self.assertEqual( len(self.pool), 2 )
+                self.assertRaises(RuntimeError, self.pool.acquire)
+                
+        self.assertIn( self.pool.acquire(), (c1, c2) )
+        self.assertEqual( len(self.pool), 2 )
+
+
+    def test_healthCheck(self):
+        self.pool.checkInterval= -1
+        conn= self.pool.acquire()
+        conn.healthy= False
+        self.pool.release(conn)
+        
+        other= self.pool.acquire()
+        self.assertIsNot(other, conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual( len(self.pool), 1 )
+
+
+    def test_threads(self):
+        conns= []
+        
+        def work():
+            with self.pool.connection() as conn:
+                conns.append(conn)
+
+        self.pool.timeout= None
+        threads= [threading.Thread(target=work) for i in xrange(8)]
+        
+        for t in threads:
+            t.start()
+        
+        for t in threads:
+            t.join()
+            
+        self.assertEqual( len(conns), 8 )
+        self.assertLessEqual( len( set(map(id, conns)) ), 2 )
+
+
+    def test_close(self):
+        conn= self.pool.acquire()
+        self.pool.close()
+        self.assertRaises(RuntimeError, self.pool.acquire)
+        self.pool.release(conn)
+        self.assertTrue(conn.closed)
+        self.assertEqual( len(self.pool), 0 )
+
+
+
+class PooledDatabaseTestCase(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path= mkstemp(suffix=".sqlite")
+        os.close(fd)
+        
+        self.db= Database( backend= SQLiteBackend(self.path) )
+        self.db.insertPilots([ Pilot(i, "Doe", str(i)) for i in xrange(1, 11) ])
+        self.db.commit()
+        self.db.disconnect()
+        
+        self.db.connect(poolSize=3)
+
+
+    def tearDown(self):
+        self.db.disconnect()
+        os.remove(self.path)
+
+
+    def test_healthCheck(self):
+        backend= self.db.backend
+        pool= ConnectionPool( backend.connect, healthCheck=backend.healthCheck,
+                              checkInterval=-1 )
+        
+        conn= pool.acquire()
+        pool.release(conn)
+        self.assertIs( pool.acquire(), conn )
+        
+        conn.close()
+        self.assertRaises(Exception, backend.healthCheck, conn)
+        pool.close()
+
+
+    def test_threads(self):
+        self.db.getTables()
+        n0= self.db.nQueries
+        errors= []
+        
+        def work(k):
+            try:
+                for i in xrange(1, 11):
+                    if self.db.pilot(i).first_name != str(i):
+                        errors.append("Wrong pilot {0}".format(i))
+                
+                self.db.insertPilots([ Pilot(100 + k, "Roe", str(k)) ])
+                self.db.commit()
+            except Exception as ex:
+                errors.append(ex)
+        
+        threads= [ threading.Thread(target=work, args=(k,))
+                   for k in xrange(8) ]
+        
+        for t in threads:
+            t.start()
+        
+        for t in threads:
+            t.join()
+        
+        self.assertEqual(errors, [])
+        self.assertEqual( self.db.nQueries - n0, 8 * 11 )
+        self.assertEqual( len( list(self.db.iterPilots()) ), 18 )
+        self.assertLessEqual( len(self.db._pool), 3 )
+
+
+
+def suite():
+    """Get Test suite object
+    """
+    loader= unittest.TestLoader()
+    
+    return unittest.TestSuite([
+        loader.loadTestsFromTestCase(ConnectionPoolTestCase),
+        loader.loadTestsFromTestCase(PooledDatabaseTestCase) ])
+
+
+
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run( suite() )
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+from pysk.db.query import Filter, Query
+from pysk.db.model import Flight, Pilot
+
+
+class QueryTestCase(unittest.TestCase):
+
+    def test_combine(self):
+        f= Filter.equal("first_name", "Jo") & Filter.equal("last_name", "O'Neal")
+        self.assertEqual( f.expression, "(first_name=%s) AND (last_name=%s)" )
+        self.assertEqual( f.params, ("Jo", "O'Neal") )
+        
+        f|= Filter("id > %s", 3)
+        self.assertEqual( f.params, ("Jo", "O'Neal", 3) )
+        self.assertIs( f & None, f )
+
+
+    def test_reduce(self):
+        self.assertIsNone( Filter.all(None, None) )
+
+        f= Filter.equal("plane_id", 2)
+        self.assertIs( Filter.all(None, f), f )
+
+        f= Filter.any( f, Filter.isIn("id", [1, 2]), None )
+        self.assertEqual( f.expression, "(plane_id=%s) OR (id IN (%s,%s))" )
+        self.assertEqual( f.params, (2, 1, 2) )
+
+
+    def test_statement(self):
+        q1= Query(Pilot, filter=Filter.equal("id", 1), columns=["id"])
+        q2= Query(Pilot, filter=Filter.equal("id", 2), columns=["id"])
+        self.assertEqual( q1.statement(), "SELECT id FROM people WHERE id=%s" )
+        self.assertIs( q1.statement(), q2.statement() )
+        self.assertEqual( q2.params(), (2,) )
+        
+        q= Query(Flight, filter="mode='local'", order="departure_time")
+        self.assertEqual( q.statement(), "SELECT * FROM flights WHERE "
+                                         "mode='local' ORDER BY departure_time")
+        self.assertIsNone( q.params() )
+
+
+
+def suite():
+    """Get Test suite object
+    """
+    return unittest.TestLoader().loadTestsFromTestCase(QueryTestCase)
+
+
+
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run( suite() )
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+from pysk.db import Database, Resolver, SQLiteBackend
+from pysk.db.model import Airplane, LaunchMethod, Pilot
+
+
+class ResolverTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.db= Database( backend= SQLiteBackend(":memory:") )
+        self.db.insertPilots([ Pilot(1, "Doe", "John"),
+                               Pilot(2, "Roe", "Jane"),
+                               Pilot(3, "Roe", "Jane") ])
+        self.db.insert( Airplane, [ Airplane(1, "D-1234"),
+                                    Airplane(2, "D-KXYZ") ])
+        self.db.insert( LaunchMethod, [
+            LaunchMethod(1, "Winch", "W", type="winch"),
+            LaunchMethod(2, "Airtow D-KXYZ", "D-KXYZ", type="airtow",
+                         towplane_registration="D-KXYZ"),
+            LaunchMethod(3, "Self launch", "E", type="self") ])
+        self.resolver= Resolver(self.db)
+
+
+    def tearDown(self):
+        self.db.disconnect()
+
+
+    def test_pilots(self):
+        self.assertEqual(self.resolver.getPilotByName("John", "Doe").id, 1)
+        self.assertEqual(self.resolver.getPilotByName("john ", "DOE").id, 1)
+        self.assertRaises(KeyError, self.resolver.getPilotByName, "Jane", "Roe")
+        self.assertRaises(KeyError, self.resolver.getPilotByName, "Jim", "Doe")
+
+
+    def test_planes(self):
+        self.assertEqual(self.resolver.getPlaneByRegistration("D-KXYZ").id, 2)
+        self.assertRaises( KeyError, self.resolver.getPlaneByRegistration,
+                           "D-0000" )
+
+
+    def test_launchMethods(self):
+        self.assertEqual(self.resolver.getLaunchMethodByName("Winch").id, 1)
+        self.assertEqual(self.resolver.getLaunchMethodByName("E").id, 3)
+        self.assertRaises( KeyError, self.resolver.getLaunchMethodByName,
+                           "E", allowShortNames=False )
+        self.assertEqual(
+            self.resolver.getLaunchMethodByTowplane("D-KXYZ").id, 2 )
+        self.assertRaises( KeyError, self.resolver.getLaunchMethodByTowplane,
+                           None )
+
+
+    def test_towplaneOfOtherType(self):
+        self.db.insert( LaunchMethod, [
+            LaunchMethod(4, "Winch D-KXYZ", "WX", type="winch",
+                         towplane_registration="D-KXYZ") ])
+        self.db.commit()
+
+        self.assertEqual( self.resolver.getLaunchMethodByTowplane("D-KXYZ").id,
+                          self.db.getLaunchMethodByTowplane("D-KXYZ").id )
+
+
+    def test_queries(self):
+        nQueries= self.db.nQueries
+        
+        for i in xrange(10):
+            self.resolver.getPilotByName("John", "Doe")
+            self.resolver.getLaunchMethodByName("Winch")
+            
+        self.assertEqual(self.db.nQueries - nQueries, 2)
+
+
+
+def suite():
+    """Get Test suite object
+    """
+    return unittest.TestLoader().loadTestsFromTestCase(ResolverTestCase)
+
+
+
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run( suite() )
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+import random
+from copy import copy
+from datetime import datetime, timedelta
+from pysk.db import ConflictHandler, StagedConflictHandler
+from pysk.db import Database, Record, SQLiteBackend
+from pysk.db.model import Flight
+import pysk.db.conflict_handler as ch
+
+
+def randomFlight(rng, id=None, noCopilot=None):
+    """Create random local flight on a single day, *noCopilot* is the copilot
+    id of flights without copilot
+    """
+    departure= ( datetime(2015, 5, 1)
+                 + timedelta(minutes= rng.randrange(1440),
+                             seconds= rng.randint(1, 59)) )
+
+    return Flight( id= id,
+                   plane_id= rng.randint(1, 10),
+                   pilot_id= rng.randint(1, 20),
+                   copilot_id= rng.choice([noCopilot, rng.randint(1, 20)]),
+                   mode="local",
+                   departure_location="A",
+                   landing_location= rng.choice(["A", "A", "A", None]),
+                   departure_time= departure,
+                   landing_time= departure
+                                 + timedelta(minutes=rng.randint(1, 90)) )
+
+
+
+class StagedConflictHandlerTestCase(unittest.TestCase):
+
+    def importFlights(self, handlerClass, mode, seed, commitInterval=None,
+                            noCopilot=None):
+        rng= random.Random(seed)
+        db= Database( backend= SQLiteBackend(":memory:") )
+
+        existing= [ randomFlight(rng, id=i, noCopilot=noCopilot)
+                    for i in xrange(1, 101) ]
+        db.insertFlights(existing)
+        db.commit()
+
+        candidates= []
+        for i in xrange(300):
+            choice= rng.random()
+
+            if choice < 0.1:
+                # exact duplicate of an existing flight
+                candidates.append( copy( rng.choice(existing) ))
+                candidates[-1].id= None
+            elif choice < 0.2:
+                # duplicate of a preceding candidate
+                candidates.append( copy( rng.choice(candidates or existing) ))
+            elif choice < 0.3:
+                # update of an existing flight
+                candidates.append( randomFlight(rng, id=rng.randint(1, 100),
+                                                noCopilot=noCopilot) )
+            else:
+                candidates.append( randomFlight(rng, noCopilot=noCopilot) )
+
+        handler= handlerClass( db, mode=mode, verbose=0,
+                               commitInterval=commitInterval )
+
+        for flight in candidates:
+            handler( Record(flight) )
+
+        handler.checkpoint(force=True)
+
+        return ( [ (f.id, f.pilot_id, f.plane_id, f.departure_time)
+                   for f in db.iterFlights(order="id") ],
+                 handler.nDeleted )
+
+
+    def assertSameResult(self, mode, commitInterval=None, noCopilot=None):
+        for seed in xrange(5):
+            expected= self.importFlights( ConflictHandler, mode, seed,
+                                          noCopilot=noCopilot )
+            result= self.importFlights( StagedConflictHandler, mode, seed,
+                                        commitInterval, noCopilot )
+
+            self.assertEqual(result, expected)
+            self.assertTrue(100 < len(result[0]) < 400)
+
+
+    def test_ignore(self):
+        self.assertSameResult(ch.IGNORE_ALL_CONFLICTS)
+
+
+    def test_reject(self):
+        self.assertSameResult(ch.REJECT_ON_CONFLICT)
+
+
+    def test_commitInterval(self):
+        self.assertSameResult(ch.REJECT_ON_CONFLICT, commitInterval=37)
+
+
+    def test_noCopilot(self):
+        self.assertSameResult(ch.REJECT_ON_CONFLICT, noCopilot=0)
+
+
+    def test_stagedConflicts(self):
+        db= Database( backend= SQLiteBackend(":memory:") )
+        t0= datetime(2015, 5, 1, 10, 0)
+        db.insertFlights([ Flight( id=1, plane_id=1, pilot_id=1, mode="local",
+                                   departure_time=t0,
+                                   landing_time=t0 + timedelta(minutes=30) ),
+                           Flight( id=2, plane_id=2, copilot_id=3,
+                                   mode="local",
+                                   departure_time=t0,
+                                   landing_time=t0 + timedelta(minutes=30) ),
+                           Flight( id=3, plane_id=3, pilot_id=4, copilot_id=0,
+                                   mode="local",
+                                   departure_time=t0,
+                                   landing_time=t0 + timedelta(minutes=30) ) ])
+
+        db.stageFlights([ Flight( plane_id=9, pilot_id=3,
+                                  departure_time=t0 + timedelta(minutes=10),
+                                  landing_time=t0 + timedelta(minutes=20) ),
+                          Flight( id=1, plane_id=1, pilot_id=1,
+                                  departure_time=t0,
+                                  landing_time=t0 + timedelta(minutes=20) ),
+                          Flight( plane_id=1, pilot_id=5,
+                                  landing_time=t0 + timedelta(minutes=5) ),
+                          Flight( plane_id=1, pilot_id=1,
+                                  departure_time=t0 ),
+                          Flight( plane_id=8, pilot_id=6, copilot_id=0,
+                                  departure_time=t0 + timedelta(minutes=10),
+                                  landing_time=t0 + timedelta(minutes=20) ) ])
+
+        self.assertEqual( [ (seq, flight.id) for seq, flight
+                            in db.iterStagedConflicts(columns=["id"]) ],
+                          [ (0, 2), (2, 1) ] )
+
+        db.dropStagedFlights()
+
+
+    def test_interactive(self):
+        with self.assertRaises(ValueError):
+            StagedConflictHandler(mode=ch.INTERACTIVE)
+
+
+
+def suite():
+    """Get Test suite object
+    """
+    return unittest.TestLoader().loadTestsFromTestCase(
+                                                StagedConflictHandlerTestCase)
+
+
+
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run( suite() )
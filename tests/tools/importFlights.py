@@ -0,0 +1,138 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+import unittest
+import os, shutil, stat, tempfile
+from datetime import datetime
+from StringIO import StringIO
+from pysk.db import Database, SQLiteBackend
+from pysk.db.model import Airplane, Flight, LaunchMethod, Pilot
+from pysk.tools import ToolBase, ImportFlights
+
+
+HEADER= ( "Datum;Kennzeichen;Pilot Vorname;Pilot Nachname;Begleiter Vorname;"
+          "Begleiter Nachname;Flugtyp;Anzahl Landungen;Modus;Startzeit;"
+          "Landezeit;Startart;Modus Schleppflugzeug;Startort;Zielort;"
+          "Bemerkungen;Abrechnungshinweis;DBID\n" )
+
+
+def line(id, time):
+    """Create csv line of a local flight
+    """
+    return ( "2015-05-01;D-1234;John;Doe;;;Normalflug;1;Lokal;{1};{1};Winde;;"
+             "Home;Home;;;{0}\n".format(id, time) )
+
+
+
+class Parent(ToolBase):
+    """Minimal parent tool providing an in-memory database
+    """
+
+    def __init__(self):
+        super(Parent, self).__init__()
+        self.log= StringIO()
+        self.log.encoding= None
+        self.config.logStream= self.log
+        self.db= Database( backend= SQLiteBackend(":memory:") )
+
+
+    def connectDatabase(self):
+        pass
+
+
+
+class ImportFlightsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir= tempfile.mkdtemp()
+        self.path= os.path.join(self.tmpDir, "flights.csv")
+
+        with open(self.path, "wb") as oFile:
+            oFile.write(HEADER)
+            oFile.writelines([ line(i, "10:{0:02d}".format(i))
+                               for i in xrange(1, 6) ])
+
+        self.parent= Parent()
+        self.db= self.parent.db
+        self.db.insertPilots([ Pilot(1, "Doe", "John", "LSV") ])
+        self.db.insert( Airplane, [ Airplane(1, "D-1234") ])
+        self.db.insert( LaunchMethod, [ LaunchMethod(1, "Winde", "W",
+                                                     type="winch") ])
+        self.db.commit()
+
+
+    def tearDown(self):
+        os.chmod(self.tmpDir, stat.S_IRWXU)
+        shutil.rmtree(self.tmpDir)
+        self.db.disconnect()
+
+
+    def run_import(self, *args):
+        tool= ImportFlights(self.parent)
+        tool([ self.path, "-s", ";", "-m", "ignore" ] + list(args))
+
+        return tool
+
+
+    def test_noJournal(self):
+        tool= self.run_import()
+
+        self.assertEqual(tool.nErrors, 0)
+        self.assertEqual(len( list(self.db.iterFlights()) ), 5)
+        self.assertEqual(os.listdir(self.tmpDir), ["flights.csv"])
+
+
+    def test_indexConflicts(self):
+        for args in [ (), ("--index-conflicts",) ]:
+            self.db.delete(Flight, "1=1")
+            self.db.insertFlights([
+                Flight( id=100 + i, plane_id=1, pilot_id=1, mode="local",
+                        departure_location="Home", landing_location="Other",
+                        departure_time= datetime(2015, 5, 1, 10, i - 1, 30),
+                        landing_time= datetime(2015, 5, 1, 10, i, 30) )
+                for i in xrange(1, 6) ])
+            self.db.commit()
+
+            # the DBIDs of the csv file are lower than the conflicting ids
+            self.run_import("-m", "replace", *args)
+
+            self.assertEqual( [ f.id for f in self.db.iterFlights(order="id") ],
+                              range(101, 106) )
+
+
+    def test_readOnlyDirectory(self):
+        os.chmod(self.tmpDir, stat.S_IRUSR | stat.S_IXUSR)
+
+        if os.access(self.tmpDir, os.W_OK):
+            self.skipTest("directory stays writable for this user")
+
+        self.run_import()
+        self.assertEqual(len( list(self.db.iterFlights()) ), 5)
+
+        self.run_import("--resume")
+        self.assertIn("WARNING: Cannot write journal",
+                      self.parent.log.getvalue())
+
+
+    def test_journalNotWritable(self):
+        # a directory in place of the temporary file makes saving fail
+        os.mkdir(self.path + ".journal.tmp")
+
+        tool= self.run_import("--resume")
+
+        self.assertEqual(tool.nErrors, 0)
+        self.assertEqual(len( list(self.db.iterFlights()) ), 5)
+        self.assertIn("WARNING: Cannot write journal",
+                      self.parent.log.getvalue())
+
+
+
+def suite():
+    """Get Test suite object
+    """
+    return unittest.TestLoader().loadTestsFromTestCase(ImportFlightsTestCase)
+
+
+
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run( suite() )
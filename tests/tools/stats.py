@@ -0,0 +1,78 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+import unittest
+from datetime import datetime
+from StringIO import StringIO
+from pysk.db import Database, SQLiteBackend
+from pysk.db.model import Airplane, Flight, LaunchMethod, Pilot
+from pysk.tools import ToolBase, Stats
+
+
+
+class Parent(ToolBase):
+    """Minimal parent tool providing an in-memory database
+    """
+
+    def __init__(self):
+        super(Parent, self).__init__()
+        self.log= StringIO()
+        self.log.encoding= None
+        self.out= StringIO()
+        self.out.encoding= None
+        self.config.logStream= self.log
+        self.config.outStream= self.out
+        self.db= Database( backend= SQLiteBackend(":memory:") )
+
+
+    def connectDatabase(self):
+        pass
+
+
+
+class StatsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.parent= Parent()
+        self.db= self.parent.db
+        self.db.insertPilots([ Pilot(1, "Doe", "John", "LSV") ])
+        self.db.insert( Airplane, [ Airplane(1, "D-1234") ])
+        self.db.insert( LaunchMethod, [ LaunchMethod(1, "Winde", "W",
+                                                     type="winch") ])
+        self.db.insertFlights([
+            Flight( id=i, plane_id=1, pilot_id=1, launch_method_id=1,
+                    mode="local", departure_location="Home",
+                    landing_location= "Home" if i != 2 else "",
+                    departure_time= datetime(2015, 5, 1, 10, 10*i),
+                    landing_time= datetime(2015, 5, 1, 10, 10*i + 5) )
+            for i in xrange(1, 4) ])
+        self.db.commit()
+
+
+    def tearDown(self):
+        self.db.disconnect()
+
+
+    def test_incompleteFlight(self):
+        for n, args in enumerate([ (), ("-A",) ], 1):
+            tool= Stats(self.parent)
+            tool([ "D-1234", "-t", "2015-05-01" ] + list(args))
+
+            self.assertEqual(tool.nErrors, 1)
+            self.assertEqual( self.parent.log.getvalue().count(
+                                  "2015-05-01 10:20-10:25 D-1234 Doe,John\n"
+                                  " -> missing landing_location\n" ),
+                              n )
+            self.assertEqual( self.parent.out.getvalue().count("D-1234"), n )
+
+
+
+def suite():
+    """Get Test suite object
+    """
+    return unittest.TestLoader().loadTestsFromTestCase(StatsTestCase)
+
+
+
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run( suite() )
@@ -0,0 +1,72 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+import unittest
+import os, shutil, tempfile
+from pysk.utils.journal import Journal, fileHash
+
+
+class JournalTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpDir= tempfile.mkdtemp()
+        self.source= os.path.join(self.tmpDir, "flights.csv")
+        self.path= self.source + ".journal"
+
+        with open(self.source, "wb") as oFile:
+            oFile.write("Datum;Startzeit\n2015-05-01;10:00\n")
+
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpDir)
+
+
+    def test_fileHash(self):
+        self.assertEqual( fileHash(self.source, blockSize=3),
+                          fileHash(self.source) )
+
+
+    def test_saveLoad(self):
+        journal= Journal(self.path, self.source, {"mode": "ignore"})
+        self.assertFalse( journal.exists() )
+
+        journal.committed= 42
+        journal.decisions["43/conflicts"]= 's'
+        journal.save()
+
+        self.assertTrue( journal.exists() )
+        self.assertFalse( os.path.exists(self.path + ".tmp") )
+
+        resumed= Journal(self.path, self.source, {"mode": "ignore"})
+        resumed.load()
+
+        self.assertEqual(resumed.committed, 42)
+        self.assertEqual(resumed.decisions, {"43/conflicts": 's'})
+
+        resumed.remove()
+        self.assertFalse( resumed.exists() )
+
+
+    def test_mismatch(self):
+        Journal(self.path, self.source, {"mode": "ignore"}).save()
+
+        with self.assertRaises(ValueError):
+            Journal(self.path, self.source, {"mode": "replace"}).load()
+
+        with open(self.source, "ab") as oFile:
+            oFile.write("2015-05-01;11:00\n")
+
+        with self.assertRaises(ValueError):
+            Journal(self.path, self.source, {"mode": "ignore"}).load()
+
+
+
+def suite():
+    """Get Test suite object
+    """
+    return unittest.TestLoader().loadTestsFromTestCase(JournalTestCase)
+
+
+
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run( suite() )
@@ -0,0 +1,94 @@
+#!/usr/bin/env python2
+# -*- coding: utf-8 -*-
+
+import unittest
+import random
+import re
+from datetime import datetime, timedelta
+from pysk.utils.time_parser import TimeParser, DateTimeParser
+
+
+DATE_FORMATS= [ "%Y-%m-%d", "%d.%m.%Y", "%d.%m.%y", "%Y%m%d", "%m/%d/%Y" ]
+TIME_FORMATS= [ "%H:%M", "%H:%M:%S", "%H%M", "%Hh %M" ]
+
+
+class TimeParserTestCase(unittest.TestCase):
+
+    def assertSameResult(self, parser, date, time):
+        try:
+            expected= datetime.strptime(date + "T" + time, parser.format)
+        except ValueError:
+            self.assertRaises(ValueError, parser, date, time)
+        else:
+            self.assertEqual(parser(date, time), expected)
+
+
+    def test_compiled(self):
+        for fmt in DATE_FORMATS + TIME_FORMATS:
+            self.assertTrue( TimeParser(fmt).compiled() )
+
+        self.assertFalse( TimeParser("%d %b %Y").compiled() )
+        self.assertFalse( TimeParser("%H:%H").compiled() )
+
+
+    def perturb(self, rng, string):
+        """Randomly drop leading zeros or replace a character
+        """
+        if rng.random() < 0.3:
+            string= re.sub(r"\b0(\d)", r"\1", string)
+
+        if rng.random() < 0.3:
+            i= rng.randrange(len(string))
+            string= string[:i] + rng.choice("0123456789 :.") + string[i+1:]
+
+        return string
+
+
+    def test_random(self):
+        rng= random.Random(1)
+        t0= datetime(1960, 1, 1)
+
+        for dateformat in DATE_FORMATS:
+            for timeformat in TIME_FORMATS:
+                parser= DateTimeParser(dateformat, timeformat)
+
+                for i in xrange(300):
+                    t= t0 + timedelta(seconds=rng.randrange(100*365*86400))
+                    self.assertSameResult(
+                        parser,
+                        self.perturb(rng, t.strftime(dateformat)),
+                        self.perturb(rng, t.strftime(timeformat)) )
+
+
+    def test_values(self):
+        parser= DateTimeParser("%d.%m.%Y", "%H:%M")
+
+        for date, time in [ ("1.5.2015", "9:05"),
+                            ("01.05.2015", "09:05"),
+                            (" 1.5.2015", "9:05"),
+                            ("29.02.2015", "10:00"),
+                            ("29.02.2016", "10:00"),
+                            ("1.5.2015", "9:05 "),
+                            ("1.5.2015", "25:00") ]:
+            self.assertSameResult(parser, date, time)
+
+
+    def test_fallback(self):
+        parser= DateTimeParser("%d %b %Y", "%H:%M")
+
+        self.assertEqual( parser("1 May 2015", "10:00"),
+                          datetime(2015, 5, 1, 10, 0) )
+        self.assertSameResult(DateTimeParser("%Y-%m-%d %H", "%M"),
+                              "2015-05-01 10", "30")
+
+
+
+def suite():
+    """Get Test suite object
+    """
+    return unittest.TestLoader().loadTestsFromTestCase(TimeParserTestCase)
+
+
+
+if __name__ == '__main__':
+    unittest.TextTestRunner(verbosity=2).run( suite() )